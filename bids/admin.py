@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Bid, BidStats
+
+
+@admin.register(Bid)
+class BidAdmin(admin.ModelAdmin):
+    list_display = ['job', 'freelancer', 'amount', 'status', 'created_at']
+    list_filter = ['status']
+    raw_id_fields = ['job', 'freelancer']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(BidStats)
+class BidStatsAdmin(admin.ModelAdmin):
+    list_display = ['job', 'bid_count', 'lowest_bid', 'bid_total', 'updated_at']
+    raw_id_fields = ['job']
+    readonly_fields = ['bid_count', 'bid_total', 'lowest_bid', 'updated_at']
@@ -0,0 +1,27 @@
+# bids/management/commands/reconcile_bid_stats.py
+from django.core.management.base import BaseCommand
+
+from bids.services import DEFAULT_BATCH_SIZE, reconcile_bid_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute per-job bid stats from the bids table in batches and report (or fix) drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--fix', action='store_true', help='Overwrite drifted stats with the recomputed values')
+
+    def handle(self, *args, **options):
+        checked = drifted = 0
+        for batch_checked, batch_drift in reconcile_bid_stats(options['batch_size'], fix=options['fix']):
+            checked += batch_checked
+            drifted += len(batch_drift)
+            for job_id, diffs in batch_drift:
+                details = ', '.join(
+                    f'{name}: {stored} -> {actual}' for name, (stored, actual) in diffs.items()
+                )
+                self.stdout.write(f'Job {job_id}: {details}')
+
+        verb = 'fixed' if options['fix'] else 'found'
+        style = self.style.SUCCESS if not drifted or options['fix'] else self.style.WARNING
+        self.stdout.write(style(f'Checked {checked} jobs; {verb} drift in {drifted}'))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:25
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('jobs', '0002_updated_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidStats',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='bid_stats', serialize=False, to='jobs.job')),
+                ('bid_count', models.PositiveIntegerField(default=0)),
+                ('bid_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('lowest_bid', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'bid_stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='Bid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('delivery_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('cover_letter', models.TextField(blank=True, max_length=5000)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('withdrawn', 'Withdrawn'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], default='active', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bids', to=settings.AUTH_USER_MODEL)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bids', to='jobs.job')),
+            ],
+            options={
+                'db_table': 'bids',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'active')), fields=['job', 'amount'], name='bids_active_by_amount'), models.Index(fields=['freelancer', '-created_at'], name='bids_freelancer_created')],
+                'constraints': [models.UniqueConstraint(fields=('job', 'freelancer'), name='bids_one_per_freelancer'), models.CheckConstraint(condition=models.Q(('amount__gt', 0)), name='bids_amount_positive')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:28
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bidstats',
+            name='bid_total_squares',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=24),
+        ),
+        migrations.AddField(
+            model_name='bidstats',
+            name='highest_bid',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='bidstats',
+            name='last_bid_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
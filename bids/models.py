@@ -1,3 +1,80 @@
+from django.conf import settings
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Q
+from decimal import Decimal
 
-# Create your models here.
+
+class Bid(models.Model):
+    STATUS_CHOICES = (
+        ('active', 'Active'),
+        ('withdrawn', 'Withdrawn'),
+        ('accepted', 'Accepted'),
+        ('rejected', 'Rejected'),
+    )
+
+    job = models.ForeignKey('jobs.Job', on_delete=models.CASCADE, related_name='bids')
+    freelancer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='bids')
+    amount = models.DecimalField(
+        max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    delivery_days = models.PositiveIntegerField(null=True, blank=True)
+    cover_letter = models.TextField(max_length=5000, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'bids'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'freelancer'], name='bids_one_per_freelancer'),
+            models.CheckConstraint(condition=Q(amount__gt=0), name='bids_amount_positive'),
+        ]
+        indexes = [
+            # A job's live bids, cheapest first
+            models.Index(fields=['job', 'amount'], condition=Q(status='active'), name='bids_active_by_amount'),
+            models.Index(fields=['freelancer', '-created_at'], name='bids_freelancer_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.freelancer_id} -> {self.job_id}: {self.amount} ({self.status})"
+
+
+class BidStats(models.Model):
+    """
+    Running aggregates over a job's active bids, maintained by bids/services.py
+    in the same transaction as every bid change; `reconcile_bid_stats` checks
+    them against the bids table.
+    """
+    job = models.OneToOneField('jobs.Job', on_delete=models.CASCADE, primary_key=True, related_name='bid_stats')
+    bid_count = models.PositiveIntegerField(default=0)
+    bid_total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    # Sum of squared amounts, for the variance without a scan
+    bid_total_squares = models.DecimalField(max_digits=24, decimal_places=4, default=Decimal('0'))
+    lowest_bid = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    highest_bid = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    last_bid_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'bid_stats'
+
+    def __str__(self):
+        return f"Job {self.job_id}: {self.bid_count} bids"
+
+    @property
+    def average_bid(self):
+        if not self.bid_count:
+            return None
+        return (self.bid_total / self.bid_count).quantize(Decimal('0.01'))
+
+    @property
+    def bid_stddev(self):
+        """Population standard deviation of the active bid amounts"""
+        if not self.bid_count:
+            return None
+        mean = self.bid_total / self.bid_count
+        variance = max(self.bid_total_squares / self.bid_count - mean * mean, Decimal('0'))
+        return variance.sqrt().quantize(Decimal('0.01'))
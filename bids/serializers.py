@@ -0,0 +1,39 @@
+# bids/serializers.py
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Bid, BidStats
+
+
+class BidSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Bid
+        fields = [
+            'id', 'job', 'freelancer', 'amount', 'delivery_days', 'cover_letter',
+            'status', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['freelancer', 'status', 'created_at', 'updated_at']
+
+    def validate_job(self, job):
+        if job.status != 'open':
+            raise serializers.ValidationError("This job is not accepting bids.")
+        if job.bid_deadline and job.bid_deadline <= timezone.now():
+            raise serializers.ValidationError("The bidding deadline for this job has passed.")
+        request = self.context.get('request')
+        if request and job.client_id == request.user.pk:
+            raise serializers.ValidationError("You cannot bid on your own job.")
+        return job
+
+
+class BidUpdateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Bid
+        fields = ['amount', 'delivery_days', 'cover_letter']
+
+
+class BidStatsSerializer(serializers.ModelSerializer):
+    average_bid = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = BidStats
+        fields = ['bid_count', 'average_bid', 'lowest_bid', 'highest_bid', 'last_bid_at']
@@ -0,0 +1,209 @@
+# bids/services.py
+"""
+Bid writes and the per-job aggregates that go with them.
+
+New bids change a job's BidStats with a single UPDATE of F()/Least()/
+Greatest() expressions in the same transaction as the bid row, so
+concurrent bids on a popular job serialize only on that job's stats row, for
+the few milliseconds until commit, and never read-modify-write stale values.
+Withdrawals and edits, which can move the lowest/highest bid inwards, lock
+the stats row with select_for_update and recompute the extremes from the
+bids_active_by_amount index only when the changed bid was one of them. One
+bid per freelancer per job is enforced by the bids_one_per_freelancer
+constraint.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .models import Bid, BidStats
+
+
+class DuplicateBid(Exception):
+    """The freelancer already has a bid on this job"""
+
+
+class BidNotActive(Exception):
+    """The bid was withdrawn (or decided) and can no longer change"""
+
+
+def _update_stats(job_id, **changes):
+    """Apply F() expressions to a job's stats row, creating it on first use"""
+    changes['updated_at'] = timezone.now()
+    if BidStats.objects.filter(job_id=job_id).update(**changes):
+        return
+    BidStats.objects.bulk_create([BidStats(job_id=job_id)], ignore_conflicts=True)
+    BidStats.objects.filter(job_id=job_id).update(**changes)
+
+
+def _lock_stats(job_id):
+    BidStats.objects.bulk_create([BidStats(job_id=job_id)], ignore_conflicts=True)
+    return BidStats.objects.select_for_update().get(job_id=job_id)
+
+
+def _refresh_extremes(stats):
+    """Recompute lowest/highest/last_bid_at from the job's active bids (index range scan)"""
+    values = Bid.objects.filter(job_id=stats.job_id, status='active').aggregate(
+        lowest_bid=Min('amount'), highest_bid=Max('amount'), last_bid_at=Max('created_at'),
+    )
+    for name, value in values.items():
+        setattr(stats, name, value)
+
+
+def submit_bid(job, freelancer_id, amount, delivery_days=None, cover_letter=''):
+    """Create a bid and count it in the job's stats atomically"""
+    try:
+        with transaction.atomic():
+            bid = Bid.objects.create(
+                job=job, freelancer_id=freelancer_id, amount=amount,
+                delivery_days=delivery_days, cover_letter=cover_letter,
+            )
+            _update_stats(
+                job.pk,
+                bid_count=F('bid_count') + 1,
+                bid_total=F('bid_total') + amount,
+                bid_total_squares=F('bid_total_squares') + amount * amount,
+                lowest_bid=Least(Coalesce(F('lowest_bid'), Value(amount)), Value(amount)),
+                highest_bid=Greatest(Coalesce(F('highest_bid'), Value(amount)), Value(amount)),
+                last_bid_at=Greatest(Coalesce(F('last_bid_at'), Value(bid.created_at)), Value(bid.created_at)),
+            )
+    except IntegrityError as exc:
+        if 'bids_one_per_freelancer' in str(exc):
+            raise DuplicateBid('You have already placed a bid on this job.')
+        raise
+    return bid
+
+
+def _lock_active_bid(bid_id):
+    bid = Bid.objects.select_for_update().get(pk=bid_id)
+    if bid.status != 'active':
+        raise BidNotActive(f'This bid is {bid.status} and can no longer be changed.')
+    return bid
+
+
+def withdraw_bid(bid_id):
+    """Withdraw an active bid and take it out of the job's stats"""
+    with transaction.atomic():
+        bid = _lock_active_bid(bid_id)
+        stats = _lock_stats(bid.job_id)
+        bid.status = 'withdrawn'
+        bid.save(update_fields=['status', 'updated_at'])
+
+        stats.bid_count = max(stats.bid_count - 1, 0)
+        stats.bid_total -= bid.amount
+        stats.bid_total_squares -= bid.amount * bid.amount
+        if not stats.bid_count:
+            stats.bid_total = stats.bid_total_squares = 0
+            stats.lowest_bid = stats.highest_bid = stats.last_bid_at = None
+        elif (bid.amount in (stats.lowest_bid, stats.highest_bid)
+              or (stats.last_bid_at and bid.created_at >= stats.last_bid_at)):
+            _refresh_extremes(stats)
+        stats.save()
+    return bid
+
+
+def edit_bid(bid_id, **changes):
+    """Update an active bid's amount/delivery/cover letter and the job's stats"""
+    with transaction.atomic():
+        bid = _lock_active_bid(bid_id)
+        old_amount = bid.amount
+        for name, value in changes.items():
+            setattr(bid, name, value)
+        bid.save(update_fields=[*changes, 'updated_at'])
+
+        new_amount = bid.amount
+        if new_amount != old_amount:
+            stats = _lock_stats(bid.job_id)
+            stats.bid_total += new_amount - old_amount
+            stats.bid_total_squares += new_amount * new_amount - old_amount * old_amount
+            if old_amount in (stats.lowest_bid, stats.highest_bid):
+                _refresh_extremes(stats)
+            else:
+                stats.lowest_bid = min(stats.lowest_bid, new_amount)
+                stats.highest_bid = max(stats.highest_bid, new_amount)
+            stats.save()
+    return bid
+
+
+STATS_FIELDS = (
+    'bid_count', 'bid_total', 'bid_total_squares', 'lowest_bid', 'highest_bid', 'last_bid_at',
+)
+EMPTY_STATS = {
+    'bid_count': 0, 'bid_total': Decimal('0'), 'bid_total_squares': Decimal('0'),
+    'lowest_bid': None, 'highest_bid': None, 'last_bid_at': None,
+}
+DEFAULT_BATCH_SIZE = 500
+
+
+def _actual_stats(job_ids):
+    """{job_id: aggregates} over the active bids of the given jobs, in one grouped query"""
+    rows = (
+        Bid.objects.filter(job_id__in=job_ids, status='active')
+        .values('job_id')
+        .annotate(
+            bid_count=Count('id'),
+            bid_total=Sum('amount'),
+            bid_total_squares=Sum(
+                F('amount') * F('amount'), output_field=BidStats._meta.get_field('bid_total_squares')
+            ),
+            lowest_bid=Min('amount'),
+            highest_bid=Max('amount'),
+            last_bid_at=Max('created_at'),
+        )
+        .order_by()
+    )
+    return {row.pop('job_id'): row for row in rows}
+
+
+def reconcile_bid_stats(batch_size=DEFAULT_BATCH_SIZE, fix=False):
+    """
+    Recompute every job's stats from its bids, one batch of job ids per
+    transaction. Yields (jobs checked, [(job_id, {field: (stored, actual)})])
+    per batch; with fix=True drifted rows are corrected as they are found.
+    """
+    from jobs.models import Job
+
+    last_id = 0
+    while True:
+        job_ids = list(
+            Job.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not job_ids:
+            return
+        last_id = job_ids[-1]
+
+        with transaction.atomic():
+            # Lock the stored rows before aggregating: a bid committed after the
+            # lock has to wait for it, so both sides describe the same bids
+            stored = {
+                stats.job_id: stats
+                for stats in BidStats.objects.select_for_update().filter(job_id__in=job_ids)
+            }
+            actual = _actual_stats(job_ids)
+
+            drifted, changed, missing = [], [], []
+            for job_id in job_ids:
+                expected = actual.get(job_id, EMPTY_STATS)
+                stats = stored.get(job_id)
+                if stats is None:
+                    if job_id not in actual:
+                        continue
+                    stats = BidStats(job_id=job_id)
+                diffs = {
+                    name: (getattr(stats, name), expected[name])
+                    for name in STATS_FIELDS if getattr(stats, name) != expected[name]
+                }
+                if not diffs:
+                    continue
+                drifted.append((job_id, diffs))
+                for name in STATS_FIELDS:
+                    setattr(stats, name, expected[name])
+                (missing if stats._state.adding else changed).append(stats)
+
+            if fix:
+                BidStats.objects.bulk_update(changed, STATS_FIELDS)
+                BidStats.objects.bulk_create(missing, ignore_conflicts=True)
+        yield len(job_ids), drifted
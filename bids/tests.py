@@ -1,3 +1,202 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework import status
+
+from bids.models import Bid, BidStats
+from bids.services import BidNotActive, DuplicateBid, edit_bid, submit_bid, withdraw_bid
+from jobs.models import Job
+from users.apitesting import UserAPITestCase, create_user
+
+
+def make_job(client, **fields):
+    values = {
+        'client': client, 'title': 'Landing page', 'description': 'One page',
+        'budget_min': Decimal('100'), 'budget_max': Decimal('300'),
+    }
+    values.update(fields)
+    return Job.objects.create(**values)
+
+
+class BidSubmissionTestCase(UserAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = make_job(self.client_user)
+        self.freelancer = create_user('freelancer')
+
+    def test_submit_bid_updates_stats(self):
+        self.authenticate(self.freelancer)
+        response = self.client.post('/api/bids/', {'job': self.job.id, 'amount': '250.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['freelancer'], self.freelancer.id)
+
+        submit_bid(self.job, create_user('second').pk, Decimal('150.00'))
+        stats = BidStats.objects.get(job=self.job)
+        self.assertEqual(stats.bid_count, 2)
+        self.assertEqual(stats.lowest_bid, Decimal('150.00'))
+        self.assertEqual(stats.average_bid, Decimal('200.00'))
+
+    def test_one_bid_per_freelancer(self):
+        submit_bid(self.job, self.freelancer.pk, Decimal('200'))
+        with self.assertRaises(DuplicateBid):
+            submit_bid(self.job, self.freelancer.pk, Decimal('100'))
+
+        self.authenticate(self.freelancer)
+        response = self.client.post('/api/bids/', {'job': self.job.id, 'amount': '90'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        stats = BidStats.objects.get(job=self.job)
+        self.assertEqual((stats.bid_count, stats.lowest_bid), (1, Decimal('200.00')))
+
+    def test_rejected_submissions(self):
+        self.authenticate(self.client_user)
+        response = self.client.post('/api/bids/', {'job': self.job.id, 'amount': '90'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        closed = make_job(self.client_user, status='closed')
+        self.authenticate(self.freelancer)
+        response = self.client.post('/api/bids/', {'job': closed.id, 'amount': '90'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Bid.objects.exists())
+
+    def test_job_bids_visible_to_owner(self):
+        submit_bid(self.job, self.freelancer.pk, Decimal('200'))
+        submit_bid(self.job, create_user('cheap').pk, Decimal('120'))
+
+        self.authenticate(self.client_user)
+        response = self.client.get('/api/bids/', {'job': self.job.id})
+        self.assertEqual([bid['amount'] for bid in response.data['results']], ['120.00', '200.00'])
+
+        self.authenticate(self.freelancer)
+        response = self.client.get('/api/bids/', {'job': self.job.id})
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get('/api/bids/')
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class BidStatsTestCase(UserAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = make_job(self.client_user)
+        self.bids = [
+            submit_bid(self.job, create_user(f'f{amount}').pk, Decimal(amount))
+            for amount in ('100', '200', '300')
+        ]
+
+    def stats(self):
+        return BidStats.objects.get(job=self.job)
+
+    def test_create_tracks_moments(self):
+        stats = self.stats()
+        self.assertEqual((stats.bid_count, stats.bid_total), (3, Decimal('600')))
+        self.assertEqual(stats.bid_total_squares, Decimal('140000'))
+        self.assertEqual((stats.lowest_bid, stats.highest_bid), (Decimal('100'), Decimal('300')))
+        self.assertEqual(stats.last_bid_at, self.bids[-1].created_at)
+        self.assertEqual(stats.bid_stddev, Decimal('81.65'))
+
+    def test_withdraw_and_edit(self):
+        withdraw_bid(self.bids[0].pk)
+        stats = self.stats()
+        self.assertEqual((stats.bid_count, stats.lowest_bid, stats.average_bid),
+                         (2, Decimal('200'), Decimal('250.00')))
+        with self.assertRaises(BidNotActive):
+            withdraw_bid(self.bids[0].pk)
+
+        edit_bid(self.bids[2].pk, amount=Decimal('150'))
+        stats = self.stats()
+        self.assertEqual((stats.lowest_bid, stats.highest_bid, stats.bid_total),
+                         (Decimal('150'), Decimal('200'), Decimal('350')))
+
+        withdraw_bid(self.bids[1].pk)
+        withdraw_bid(self.bids[2].pk)
+        stats = self.stats()
+        self.assertEqual((stats.bid_count, stats.bid_total, stats.lowest_bid, stats.last_bid_at),
+                         (0, Decimal('0'), None, None))
+
+    def test_bid_endpoints(self):
+        freelancer = self.bids[0].freelancer
+        self.authenticate(freelancer)
+        response = self.client.patch(f'/api/bids/{self.bids[0].pk}/', {'amount': '350'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stats().highest_bid, Decimal('350'))
+
+        response = self.client.post(f'/api/bids/{self.bids[1].pk}/withdraw/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(f'/api/bids/{self.bids[0].pk}/withdraw/')
+        self.assertEqual(response.data['status'], 'withdrawn')
+        self.assertEqual(self.stats().bid_count, 2)
+
+    def test_job_feed_renders_stats_without_extra_queries(self):
+        make_job(self.client_user, title='No bids yet')
+
+        def feed_queries():
+            with self.assertNumQueries(1):
+                return self.client.get('/api/jobs/').data['results']
+
+        results = feed_queries()
+        self.assertEqual(results[1]['bid_stats']['bid_count'], 3)
+        self.assertEqual(results[1]['bid_stats']['average_bid'], '200.00')
+        self.assertEqual(results[0]['bid_stats']['bid_count'], 0)
+
+        for i in range(3):
+            submit_bid(make_job(self.client_user), create_user(f'extra{i}').pk, Decimal('50'))
+        self.assertEqual(len(feed_queries()), 5)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        BidStats.objects.filter(job=self.job).update(bid_count=7, lowest_bid=Decimal('1'))
+        Bid.objects.filter(pk=self.bids[2].pk).update(status='withdrawn')  # bypasses the service
+        other = make_job(self.client_user)
+        Bid.objects.create(job=other, freelancer=self.bids[0].freelancer, amount=Decimal('80'))
+
+        out = StringIO()
+        call_command('reconcile_bid_stats', batch_size=1, stdout=out)
+        self.assertIn(f'Job {self.job.id}: bid_count: 7 -> 2', out.getvalue())
+        self.assertIn('Checked 2 jobs; found drift in 2', out.getvalue())
+        self.assertEqual(self.stats().bid_count, 7)
+
+        call_command('reconcile_bid_stats', '--fix', stdout=StringIO())
+        stats = self.stats()
+        self.assertEqual((stats.bid_count, stats.lowest_bid, stats.highest_bid),
+                         (2, Decimal('100'), Decimal('200')))
+        self.assertEqual(BidStats.objects.get(job=other).bid_count, 1)
+
+        out = StringIO()
+        call_command('reconcile_bid_stats', stdout=out)
+        self.assertIn('found drift in 0', out.getvalue())
+
+
+class ConcurrentBidTestCase(TransactionTestCase):
+    def test_burst_of_bids_keeps_stats_exact(self):
+        client = create_user('client', user_type='client')
+        job = make_job(client)
+        freelancers = [create_user(f'f{i}') for i in range(12)]
+        amounts = [Decimal(100 + 7 * i) for i in range(len(freelancers))]
+        barrier = threading.Barrier(len(freelancers))
+        errors = []
+
+        def bid(freelancer, amount):
+            try:
+                barrier.wait()
+                submit_bid(job, freelancer.pk, amount)
+                submit_bid(job, freelancer.pk, amount)
+            except DuplicateBid:
+                pass
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=bid, args=args) for args in zip(freelancers, amounts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        stats = BidStats.objects.get(job=job)
+        self.assertEqual(stats.bid_count, len(freelancers))
+        self.assertEqual(stats.bid_total, sum(amounts))
+        self.assertEqual(stats.lowest_bid, min(amounts))
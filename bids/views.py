@@ -1,3 +1,76 @@
-from django.shortcuts import render
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
-# Create your views here.
+from jobs.models import Job
+from users.authentication import ClaimsJWTAuthentication
+from users.pagination import KeysetPagination
+
+from .models import Bid
+from .serializers import BidSerializer, BidUpdateSerializer
+from .services import BidNotActive, DuplicateBid, edit_bid, submit_bid, withdraw_bid
+
+
+class IsFreelancerToBid(permissions.IsAuthenticated):
+    message = 'Only freelancers can place bids.'
+
+    def has_permission(self, request, view):
+        if not super().has_permission(request, view):
+            return False
+        return view.action != 'create' or request.user.user_type == 'freelancer'
+
+
+class BidViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                 mixins.UpdateModelMixin, viewsets.GenericViewSet):
+    """
+    Freelancers place, edit, withdraw and list their own bids; ?job=<id> lists
+    a job's bids, cheapest first, for the client who posted it.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsFreelancerToBid]
+    serializer_class = BidSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        user_id = self.request.user.pk
+        job_id = self.request.query_params.get('job')
+        if self.action == 'list' and job_id:
+            if not job_id.isdigit() or not Job.objects.filter(pk=job_id, client_id=user_id).exists():
+                return Bid.objects.none()
+            return Bid.objects.filter(job_id=job_id, status='active').order_by('amount')
+        if self.action == 'retrieve':
+            # The bidder and the job's client may both read a bid
+            return Bid.objects.filter(freelancer_id=user_id) | Bid.objects.filter(job__client_id=user_id)
+        return Bid.objects.filter(freelancer_id=user_id)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            bid = submit_bid(
+                data['job'], request.user.pk, data['amount'],
+                delivery_days=data.get('delivery_days'), cover_letter=data.get('cover_letter', ''),
+            )
+        except DuplicateBid as exc:
+            return Response({'job': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(bid).data, status=status.HTTP_201_CREATED)
+
+    def update(self, request, *args, **kwargs):
+        bid = self.get_object()
+        serializer = BidUpdateSerializer(bid, data=request.data, partial=kwargs.get('partial', False))
+        serializer.is_valid(raise_exception=True)
+        try:
+            bid = edit_bid(bid.pk, **serializer.validated_data)
+        except BidNotActive as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(bid).data)
+
+    @action(detail=True, methods=['post'])
+    def withdraw(self, request, pk=None):
+        bid = self.get_object()
+        try:
+            bid = withdraw_bid(bid.pk)
+        except BidNotActive as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(bid).data)
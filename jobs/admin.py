@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['title', 'client', 'status', 'budget_type', 'budget_min', 'budget_max', 'created_at']
+    list_filter = ['status', 'budget_type', 'experience_level']
+    search_fields = ['title']
+    raw_id_fields = ['client']
+    readonly_fields = ['skill_slugs', 'created_at', 'updated_at']
@@ -0,0 +1,344 @@
+# jobs/matching.py
+"""
+Freelancer <-> job recommendations scored with NumPy over in-memory indexes.
+
+Each process keeps two compact matrices: available freelancers and open
+jobs. A row holds up to MAX_SKILLS skill ids (padded with -1) plus the
+numeric columns the scores need, so scoring a job against every freelancer
+is a handful of vectorized array operations and a top-K partition.
+
+Indexes refresh incrementally: every MATCHING_REFRESH_INTERVAL seconds the
+rows whose `updated_at` moved since the last refresh are re-read and
+upserted in place (one indexed query). A full rebuild every
+MATCHING_FULL_REFRESH_INTERVAL seconds drops rows deleted meanwhile.
+"""
+import threading
+import time
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from users.models import User
+
+from .models import Job
+
+MAX_SKILLS = 32
+INITIAL_CAPACITY = 1024
+# Re-read rows this far behind the last refresh; commits can land out of order
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+EXPERIENCE_RANKS = {level: rank for rank, (level, _) in enumerate(User.EXPERIENCE_LEVELS)}
+AVAILABILITY_WEIGHTS = {'available': 1.0, 'busy': 0.5}
+
+WEIGHTS = {
+    'skills': 0.45,
+    'rate': 0.2,
+    'rating': 0.15,
+    'experience': 0.1,
+    'timezone': 0.05,
+    'availability': 0.05,
+}
+
+
+class SkillVocabulary:
+    """Skill slug <-> dense column id, shared by both indexes; only grows"""
+
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def ids(self, slugs, add=True):
+        result = []
+        for slug in slugs:
+            skill_id = self._ids.get(slug)
+            if skill_id is None and add:
+                with self._lock:
+                    skill_id = self._ids.setdefault(slug, len(self._ids))
+            if skill_id is not None:
+                result.append(skill_id)
+        return result
+
+    def mask(self, slugs):
+        """Boolean lookup table for `slugs`; the extra last slot keeps -1 padding False"""
+        mask = np.zeros(len(self._ids) + 1, dtype=bool)
+        mask[self.ids(slugs, add=False)] = True
+        return mask
+
+
+vocabulary = SkillVocabulary()
+
+
+def timezone_offset(name):
+    """Current UTC offset of a timezone name, in hours"""
+    try:
+        return timezone.now().astimezone(ZoneInfo(name)).utcoffset().total_seconds() / 3600
+    except (KeyError, ValueError):
+        return 0.0
+
+
+def _float(value):
+    return float(value) if value is not None else np.nan
+
+
+class CandidateIndex:
+    """
+    Fixed-width rows of candidates, updated in place. Subclasses define the
+    queryset, which rows are candidates and how a row's columns are built.
+    """
+    columns = ()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.positions = {}
+        self.size = 0
+        self.ids = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.active = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self.skills = np.full((INITIAL_CAPACITY, MAX_SKILLS), -1, dtype=np.int32)
+        self.skill_counts = np.zeros(INITIAL_CAPACITY, dtype=np.int16)
+        self.values = {name: np.full(INITIAL_CAPACITY, np.nan, dtype=np.float32) for name in self.columns}
+        self.watermark = None
+        self.refreshed_at = 0.0
+        self.rebuilt_at = 0.0
+
+    def get_queryset(self, full=False):
+        """Rows to read; a full rebuild may skip rows that cannot be candidates"""
+        raise NotImplementedError
+
+    def is_candidate(self, obj):
+        raise NotImplementedError
+
+    def row_values(self, obj):
+        raise NotImplementedError
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        self.ids = np.resize(self.ids, capacity)
+        self.active = np.concatenate([self.active, np.zeros(capacity - len(self.active), dtype=bool)])
+        padding = np.full((capacity - len(self.skills), MAX_SKILLS), -1, dtype=np.int32)
+        self.skills = np.concatenate([self.skills, padding])
+        self.skill_counts = np.resize(self.skill_counts, capacity)
+        for name, column in self.values.items():
+            self.values[name] = np.concatenate(
+                [column, np.full(capacity - len(column), np.nan, dtype=np.float32)]
+            )
+
+    def upsert(self, obj):
+        position = self.positions.get(obj.pk)
+        if not self.is_candidate(obj):
+            if position is not None:
+                self.active[position] = False
+            return
+        if position is None:
+            if self.size == len(self.ids):
+                self._grow()
+            position = self.positions[obj.pk] = self.size
+            self.size += 1
+
+        skill_ids = vocabulary.ids(obj.skill_slugs[:MAX_SKILLS])
+        self.ids[position] = obj.pk
+        self.active[position] = True
+        self.skills[position] = -1
+        self.skills[position, :len(skill_ids)] = skill_ids
+        self.skill_counts[position] = len(skill_ids)
+        for name, value in self.row_values(obj).items():
+            self.values[name][position] = value
+
+    def refresh(self, full=False):
+        """Re-read changed rows (or rebuild from the candidates); returns the rows read"""
+        with self._lock:
+            if full:
+                self._reset()
+            started = timezone.now()
+            queryset = self.get_queryset(full=full)
+            if self.watermark is not None:
+                queryset = queryset.filter(updated_at__gt=self.watermark - WATERMARK_OVERLAP)
+            count = 0
+            for obj in queryset.iterator(chunk_size=2000):
+                self.upsert(obj)
+                count += 1
+            self.watermark = started
+            self.refreshed_at = time.monotonic()
+            if full:
+                self.rebuilt_at = self.refreshed_at
+            return count
+
+    def invalidate(self):
+        """Refresh on next use instead of waiting for the interval"""
+        self.refreshed_at = 0.0
+
+    def discard(self, pk):
+        with self._lock:
+            position = self.positions.get(pk)
+            if position is not None:
+                self.active[position] = False
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if not self.rebuilt_at or now - self.rebuilt_at >= settings.MATCHING_FULL_REFRESH_INTERVAL:
+            self.refresh(full=True)
+        elif now - self.refreshed_at >= settings.MATCHING_REFRESH_INTERVAL:
+            self.refresh()
+
+    def overlap(self, slugs):
+        """Per-row count of skills shared with `slugs`"""
+        mask = vocabulary.mask(slugs)
+        return mask[self.skills[:self.size]].sum(axis=1)
+
+    def column(self, name):
+        return self.values[name][:self.size]
+
+
+class FreelancerIndex(CandidateIndex):
+    columns = ('rate', 'experience', 'rating', 'timezone', 'availability')
+
+    def get_queryset(self, full=False):
+        queryset = User.objects.filter(user_type='freelancer').only(
+            'id', 'is_active', 'user_type', 'skill_slugs', 'hourly_rate', 'experience_level',
+            'average_rating', 'timezone', 'availability_status', 'updated_at',
+        )
+        if full:
+            queryset = queryset.filter(is_active=True, availability_status__in=AVAILABILITY_WEIGHTS)
+        return queryset
+
+    def is_candidate(self, user):
+        return (user.is_active and user.user_type == 'freelancer'
+                and user.availability_status in AVAILABILITY_WEIGHTS)
+
+    def row_values(self, user):
+        return {
+            'rate': _float(user.hourly_rate),
+            'experience': EXPERIENCE_RANKS.get(user.experience_level, np.nan),
+            'rating': float(user.average_rating),
+            'timezone': timezone_offset(user.timezone),
+            'availability': AVAILABILITY_WEIGHTS[user.availability_status],
+        }
+
+
+class JobIndex(CandidateIndex):
+    columns = ('budget_min', 'budget_max', 'hourly', 'experience', 'timezone')
+
+    def get_queryset(self, full=False):
+        queryset = Job.objects.select_related('client').only(
+            'id', 'status', 'skill_slugs', 'budget_type', 'budget_min', 'budget_max',
+            'experience_level', 'updated_at', 'client__timezone',
+        )
+        return queryset.filter(status='open') if full else queryset
+
+    def is_candidate(self, job):
+        return job.status == 'open'
+
+    def row_values(self, job):
+        return {
+            'budget_min': float(job.budget_min),
+            'budget_max': float(job.budget_max),
+            'hourly': 1.0 if job.budget_type == 'hourly' else 0.0,
+            'experience': EXPERIENCE_RANKS.get(job.experience_level, np.nan),
+            'timezone': timezone_offset(job.client.timezone),
+        }
+
+
+def skill_score(overlap, required_counts):
+    """Share of the job's required skills covered; jobs without skills score 0.5"""
+    required_counts = np.asarray(required_counts, dtype=np.float32)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coverage = overlap / required_counts
+    return np.where(required_counts > 0, coverage, 0.5)
+
+
+def rate_fit(rates, budget_min, budget_max, hourly):
+    """
+    1 inside the budget, decaying with the relative distance outside it.
+    Fixed-price jobs and unknown rates are neutral (0.5).
+    """
+    rates = np.asarray(rates, dtype=np.float32)
+    budget_min = np.maximum(np.asarray(budget_min, dtype=np.float32), 1e-6)
+    budget_max = np.maximum(np.asarray(budget_max, dtype=np.float32), 1e-6)
+    above = np.clip((rates - budget_max) / budget_max, 0, None)
+    below = np.clip((budget_min - rates) / budget_min, 0, None)
+    fit = np.exp(-2 * above) * (1 - 0.5 * below)
+    return np.where(np.asarray(hourly, dtype=bool) & ~np.isnan(rates), fit, 0.5)
+
+
+def experience_fit(candidate_levels, required_levels):
+    """1 for the same level, 0 at opposite ends; anything unknown is neutral"""
+    diff = np.abs(np.asarray(candidate_levels) - np.asarray(required_levels))
+    fit = 1 - diff / (len(EXPERIENCE_RANKS) - 1)
+    return np.where(np.isnan(fit), 0.5, fit)
+
+
+def timezone_fit(offsets, other_offset):
+    """1 in the same timezone, 0 twelve or more hours apart"""
+    diff = np.abs(np.asarray(offsets) - other_offset)
+    diff = np.minimum(diff, 24 - diff)
+    return 1 - np.minimum(diff, 12) / 12
+
+
+def top_k(ids, scores, k):
+    """(id, score) pairs for the k best scores, best first"""
+    if k <= 0 or not len(scores):
+        return []
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind='stable')]
+    return [(int(ids[i]), round(float(scores[i]), 4)) for i in best]
+
+
+freelancer_index = FreelancerIndex()
+job_index = JobIndex()
+
+
+def recommend_freelancers(job, k=20):
+    """Best-matching available freelancers for a job, as (user id, score)"""
+    index = freelancer_index
+    with index._lock:
+        index.ensure_fresh()
+        required = job.skill_slugs[:MAX_SKILLS]
+        overlap = index.overlap(required)
+        eligible = index.active[:index.size].copy()
+        if required:
+            eligible &= overlap > 0
+        eligible[index.ids[:index.size] == job.client_id] = False
+
+        scores = (
+            WEIGHTS['skills'] * skill_score(overlap, len(required)) +
+            WEIGHTS['rate'] * rate_fit(index.column('rate'), float(job.budget_min),
+                                       float(job.budget_max), job.budget_type == 'hourly') +
+            WEIGHTS['rating'] * index.column('rating') / 5 +
+            WEIGHTS['experience'] * experience_fit(
+                index.column('experience'), EXPERIENCE_RANKS.get(job.experience_level, np.nan)
+            ) +
+            WEIGHTS['timezone'] * timezone_fit(index.column('timezone'), timezone_offset(job.client.timezone)) +
+            WEIGHTS['availability'] * index.column('availability')
+        )
+        positions = np.flatnonzero(eligible)
+        return top_k(index.ids[positions], scores[positions], k)
+
+
+def recommend_jobs(freelancer, k=20):
+    """Best-matching open jobs for a freelancer, as (job id, score)"""
+    index = job_index
+    with index._lock:
+        index.ensure_fresh()
+        overlap = index.overlap(freelancer.skill_slugs[:MAX_SKILLS])
+        eligible = index.active[:index.size] & (overlap > 0)
+
+        scores = (
+            WEIGHTS['skills'] * skill_score(overlap, index.skill_counts[:index.size]) +
+            WEIGHTS['rate'] * rate_fit(_float(freelancer.hourly_rate), index.column('budget_min'),
+                                       index.column('budget_max'), index.column('hourly')) +
+            WEIGHTS['experience'] * experience_fit(
+                EXPERIENCE_RANKS.get(freelancer.experience_level, np.nan), index.column('experience')
+            ) +
+            WEIGHTS['timezone'] * timezone_fit(index.column('timezone'), timezone_offset(freelancer.timezone))
+        )
+        positions = np.flatnonzero(eligible)
+        return top_k(index.ids[positions], scores[positions], k)
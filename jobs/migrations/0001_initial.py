@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:19
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(max_length=10000)),
+                ('skills', models.JSONField(blank=True, default=list)),
+                ('skill_slugs', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), blank=True, default=list, editable=False, size=None)),
+                ('experience_level', models.CharField(blank=True, choices=[('entry', 'Entry Level'), ('intermediate', 'Intermediate'), ('expert', 'Expert'), ('senior', 'Senior')], max_length=20)),
+                ('budget_type', models.CharField(choices=[('fixed', 'Fixed Price'), ('hourly', 'Hourly')], default='fixed', max_length=10)),
+                ('budget_min', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('budget_max', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('currency', models.CharField(default='USD', max_length=3)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('open', 'Open'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('closed', 'Closed')], default='open', max_length=20)),
+                ('bid_deadline', models.DateTimeField(blank=True, null=True)),
+                ('delivery_deadline', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs_posted', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'open')), fields=['-created_at', 'id'], name='jobs_open_feed'), models.Index(condition=models.Q(('status', 'open')), fields=['experience_level', '-created_at', 'id'], name='jobs_open_level_feed'), models.Index(condition=models.Q(('status', 'open')), fields=['budget_max', 'budget_min'], name='jobs_open_budget'), django.contrib.postgres.indexes.GinIndex(condition=models.Q(('status', 'open')), fields=['skill_slugs'], name='jobs_open_skill_slugs_gin'), django.contrib.postgres.indexes.GinIndex(condition=models.Q(('status', 'open')), fields=['search_vector'], name='jobs_open_search_gin'), models.Index(fields=['client', 'status', '-created_at'], name='jobs_client_status')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('budget_max__gte', models.F('budget_min'))), name='jobs_budget_range_valid')],
+            },
+        ),
+    ]
@@ -1,3 +1,109 @@
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import F, Q
+from decimal import Decimal
 
-# Create your models here.
+from users.models import User
+from users.skills import canonicalize_skills
+
+from .search import JOB_SEARCH_VECTOR_FIELDS, job_search_vector
+
+# Partial indexes below only cover open jobs, which is all the public feed
+# ever reads; closed history grows without slowing the feed down
+OPEN = Q(status='open')
+
+
+class Job(models.Model):
+    STATUS_CHOICES = (
+        ('draft', 'Draft'),
+        ('open', 'Open'),
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+        ('closed', 'Closed'),
+    )
+
+    BUDGET_TYPES = (
+        ('fixed', 'Fixed Price'),
+        ('hourly', 'Hourly'),
+    )
+
+    client = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='jobs_posted'
+    )
+    title = models.CharField(max_length=200)
+    description = models.TextField(max_length=10000)
+
+    # Required skills; skill_slugs holds their canonical slugs for indexed filtering
+    skills = models.JSONField(default=list, blank=True)
+    skill_slugs = ArrayField(models.CharField(max_length=100), default=list, blank=True, editable=False)
+    experience_level = models.CharField(max_length=20, choices=User.EXPERIENCE_LEVELS, blank=True)
+
+    budget_type = models.CharField(max_length=10, choices=BUDGET_TYPES, default='fixed')
+    budget_min = models.DecimalField(
+        max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal('0.00'))]
+    )
+    budget_max = models.DecimalField(
+        max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal('0.00'))]
+    )
+    currency = models.CharField(max_length=3, default='USD')
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    bid_deadline = models.DateTimeField(null=True, blank=True)
+    delivery_deadline = models.DateField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Full-text search document, maintained by update_search_vector()
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['-created_at']
+        indexes = [
+            # Public feed: newest open jobs, optionally by experience level
+            models.Index(fields=['-created_at', 'id'], condition=OPEN, name='jobs_open_feed'),
+            models.Index(
+                fields=['experience_level', '-created_at', 'id'], condition=OPEN,
+                name='jobs_open_level_feed'
+            ),
+            models.Index(fields=['budget_max', 'budget_min'], condition=OPEN, name='jobs_open_budget'),
+            GinIndex(fields=['skill_slugs'], condition=OPEN, name='jobs_open_skill_slugs_gin'),
+            GinIndex(fields=['search_vector'], condition=OPEN, name='jobs_open_search_gin'),
+            # A client's own jobs, any status
+            models.Index(fields=['client', 'status', '-created_at'], name='jobs_client_status'),
+            # Incremental refresh of the matching index (jobs/matching.py)
+            models.Index(fields=['updated_at'], name='jobs_updated_at'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(budget_max__gte=F('budget_min')), name='jobs_budget_range_valid'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'skills' in update_fields:
+            self.skill_slugs = canonicalize_skills(self.skills)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'skill_slugs'}
+
+        super().save(*args, **kwargs)
+        if update_fields is None or set(update_fields) & set(JOB_SEARCH_VECTOR_FIELDS):
+            self.update_search_vector()
+
+    def update_search_vector(self):
+        """Recompute the search document in the database for this job"""
+        Job.objects.filter(pk=self.pk).update(search_vector=job_search_vector())
+
+    @property
+    def is_open(self):
+        return self.status == 'open'
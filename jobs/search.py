@@ -0,0 +1,27 @@
+# jobs/search.py
+from django.contrib.postgres.search import SearchVector
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from users.search import SEARCH_CONFIG
+
+# Fields that feed Job.search_vector; saving any of them refreshes the vector
+JOB_SEARCH_VECTOR_FIELDS = ('title', 'skills', 'description')
+
+
+def job_search_vector():
+    """Weighted tsvector expression: title > skills > description"""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector(Cast('skills', TextField()), weight='B', config=SEARCH_CONFIG) +
+        SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def filter_by_budget(queryset, budget_min=None, budget_max=None):
+    """Jobs whose budget range overlaps [budget_min, budget_max]"""
+    if budget_min is not None:
+        queryset = queryset.filter(budget_max__gte=budget_min)
+    if budget_max is not None:
+        queryset = queryset.filter(budget_min__lte=budget_max)
+    return queryset
@@ -0,0 +1,55 @@
+# jobs/serializers.py
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from rest_framework import serializers
+
+from bids.models import BidStats
+from bids.serializers import BidStatsSerializer
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    # Clients publish or save drafts; later transitions belong to the hiring flow
+    WRITABLE_STATUSES = ('draft', 'open', 'cancelled', 'closed')
+
+    # Denormalized; select_related('bid_stats') renders it without extra queries
+    bid_stats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'client', 'title', 'description', 'skills', 'experience_level',
+            'budget_type', 'budget_min', 'budget_max', 'currency', 'status',
+            'bid_deadline', 'delivery_deadline', 'bid_stats', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['client', 'created_at', 'updated_at']
+
+    def get_bid_stats(self, job):
+        try:
+            stats = job.bid_stats
+        except ObjectDoesNotExist:
+            stats = BidStats(job_id=job.pk)
+        return BidStatsSerializer(stats).data
+
+    def validate_skills(self, value):
+        if not isinstance(value, list) or not all(isinstance(skill, str) for skill in value):
+            raise serializers.ValidationError("Skills must be a list of names.")
+        return value
+
+    def validate_status(self, value):
+        if value not in self.WRITABLE_STATUSES:
+            raise serializers.ValidationError(f"Status cannot be set to '{value}'.")
+        return value
+
+    def validate_bid_deadline(self, value):
+        if value and value <= timezone.now():
+            raise serializers.ValidationError("Bid deadline must be in the future.")
+        return value
+
+    def validate(self, attrs):
+        budget_min = attrs.get('budget_min', getattr(self.instance, 'budget_min', None))
+        budget_max = attrs.get('budget_max', getattr(self.instance, 'budget_max', None))
+        if budget_min is not None and budget_max is not None and budget_max < budget_min:
+            raise serializers.ValidationError({'budget_max': "Must be at least budget_min."})
+        return attrs
@@ -0,0 +1,29 @@
+# jobs/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import User
+
+from .matching import freelancer_index, job_index
+from .models import Job
+
+
+@receiver(post_save, sender=User)
+def freelancer_changed(sender, instance, **kwargs):
+    if instance.user_type == 'freelancer':
+        freelancer_index.invalidate()
+
+
+@receiver(post_delete, sender=User)
+def freelancer_deleted(sender, instance, **kwargs):
+    freelancer_index.discard(instance.pk)
+
+
+@receiver(post_save, sender=Job)
+def job_changed(sender, instance, **kwargs):
+    job_index.invalidate()
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    job_index.discard(instance.pk)
@@ -1,3 +1,175 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from jobs.matching import freelancer_index, job_index, rate_fit, recommend_freelancers, top_k
+from jobs.models import Job
+from users.apitesting import UserAPITestCase, create_client, create_user
+
+
+class JobFeedTestCase(UserAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.freelancer = create_user('freelancer')
+
+    def post_job(self, **fields):
+        values = {
+            'client': self.client_user, 'title': 'Build a store', 'description': 'An online shop',
+            'skills': ['Python'], 'budget_min': Decimal('100'), 'budget_max': Decimal('500'),
+        }
+        values.update(fields)
+        return Job.objects.create(**values)
+
+    def test_feed_filters(self):
+        django_job = self.post_job(title='Django REST API', skills=['Django', 'Python'],
+                                   budget_min=Decimal('1000'), budget_max=Decimal('3000'))
+        react_job = self.post_job(title='React dashboard', skills=['React'], experience_level='expert')
+        self.post_job(title='Old Django gig', skills=['Django'], status='closed')
+        self.post_job(title='Unpublished Django job', skills=['Django'], status='draft')
+
+        def ids(**params):
+            response = self.client.get('/api/jobs/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [job['id'] for job in response.data['results']]
+
+        self.assertEqual(ids(), [react_job.id, django_job.id])
+        self.assertEqual(ids(search='django api'), [django_job.id])
+        self.assertEqual(ids(skills='django,python', skills_match='all'), [django_job.id])
+        self.assertEqual(ids(budget_min='600'), [django_job.id])
+        self.assertEqual(ids(budget_max='200'), [react_job.id])
+        self.assertEqual(ids(experience_level='expert'), [react_job.id])
+        self.assertEqual(self.client.get('/api/jobs/', {'budget_min': 'x'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pagination(self):
+        jobs = [self.post_job(title=f'Job {i}') for i in range(5)]
+        response = self.client.get('/api/jobs/', {'page_size': 2})
+        seen = [job['id'] for job in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [job['id'] for job in response.data['results']]
+        self.assertEqual(seen, [job.id for job in reversed(jobs)])
+
+    def test_client_posts_job(self):
+        self.authenticate(self.client_user)
+        response = self.client.post('/api/jobs/', {
+            'title': 'Mobile app', 'description': 'iOS and Android', 'skills': ['Flutter'],
+            'budget_min': '2000', 'budget_max': '5000',
+            'bid_deadline': (timezone.now() + timedelta(days=7)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.client, self.client_user)
+        self.assertEqual(job.skill_slugs, ['flutter'])
+        self.client_user.refresh_from_db()
+        self.assertEqual(self.client_user.total_projects_posted, 1)
+
+        response = self.client.post('/api/jobs/', {
+            'title': 'Bad budget', 'description': '-', 'budget_min': '500', 'budget_max': '100',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_posting_changes_the_profile_etag(self):
+        self.authenticate(self.client_user)
+        etag = self.client.get(reverse('current_user_profile'))['ETag']
+        self.client.post('/api/jobs/', {
+            'title': 'Mobile app', 'description': 'iOS and Android', 'budget_min': '1', 'budget_max': '2',
+        }, format='json')
+        response = self.client.get(reverse('current_user_profile'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_projects_posted'], 1)
+
+    def test_only_owner_writes(self):
+        job = self.post_job()
+        self.authenticate(self.freelancer)
+        response = self.client.post('/api/jobs/', {
+            'title': 'Nope', 'description': '-', 'budget_min': '1', 'budget_max': '2',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.authenticate(create_client('other'))
+        response = self.client.patch(f'/api/jobs/{job.id}/', {'title': 'Mine now'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_drafts_visible_to_owner_only(self):
+        draft = self.post_job(status='draft')
+        self.assertEqual(self.client.get(f'/api/jobs/{draft.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.authenticate(self.client_user)
+        self.assertEqual(self.client.get(f'/api/jobs/{draft.id}/').status_code, status.HTTP_200_OK)
+        response = self.client.get('/api/jobs/mine/', {'status': 'draft'})
+        self.assertEqual([job['id'] for job in response.data['results']], [draft.id])
+
+
+class MatchingTestCase(UserAPITestCase):
+    client_user_fields = {'timezone': 'Europe/London'}
+
+    def setUp(self):
+        super().setUp()
+        freelancer_index.refresh(full=True)
+        job_index.refresh(full=True)
+        self.job = Job.objects.create(
+            client=self.client_user, title='Django API', description='REST backend',
+            skills=['Django', 'Python', 'PostgreSQL'], experience_level='expert',
+            budget_type='hourly', budget_min=Decimal('40'), budget_max=Decimal('60'),
+        )
+
+    def freelancer(self, name, skills, rate, **fields):
+        return create_user(name, skills=skills, hourly_rate=Decimal(rate), **fields)
+
+    def test_recommend_freelancers_ranks_by_fit(self):
+        best = self.freelancer('best', ['Django', 'Python', 'PostgreSQL'], '50',
+                               experience_level='expert', timezone='Europe/Berlin')
+        partial = self.freelancer('partial', ['Python'], '50', experience_level='expert')
+        pricey = self.freelancer('pricey', ['Django', 'Python', 'PostgreSQL'], '200',
+                                 experience_level='expert', timezone='Europe/Berlin')
+        self.freelancer('unrelated', ['Figma'], '50')
+        self.freelancer('away', ['Django'], '50', availability_status='unavailable')
+
+        ranked = [user_id for user_id, _ in recommend_freelancers(self.job)]
+        self.assertEqual(ranked, [best.id, pricey.id, partial.id])
+        self.assertEqual(len(recommend_freelancers(self.job, k=1)), 1)
+
+    def test_index_refreshes_incrementally(self):
+        user = self.freelancer('late', ['React'], '50')
+        freelancer_index.refresh()
+        self.assertEqual(recommend_freelancers(self.job), [])
+
+        user.skills = ['Django']
+        user.save()
+        freelancer_index.refresh()
+        with self.assertNumQueries(0):
+            self.assertEqual([user_id for user_id, _ in recommend_freelancers(self.job)], [user.id])
+
+        user.availability_status = 'unavailable'
+        user.save()
+        # The save signal makes the next lookup refresh on its own
+        self.assertEqual(recommend_freelancers(self.job), [])
+
+    def test_scoring_helpers(self):
+        fit = rate_fit([50, 100, 20, np.nan], 40, 60, True)
+        self.assertEqual(fit[0], 1)
+        self.assertLess(fit[1], fit[0])
+        self.assertLess(fit[2], fit[0])
+        self.assertEqual(fit[3], 0.5)
+        self.assertEqual(top_k(np.array([7, 8, 9]), np.array([0.1, 0.9, 0.5]), 2), [(8, 0.9), (9, 0.5)])
+
+    def test_recommendation_endpoints(self):
+        freelancer = self.freelancer('match', ['Django'], '45')
+        self.authenticate(freelancer)
+        response = self.client.get('/api/jobs/recommended/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([match['job']['id'] for match in response.data['results']], [self.job.id])
+
+        url = f'/api/jobs/{self.job.id}/recommended-freelancers/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.authenticate(self.client_user)
+        response = self.client.get('/api/jobs/recommended/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['freelancer']['id'], freelancer.id)
@@ -0,0 +1,12 @@
+# jobs/urls.py
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from . import views
+
+router = DefaultRouter()
+router.register(r'', views.JobViewSet, basename='jobs')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
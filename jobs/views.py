@@ -1,3 +1,168 @@
-from django.shortcuts import render
+from decimal import Decimal, InvalidOperation
 
-# Create your views here.
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+
+from notifications.fanout import notify_job_match
+from users.authentication import ClaimsJWTAuthentication
+from users.models import User
+from users.pagination import KeysetPagination
+from users.profiles import bump_profile_version
+from users.search import FullTextSearchFilter, RankedOrderingFilter
+from users.serializers import UserListSerializer
+from users.skills import filter_by_skills
+from users.utils.permissions import is_admin, is_client
+
+from .matching import recommend_freelancers, recommend_jobs
+from .models import Job
+from .search import filter_by_budget
+from .serializers import JobSerializer
+
+
+class JobCursorPagination(KeysetPagination):
+    """Job lists always use keyset cursors; the feed is unbounded"""
+
+    def is_keyset_request(self, request):
+        return True
+
+
+class IsClientOrReadOnly(permissions.BasePermission):
+    message = 'Only clients can post jobs.'
+
+    def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return bool(request.user and request.user.is_authenticated and is_client(request.user))
+
+
+class IsFreelancer(permissions.IsAuthenticated):
+    message = 'Only freelancers get job recommendations.'
+
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and request.user.user_type == 'freelancer'
+
+
+class JobViewSet(viewsets.ModelViewSet):
+    """
+    Open-job feed with full-text (?search=), skill (?skills=a,b&skills_match=all),
+    budget (?budget_min=&budget_max=) and experience level filtering. Writes
+    are limited to the posting client; `mine/` lists a client's jobs in any status.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsClientOrReadOnly]
+    serializer_class = JobSerializer
+    pagination_class = JobCursorPagination
+    filter_backends = [FullTextSearchFilter, RankedOrderingFilter]
+    ordering_fields = ['rank', 'created_at', 'budget_max', 'bid_deadline']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        queryset = Job.objects.defer('search_vector').select_related('bid_stats')
+        if self.action == 'recommended_freelancers':
+            queryset = queryset.select_related('client')
+        user = self.request.user
+        if self.action == 'list':
+            # status='open' lets the planner use the partial jobs_open_* indexes
+            return self.filter_feed(queryset.filter(status='open'))
+        if self.action == 'mine':
+            return self.filter_feed(queryset.filter(client_id=user.pk))
+        if self.request.method in permissions.SAFE_METHODS:
+            visible = ~Q(status='draft')
+            if user.is_authenticated:
+                visible |= Q(client_id=user.pk)
+            return queryset.filter(visible)
+        return queryset.filter(client_id=user.pk)
+
+    def filter_feed(self, queryset):
+        params = self.request.query_params
+
+        skills = params.get('skills')
+        if skills:
+            skill_list = [skill.strip() for skill in skills.split(',')]
+            queryset = filter_by_skills(queryset, skill_list, match=params.get('skills_match', 'any'))
+
+        queryset = filter_by_budget(
+            queryset, self.decimal_param('budget_min'), self.decimal_param('budget_max')
+        )
+
+        for field in ('experience_level', 'budget_type'):
+            if params.get(field):
+                queryset = queryset.filter(**{field: params[field]})
+        if self.action == 'mine' and params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        return queryset
+
+    def decimal_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            raise ValidationError({name: 'A valid number is required.'})
+
+    @action(detail=False, permission_classes=[permissions.IsAuthenticated])
+    def mine(self, request):
+        return self.list(request)
+
+    def recommendation_limit(self):
+        try:
+            return max(1, min(int(self.request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return 20
+
+    @action(detail=True, url_path='recommended-freelancers', permission_classes=[permissions.IsAuthenticated])
+    def recommended_freelancers(self, request, pk=None):
+        """Top matching freelancers for one of the caller's jobs"""
+        job = self.get_object()
+        if job.client_id != request.user.pk and not is_admin(request.user):
+            raise PermissionDenied('Only the client who posted this job can see recommendations.')
+
+        matches = recommend_freelancers(job, k=self.recommendation_limit())
+        freelancers = User.objects.filter(is_active=True).in_bulk([user_id for user_id, _ in matches])
+        serializer_context = self.get_serializer_context()
+        return Response({'results': [
+            {'score': score,
+             'freelancer': UserListSerializer(freelancers[user_id], context=serializer_context).data}
+            for user_id, score in matches if user_id in freelancers
+        ]})
+
+    @action(detail=False, permission_classes=[IsFreelancer])
+    def recommended(self, request):
+        """Top matching open jobs for the calling freelancer"""
+        freelancer = User.objects.only(
+            'skill_slugs', 'hourly_rate', 'experience_level', 'timezone'
+        ).get(pk=request.user.pk)
+        matches = recommend_jobs(freelancer, k=self.recommendation_limit())
+        jobs = Job.objects.defer('search_vector').select_related('bid_stats').filter(status='open').in_bulk(
+            [job_id for job_id, _ in matches]
+        )
+        return Response({'results': [
+            {'score': score, 'job': self.get_serializer(jobs[job_id]).data}
+            for job_id, score in matches if job_id in jobs
+        ]})
+
+    def perform_create(self, serializer):
+        client_id = self.request.user.pk
+        with transaction.atomic():
+            job = serializer.save(client_id=client_id)
+            # updated_at feeds the profile ETag; the rendered count changes
+            User.objects.filter(pk=client_id).update(
+                total_projects_posted=F('total_projects_posted') + 1, updated_at=timezone.now()
+            )
+            if job.is_open:
+                notify_job_match(job)
+        bump_profile_version(client_id)
+
+    def perform_update(self, serializer):
+        was_open = serializer.instance.is_open
+        with transaction.atomic():
+            job = serializer.save()
+            # Publishing a draft; freelancers already told about this job are skipped
+            if job.is_open and not was_open:
+                notify_job_match(job)
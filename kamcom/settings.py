@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -62,7 +63,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'allauth.account.middleware.AccountMiddleware'
+    'allauth.account.middleware.AccountMiddleware',
+    'users.middleware.ActivityMiddleware',
 ]
 
 ROOT_URLCONF = 'kamcom.urls'
@@ -140,6 +142,28 @@ SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
 }
 
+# Cache: local memory by default, Redis when REDIS_URL is set (production)
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a rendered public profile stays cached (it is also invalidated on change)
+PROFILE_CACHE_TIMEOUT = config('PROFILE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Seconds a platform stats snapshot (refresh_user_stats) is served before live queries
+USER_STATS_SNAPSHOT_MAX_AGE = config('USER_STATS_SNAPSHOT_MAX_AGE', default=900, cast=int)
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
@@ -152,11 +176,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.VersionedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # Reverse proxies in front of the app that append to X-Forwarded-For.
+    # Throttles key on the address the outermost of them saw; 0 uses
+    # REMOTE_ADDR, so a client-supplied X-Forwarded-For is ignored
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+    # Sliding-window limits used by users/throttling.py ('N/<k><s|m|h|d>')
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/m',
+        'login_email': '10/15m',
+        'register_ip': '10/h',
+        'register_email': '3/h',
+        'google_login_ip': '30/m',
+        'email_verification_user': '3/10m',
+        'email_verification_ip': '20/h',
+        'verify_email_user': '10/15m',
+    },
 }
 
 AUTH_USER_MODEL = 'users.User'
@@ -178,7 +217,25 @@ SOCIALACCOUNT_PROVIDERS = {
     }
 }
 
+# Expected `aud` of Google ID tokens: tokens issued to other clients are rejected
+GOOGLE_ID_TOKEN_AUDIENCE = config(
+    'GOOGLE_ID_TOKEN_AUDIENCE', default=SOCIALACCOUNT_PROVIDERS['google']['APP']['client_id']
+)
+
 MEDIA_URL = "/media/"
+PROFILE_PICTURE_MAX_BYTES = config('PROFILE_PICTURE_MAX_BYTES', default=5 * 1024 * 1024, cast=int)
+
+# Drain background tasks on a thread of the web process after each enqueue;
+# disable when a dedicated `manage.py run_tasks` worker is running
+BACKGROUND_TASKS_IN_PROCESS = config('BACKGROUND_TASKS_IN_PROCESS', default=True, cast=bool)
+
+# Seconds between bulk writes of buffered last_activity/last_login_ip updates
+ACTIVITY_FLUSH_INTERVAL = config('ACTIVITY_FLUSH_INTERVAL', default=60, cast=int)
+
+# Seconds between incremental refreshes / full rebuilds of the in-memory
+# matching indexes (jobs/matching.py)
+MATCHING_REFRESH_INTERVAL = config('MATCHING_REFRESH_INTERVAL', default=30, cast=int)
+MATCHING_FULL_REFRESH_INTERVAL = config('MATCHING_FULL_REFRESH_INTERVAL', default=3600, cast=int)
 MEDIA_ROOT = BASE_DIR / "media"
 
 
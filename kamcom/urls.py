@@ -21,6 +21,9 @@ from django.conf.urls.static import static
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('users.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/bids/', include('bids.urls')),
+    path('api/notifications/', include('notifications.urls')),
 
 ]
 if settings.DEBUG:
@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Notification, NotificationCounter
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'category', 'title', 'is_read', 'created_at']
+    list_filter = ['category', 'is_read']
+    raw_id_fields = ['recipient']
+    readonly_fields = ['event_key', 'created_at', 'read_at']
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'unread']
+    raw_id_fields = ['user']
@@ -0,0 +1,186 @@
+# notifications/fanout.py
+"""
+Notification delivery.
+
+notify_users() and notify_job_match() only queue fan-out tasks (users/tasks.py)
+in the caller's transaction: notify_users() one task per chunk of its ids,
+notify_job_match() one task that walks the matching freelancers. A task
+delivers one chunk of recipients per run: it filters them by their
+notification_preferences in memory, bulk-inserts their inbox rows, bumps
+their unread counters and, for job matches, queues the next chunk, all in
+one transaction. Recipients who already have a row for
+the event (notifications_event_once) are skipped, so a retried chunk or a
+re-published job notifies only the people who have not heard of it yet.
+
+notification_preferences is a dict of category -> bool; {"all": false}
+mutes everything. Categories not listed are delivered.
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from users.models import User
+from users.tasks import PermanentTaskError, enqueue, task
+
+from .models import Notification, NotificationCounter
+
+FAN_OUT = 'notifications.fan_out'
+FAN_OUT_CHUNK_SIZE = 1000
+INSERT_BATCH_SIZE = 500
+
+JOB_MATCH = 'job_match'
+
+
+def wants_notification(preferences, category):
+    if not isinstance(preferences, dict):
+        return True
+    return preferences.get('all', True) is not False and preferences.get(category, True) is not False
+
+
+def _event(category, title, body='', data=None, event_key=''):
+    return {
+        'category': category, 'title': title, 'body': body, 'data': data or {},
+        'event_key': event_key or f'{category}:{uuid.uuid4().hex}',
+    }
+
+
+def notify_users(user_ids, category, title, body='', data=None, event_key=''):
+    """Queue a notification for many users; delivered off the request thread"""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    event = _event(category, title, body, data, event_key)
+    # One task per chunk, each carrying only its own ids
+    for start in range(0, len(user_ids), FAN_OUT_CHUNK_SIZE):
+        enqueue(FAN_OUT, {
+            'event': event,
+            'audience': {'type': 'users', 'ids': user_ids[start:start + FAN_OUT_CHUNK_SIZE]},
+            'after': 0,
+        })
+
+
+def notify_job_match(job):
+    """Tell freelancers who take work (available or busy) with any of the job's skills about it"""
+    if job.skill_slugs:
+        enqueue(FAN_OUT, {
+            'event': _event(
+                JOB_MATCH, f'New job matching your skills: {job.title}'[:200],
+                data={'job_id': job.pk}, event_key=f'job-match:{job.pk}',
+            ),
+            'audience': {'type': 'job_match', 'job_id': job.pk},
+            'after': 0,
+        })
+
+
+def _audience_chunk(audience, after):
+    """
+    Next FAN_OUT_CHUNK_SIZE recipients after id `after`, with their preferences,
+    and the id to continue after (None when this is the last chunk)
+    """
+    queryset = User.objects.filter(is_active=True, id__gt=after)
+    if audience['type'] == 'users':
+        # Already one chunk (notify_users); inactive users just drop out of it
+        rows = list(
+            queryset.filter(id__in=audience['ids']).order_by('id')
+            .values_list('id', 'notification_preferences')
+        )
+        return rows, None
+    elif audience['type'] == 'job_match':
+        from jobs.matching import AVAILABILITY_WEIGHTS
+        from jobs.models import Job
+
+        job = Job.objects.filter(pk=audience['job_id'], status='open').only('client_id', 'skill_slugs').first()
+        if job is None:
+            return [], None
+        queryset = queryset.filter(
+            user_type='freelancer', availability_status__in=AVAILABILITY_WEIGHTS,
+            skill_slugs__overlap=job.skill_slugs,
+        )
+        queryset = queryset.exclude(id=job.client_id)
+    else:
+        raise PermanentTaskError(f"Unknown audience {audience['type']!r}")
+
+    rows = list(
+        queryset.order_by('id').values_list('id', 'notification_preferences')[:FAN_OUT_CHUNK_SIZE]
+    )
+    last = rows[-1][0] if len(rows) == FAN_OUT_CHUNK_SIZE else None
+    return rows, last
+
+
+def deliver(event, recipient_ids):
+    """Insert inbox rows and bump unread counters; call inside a transaction"""
+    if not recipient_ids:
+        return 0
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=user_id, category=event['category'], title=event['title'],
+            body=event['body'], data=event['data'], event_key=event['event_key'],
+        )
+        for user_id in recipient_ids
+    ], batch_size=INSERT_BATCH_SIZE)
+
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in recipient_ids],
+        batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True,
+    )
+    # Lock in id order so overlapping fan-outs cannot deadlock each other
+    locked = list(
+        NotificationCounter.objects.select_for_update()
+        .filter(user_id__in=recipient_ids).order_by('user_id').values_list('user_id', flat=True)
+    )
+    NotificationCounter.objects.filter(user_id__in=locked).update(unread=F('unread') + 1)
+    return len(recipient_ids)
+
+
+@task(FAN_OUT, max_attempts=5, lease=120)
+def fan_out_task(payload):
+    event = payload['event']
+    rows, last = _audience_chunk(payload['audience'], payload['after'])
+    recipient_ids = [
+        user_id for user_id, preferences in rows
+        if wants_notification(preferences, event['category'])
+    ]
+
+    with transaction.atomic():
+        already_delivered = set(Notification.objects.filter(
+            event_key=event['event_key'], recipient_id__in=recipient_ids
+        ).values_list('recipient_id', flat=True))
+        deliver(event, [user_id for user_id in recipient_ids if user_id not in already_delivered])
+        if last is not None:
+            enqueue(FAN_OUT, {**payload, 'after': last})
+
+
+def mark_read(user_id, notification_id):
+    """Mark one notification read; returns False if it was not an unread one of the user's"""
+    with transaction.atomic():
+        updated = Notification.objects.filter(
+            pk=notification_id, recipient_id=user_id, is_read=False
+        ).update(is_read=True, read_at=timezone.now())
+        if updated:
+            NotificationCounter.objects.filter(user_id=user_id).update(
+                unread=Greatest(F('unread') - 1, 0)
+            )
+    return bool(updated)
+
+
+def mark_all_read(user_id):
+    """Mark every notification of a user read; returns how many changed"""
+    with transaction.atomic():
+        # Lock the counter first: a concurrent fan-out waits, then counts its new rows
+        NotificationCounter.objects.select_for_update().filter(user_id=user_id).first()
+        updated = Notification.objects.filter(recipient_id=user_id, is_read=False).update(
+            is_read=True, read_at=timezone.now()
+        )
+        if updated:
+            NotificationCounter.objects.filter(user_id=user_id).update(
+                unread=Greatest(F('unread') - updated, 0)
+            )
+    return updated
+
+
+def unread_count(user_id):
+    """Unread notifications from the counter row, without scanning the inbox"""
+    return NotificationCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first() or 0
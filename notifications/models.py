@@ -1,3 +1,50 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+
+class Notification(models.Model):
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications'
+    )
+    category = models.CharField(max_length=50)
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    # Identifies the event a fan-out delivered, so a retried chunk is not delivered twice
+    event_key = models.CharField(max_length=100, blank=True)
+    is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notifications'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at'], name='notifications_inbox'),
+            models.Index(fields=['recipient'], condition=Q(is_read=False), name='notifications_unread'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'event_key'], condition=~Q(event_key=''),
+                name='notifications_event_once'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id}: {self.title}"
+
+
+class NotificationCounter(models.Model):
+    """Unread notifications per user, kept in step with the inbox by notifications/fanout.py"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+        related_name='notification_counter'
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'notification_counters'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
@@ -0,0 +1,11 @@
+# notifications/serializers.py
+from rest_framework import serializers
+
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'category', 'title', 'body', 'data', 'is_read', 'read_at', 'created_at']
+        read_only_fields = fields
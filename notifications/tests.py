@@ -1,3 +1,111 @@
-from django.test import TestCase
+from unittest.mock import patch
 
-# Create your tests here.
+from rest_framework import status
+
+from jobs.models import Job
+from notifications.fanout import FAN_OUT, notify_users, wants_notification
+from notifications.models import Notification, NotificationCounter
+from users.apitesting import UserAPITestCase, create_user
+from users.models import BackgroundTask, User
+from users.tasks import run_pending_tasks
+
+
+class NotificationFanOutTestCase(UserAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.freelancers = [
+            create_user(f'f{i}', skills=skills, notification_preferences=preferences)
+            for i, (skills, preferences) in enumerate([
+                (['Django'], {}),
+                (['Python', 'Django'], {'job_match': True}),
+                (['Django'], {'job_match': False}),
+                (['Django'], {'all': False}),
+                (['React'], {}),
+                (['Python'], {}),
+            ])
+        ]
+
+    def recipients(self, **filters):
+        return sorted(Notification.objects.filter(**filters).values_list('recipient_id', flat=True))
+
+    def test_preferences(self):
+        self.assertTrue(wants_notification({}, 'job_match'))
+        self.assertTrue(wants_notification(None, 'job_match'))
+        self.assertFalse(wants_notification({'job_match': False}, 'job_match'))
+        self.assertTrue(wants_notification({'job_match': False}, 'bid_received'))
+        self.assertFalse(wants_notification({'all': False}, 'bid_received'))
+
+    @patch('notifications.fanout.FAN_OUT_CHUNK_SIZE', 2)
+    def test_job_post_fans_out_in_chunks_off_request(self):
+        self.authenticate(self.client_user)
+        response = self.client.post('/api/jobs/', {
+            'title': 'Django API', 'description': 'Backend work', 'skills': ['Django', 'Python'],
+            'budget_min': '100', 'budget_max': '200',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Notification.objects.exists())
+
+        run_pending_tasks()
+        expected = [self.freelancers[i].id for i in (0, 1, 5)]
+        self.assertEqual(self.recipients(category='job_match'), expected)
+        self.assertEqual(
+            sorted(NotificationCounter.objects.filter(unread=1).values_list('user_id', flat=True)), expected
+        )
+
+        # Re-publishing (or a retried chunk) notifies only those who have not heard yet
+        job = Job.objects.get(pk=response.data['id'])
+        newcomer = create_user('newcomer', skills=['Django'])
+        create_user('away', skills=['Django'], availability_status='unavailable')
+        self.client.patch(f'/api/jobs/{job.id}/', {'status': 'draft'}, format='json')
+        self.client.patch(f'/api/jobs/{job.id}/', {'status': 'open'}, format='json')
+        run_pending_tasks()
+        self.assertEqual(self.recipients(category='job_match'), expected + [newcomer.id])
+        self.assertEqual(NotificationCounter.objects.get(user=self.freelancers[0]).unread, 1)
+        self.assertEqual(NotificationCounter.objects.get(user=newcomer).unread, 1)
+
+    @patch('notifications.fanout.FAN_OUT_CHUNK_SIZE', 4)
+    def test_notify_users(self):
+        ids = [user.id for user in self.freelancers] + [self.client_user.id]
+        notify_users(ids, 'announcement', 'Maintenance tonight')
+        User.objects.filter(pk=self.freelancers[4].pk).update(is_active=False)
+        run_pending_tasks()
+        self.assertEqual(
+            self.recipients(category='announcement'),
+            sorted(set(ids) - {self.freelancers[3].id, self.freelancers[4].id}),
+        )
+        # One task per chunk, each carrying only its own ids
+        payloads = BackgroundTask.objects.filter(name=FAN_OUT).order_by('id').values_list('payload', flat=True)
+        ids.sort()
+        self.assertEqual([payload['audience']['ids'] for payload in payloads], [ids[:4], ids[4:]])
+
+    def test_inbox_endpoints(self):
+        user = self.freelancers[0]
+        notify_users([user.id], 'announcement', 'First')
+        notify_users([user.id], 'announcement', 'Second')
+        run_pending_tasks()
+        self.authenticate(user)
+
+        self.client.get('/api/notifications/unread-count/')  # caches the token version
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.data, {'unread': 2})
+
+        inbox = self.client.get('/api/notifications/').data['results']
+        self.assertEqual([item['title'] for item in inbox], ['Second', 'First'])
+        response = self.client.post(f'/api/notifications/{inbox[0]["id"]}/read/')
+        self.assertEqual(response.data, {'unread': 1})
+        self.client.post(f'/api/notifications/{inbox[0]["id"]}/read/')  # already read
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data, {'unread': 1})
+
+        unread = self.client.get('/api/notifications/', {'unread': 'true'}).data['results']
+        self.assertEqual([item['title'] for item in unread], ['First'])
+
+        self.assertEqual(self.client.post('/api/notifications/read-all/').data, {'marked_read': 1})
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data, {'unread': 0})
+
+        other = self.freelancers[1]
+        self.authenticate(other)
+        response = self.client.post(f'/api/notifications/{inbox[1]["id"]}/read/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post('/api/notifications/abc/read/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,12 @@
+# notifications/urls.py
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from . import views
+
+router = DefaultRouter()
+router.register(r'', views.NotificationViewSet, basename='notifications')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
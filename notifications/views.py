@@ -1,3 +1,44 @@
-from django.shortcuts import render
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from users.authentication import ClaimsJWTAuthentication
+from users.pagination import KeysetPagination
+
+from .fanout import mark_all_read, mark_read, unread_count
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """The caller's inbox, newest first; ?unread=true for unread only"""
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = NotificationSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(recipient_id=self.request.user.pk)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    @action(detail=False, url_path='unread-count')
+    def unread_count(self, request):
+        return Response({'unread': unread_count(request.user.pk)})
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        try:
+            pk = int(pk)
+        except ValueError:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if not mark_read(request.user.pk, pk):
+            if not self.get_queryset().filter(pk=pk).exists():
+                return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'unread': unread_count(request.user.pk)})
+
+    @action(detail=False, methods=['post'], url_path='read-all')
+    def read_all(self, request):
+        return Response({'marked_read': mark_all_read(request.user.pk)})
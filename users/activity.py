@@ -0,0 +1,117 @@
+# users/activity.py
+"""
+Write-coalesced tracking of `last_activity` and `last_login_ip`.
+
+Requests only record the latest timestamp (and IP) per user in an
+in-process buffer; a daemon thread flushes the buffer every
+ACTIVITY_FLUSH_INTERVAL seconds with one UPDATE ... FROM (VALUES ...) for
+all buffered users. Each web process flushes its own buffer, and a flush
+never moves `last_activity` backwards, so processes may flush in any order.
+Activity buffered when a process dies is lost; it is best effort by design.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 1000
+
+
+class ActivityTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # user_id -> (timestamp, ip or None)
+        self._flusher = None
+
+    def record(self, user_id, ip=None, when=None):
+        """Buffer activity for a user; the most recent timestamp and known IP win"""
+        when = when or timezone.now()
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous:
+                when = max(when, previous[0])
+                ip = ip or previous[1]
+            self._pending[user_id] = (when, ip)
+        self._start_flusher()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def flush(self):
+        """Write the buffered activity; returns the number of users flushed"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        rows = [(user_id, when, ip) for user_id, (when, ip) in pending.items()]
+        try:
+            for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+                _bulk_update(rows[start:start + FLUSH_BATCH_SIZE])
+        except Exception:
+            # Put the batch back unless newer activity arrived meanwhile
+            with self._lock:
+                for user_id, (when, ip) in pending.items():
+                    newer = self._pending.get(user_id)
+                    self._pending[user_id] = (
+                        (max(when, newer[0]), newer[1] or ip) if newer else (when, ip)
+                    )
+            raise
+        return len(rows)
+
+    def _start_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(settings.ACTIVITY_FLUSH_INTERVAL)
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                logger.exception('Flushing user activity failed')
+            finally:
+                connection.close()
+
+
+def _bulk_update(rows):
+    from .models import User
+
+    table = connection.ops.quote_name(User._meta.db_table)
+    values = ', '.join(['(%s::bigint, %s::timestamptz, %s::inet)'] * len(rows))
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET '
+            f'last_activity = GREATEST({table}.last_activity, v.last_activity), '
+            f'last_login_ip = COALESCE(v.last_login_ip, {table}.last_login_ip) '
+            f'FROM (VALUES {values}) AS v(id, last_activity, last_login_ip) '
+            f'WHERE {table}.id = v.id',
+            params,
+        )
+
+
+activity_tracker = ActivityTracker()
+
+
+def record_activity(user_id, ip=None):
+    activity_tracker.record(user_id, ip=ip)
+
+
+def flush_activity():
+    return activity_tracker.flush()
@@ -1,5 +1,33 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from .models import User, Skill, SkillAlias, BackgroundTask, EmailOutbox
 
-admin.site.register(User, UserAdmin)
\ No newline at end of file
+admin.site.register(User, UserAdmin)
+
+
+class SkillAliasInline(admin.TabularInline):
+    model = SkillAlias
+    extra = 1
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'category']
+    search_fields = ['name', 'slug', 'aliases__alias']
+    inlines = [SkillAliasInline]
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_after', 'created_at']
+    list_filter = ['status', 'name']
+    search_fields = ['dedupe_key']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to_email', 'category', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'category']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['created_at', 'sent_at']
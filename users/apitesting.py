@@ -0,0 +1,42 @@
+# users/apitesting.py
+"""Helpers shared by the API tests of the apps built on users"""
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from .authentication import UserRefreshToken
+from .models import User
+
+TEST_PASSWORD = 'testpass123'
+
+
+def create_user(username, user_type='freelancer', **fields):
+    """A user with `<username>@example.com` and the shared test password"""
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password=TEST_PASSWORD,
+        user_type=user_type, **fields
+    )
+
+
+def create_client(username='client', **fields):
+    """A client in the Client group, which may post jobs"""
+    user = create_user(username, user_type='client', **fields)
+    user.groups.add(Group.objects.get_or_create(name='Client')[0])
+    return user
+
+
+class UserAPITestCase(APITestCase):
+    """
+    APITestCase with a cold cache, a posting client in `self.client_user`
+    (extra fields from `client_user_fields`) and JWT authentication.
+    """
+    client_user_fields = {}
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client_user = create_client(**self.client_user_fields)
+
+    def authenticate(self, user):
+        access = str(UserRefreshToken.for_user(user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
@@ -0,0 +1,158 @@
+# users/authentication.py
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+from .utils.permissions import get_permissions
+
+TOKEN_VERSION_KEY = 'users:token-version:{user_id}'
+TOKEN_VERSION_TIMEOUT = 60 * 60 * 24
+
+
+def get_token_version(user_id):
+    """Current token version for a user: cache first, users table on a miss"""
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+        if version is None:
+            return None
+        cache.set(key, version, TOKEN_VERSION_TIMEOUT)
+    return version
+
+
+def revoke_user_tokens(user_id):
+    """Invalidate every token issued to a user so far"""
+    User.objects.filter(pk=user_id).update(token_version=F('token_version') + 1)
+    cache.delete(TOKEN_VERSION_KEY.format(user_id=user_id))
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh token carrying the claims ClaimsUser is built from; access tokens inherit them"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['email'] = user.email
+        token['user_type'] = user.user_type
+        token['groups'] = user.group_names
+        token['is_active'] = user.is_active
+        token['token_version'] = user.token_version
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from JWT claims. Claim attributes (id, username, email,
+    user_type, group_names, is_active) cost nothing; permission checks resolve
+    from the cached authorization sets; anything else loads the real User row
+    once, on first access.
+    """
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+    @cached_property
+    def group_names(self):
+        return list(self.token.get('groups', []))
+
+    @cached_property
+    def user(self):
+        try:
+            return User.objects.get(pk=self.id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+    @property
+    def is_staff(self):
+        return self.user.is_staff
+
+    @property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    @property
+    def groups(self):
+        return self.user.groups
+
+    @property
+    def user_permissions(self):
+        return self.user.user_permissions
+
+    def get_group_permissions(self, obj=None):
+        return self.user.get_group_permissions(obj)
+
+    def get_all_permissions(self, obj=None):
+        if obj is not None:
+            return self.user.get_all_permissions(obj)
+        return set(get_permissions(self))
+
+    def has_perm(self, perm, obj=None):
+        if obj is not None:
+            return self.user.has_perm(perm, obj)
+        return perm in get_permissions(self)
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, module):
+        return any(perm.startswith(f'{module}.') for perm in get_permissions(self))
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return getattr(self.user, attr)
+
+
+class VersionCheckMixin:
+    def check_token_version(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        current = get_token_version(user_id)
+        if current is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        # Tokens issued before versioning carry no claim and count as version 0
+        if validated_token.get('token_version', 0) != current:
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+
+
+class VersionedJWTAuthentication(VersionCheckMixin, JWTAuthentication):
+    """JWTAuthentication that also rejects revoked tokens"""
+
+    def get_user(self, validated_token):
+        self.check_token_version(validated_token)
+        return super().get_user(validated_token)
+
+
+class ClaimsJWTAuthentication(VersionCheckMixin, JWTAuthentication):
+    """
+    Stateless JWT authentication for read-heavy views: returns a ClaimsUser
+    instead of loading the users row. Revocation and deactivation are enforced
+    through the cached token version, which saving a user with is_active
+    cleared bumps (signals.py).
+    """
+
+    def get_user(self, validated_token):
+        self.check_token_version(validated_token)
+        user = ClaimsUser(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
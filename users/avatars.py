@@ -0,0 +1,63 @@
+# users/avatars.py
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .models import User
+from .tasks import PermanentTaskError, enqueue, task
+
+INGEST_PROFILE_PICTURE = 'users.ingest_profile_picture'
+
+# (connect, read) seconds for fetching remote avatars
+FETCH_TIMEOUT = (3.05, 10)
+CHUNK_SIZE = 64 * 1024
+
+IMAGE_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+
+
+def queue_profile_picture(user, url):
+    """Fetch a remote avatar in the background; at most one fetch per user in flight"""
+    if not url:
+        return
+    enqueue(
+        INGEST_PROFILE_PICTURE,
+        {'user_id': user.pk, 'url': url},
+        dedupe_key=f'profile-picture:{user.pk}',
+    )
+
+
+def download_image(url, max_bytes):
+    """Stream a remote image, refusing non-images and anything over max_bytes"""
+    with requests.get(url, timeout=FETCH_TIMEOUT, stream=True) as response:
+        if 400 <= response.status_code < 500:
+            raise PermanentTaskError(f"HTTP {response.status_code} for {url}")
+        response.raise_for_status()
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in IMAGE_EXTENSIONS:
+            raise PermanentTaskError(f"Unsupported content type {content_type!r}")
+        if int(response.headers.get('Content-Length') or 0) > max_bytes:
+            raise PermanentTaskError('Image too large')
+
+        content = bytearray()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            content.extend(chunk)
+            if len(content) > max_bytes:
+                raise PermanentTaskError('Image too large')
+    return bytes(content), IMAGE_EXTENSIONS[content_type]
+
+
+@task(INGEST_PROFILE_PICTURE, max_attempts=3, lease=60)
+def ingest_profile_picture(payload):
+    user = User.objects.filter(pk=payload['user_id']).first()
+    if user is None or user.profile_picture:
+        return  # gone, or a picture was uploaded meanwhile
+
+    content, extension = download_image(payload['url'], settings.PROFILE_PICTURE_MAX_BYTES)
+    user.profile_picture.save(f"{user.pk}.{extension}", ContentFile(content), save=False)
+    user.save(update_fields=['profile_picture'])
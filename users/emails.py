@@ -0,0 +1,142 @@
+# users/emails.py
+"""
+Transactional email outbox.
+
+queue_email() writes an EmailOutbox row in the caller's transaction and
+schedules delivery through the background task queue (users/tasks.py).
+Delivery claims due rows in batches, sends them over one reused backend
+connection and records the outcome; failures are retried with exponential
+backoff. Delivery is at-least-once: a worker dying mid-batch means those
+messages are sent again once their lease expires.
+"""
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import EmailOutbox
+from .tasks import enqueue, task
+
+DELIVER_OUTBOX = 'users.deliver_email_outbox'
+OUTBOX_DEDUPE_KEY = 'email-outbox'
+
+DEFAULT_BATCH_SIZE = 50
+SEND_LEASE = 120
+RETRY_BASE_DELAY = 60
+
+
+def queue_email(to_email, subject, body, user=None, category='', from_email=None):
+    email = EmailOutbox.objects.create(
+        user=user,
+        to_email=to_email,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        body=body,
+        category=category,
+    )
+    enqueue(DELIVER_OUTBOX, dedupe_key=OUTBOX_DEDUPE_KEY)
+    return email
+
+
+class PooledMailer:
+    """One open backend connection reused for every message; reopened if the server drops it"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.connection = None
+
+    def send(self, message):
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = get_connection(self.backend)
+                self.connection.open()
+            try:
+                message.connection = self.connection
+                return self.connection.send_messages([message])
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            finally:
+                self.connection = None
+
+
+def claim_emails(limit=DEFAULT_BATCH_SIZE):
+    """Lock and lease up to `limit` due messages"""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:limit]
+        )
+        for email in emails:
+            email.status = 'sending'
+            email.attempts += 1
+            email.next_attempt_at = now + timedelta(seconds=SEND_LEASE)
+        EmailOutbox.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at'])
+    return emails
+
+
+def _message(email):
+    return EmailMessage(email.subject, email.body, email.from_email, [email.to_email])
+
+
+def deliver_outbox(batch_size=DEFAULT_BATCH_SIZE, backend=None):
+    """Send every due message; returns (sent, failed) counts"""
+    mailer = PooledMailer(backend)
+    sent = failed = 0
+    try:
+        while True:
+            emails = claim_emails(batch_size)
+            if not emails:
+                break
+            for email in emails:
+                try:
+                    mailer.send(_message(email))
+                except Exception as exc:
+                    mailer.close()  # the connection may be unusable; reopen for the next message
+                    email.last_error = f"{type(exc).__name__}: {exc}"
+                    if email.attempts < email.max_attempts:
+                        delay = RETRY_BASE_DELAY * 2 ** (email.attempts - 1)
+                        email.status = 'pending'
+                        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                    else:
+                        email.status = 'failed'
+                        failed += 1
+                else:
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+            EmailOutbox.objects.bulk_update(
+                emails, ['status', 'next_attempt_at', 'last_error', 'sent_at']
+            )
+    finally:
+        mailer.close()
+    return sent, failed
+
+
+def schedule_next_delivery():
+    """Wake delivery up again when the earliest pending retry falls due"""
+    next_due = EmailOutbox.objects.filter(status='pending').aggregate(
+        next_due=Min('next_attempt_at')
+    )['next_due']
+    if next_due is not None:
+        delay = max(0, (next_due - timezone.now()).total_seconds())
+        enqueue(DELIVER_OUTBOX, dedupe_key=OUTBOX_DEDUPE_KEY, delay=delay)
+
+
+@task(DELIVER_OUTBOX, max_attempts=1, lease=600)
+def deliver_outbox_task(payload):
+    deliver_outbox()
+    schedule_next_delivery()
@@ -0,0 +1,156 @@
+# users/google_auth.py
+import logging
+import re
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from google.auth import jwt
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+CERTS_CACHE_KEY = 'users:google-certs'
+
+DEFAULT_MAX_AGE = 60 * 60
+# Refresh in the background once the cached set is this close to expiring
+REFRESH_AHEAD = 5 * 60
+# Unknown key ids force a refetch at most this often
+MIN_FORCED_REFRESH_INTERVAL = 60
+
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+def parse_max_age(cache_control, default=DEFAULT_MAX_AGE):
+    match = _MAX_AGE.search(cache_control or '')
+    return int(match.group(1)) if match else default
+
+
+class HTTPCertSource:
+    """Google's published signing certificates: returns ({kid: pem}, max_age)"""
+
+    def __init__(self, url=GOOGLE_CERTS_URL, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self):
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json(), parse_max_age(response.headers.get('Cache-Control'))
+
+
+class StaticCertSource:
+    """Fixed key set, for tests and offline development"""
+
+    def __init__(self, certs, max_age=DEFAULT_MAX_AGE):
+        self.certs = certs
+        self.max_age = max_age
+
+    def fetch(self):
+        return dict(self.certs), self.max_age
+
+
+class CachedCertStore:
+    """
+    Certificate set kept in process memory and the shared cache for as long as
+    the source's max-age allows. Close to expiry the current set keeps being
+    served while a background thread fetches the next one.
+    """
+
+    def __init__(self, source, cache_key=CERTS_CACHE_KEY):
+        self.source = source
+        self.cache_key = cache_key
+        self._entry = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._last_forced = 0
+
+    def get_certs(self):
+        entry = self._current_entry()
+        if entry is None:
+            return self.refresh()['certs']
+        if entry['expires_at'] - time.time() < REFRESH_AHEAD:
+            self.refresh_in_background()
+        return entry['certs']
+
+    def force_refresh(self):
+        """Refetch after an unknown key id (key rotation); throttled"""
+        now = time.time()
+        if now - self._last_forced < MIN_FORCED_REFRESH_INTERVAL:
+            return self.get_certs()
+        self._last_forced = now
+        return self.refresh()['certs']
+
+    def _current_entry(self):
+        now = time.time()
+        entry = self._entry
+        if entry is None or entry['expires_at'] <= now:
+            entry = cache.get(self.cache_key)
+            if entry is None or entry['expires_at'] <= now:
+                return None
+            self._entry = entry
+        return entry
+
+    def refresh(self):
+        certs, max_age = self.source.fetch()
+        entry = {'certs': certs, 'expires_at': time.time() + max_age}
+        self._entry = entry
+        cache.set(self.cache_key, entry, max_age)
+        return entry
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.warning('Google certificate refresh failed', exc_info=True)
+        finally:
+            self._refreshing = False
+
+
+class GoogleIdTokenVerifier:
+    """
+    Drop-in for id_token.verify_oauth2_token that verifies signatures locally
+    against the cached certificate set. Raises ValueError on invalid tokens.
+    """
+
+    def __init__(self, audience=None, cert_source=None, clock_skew=10):
+        self.audience = audience
+        self.clock_skew = clock_skew
+        self.store = CachedCertStore(cert_source or HTTPCertSource())
+
+    def verify(self, token):
+        if isinstance(token, str):
+            token = token.encode()
+        key_id = jwt.decode_header(token).get('kid')
+
+        certs = self.store.get_certs()
+        if key_id not in certs:
+            certs = self.store.force_refresh()
+
+        idinfo = jwt.decode(
+            token, certs=certs, audience=self.audience,
+            clock_skew_in_seconds=self.clock_skew,
+        )
+        if idinfo.get('iss') not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer. 'iss' should be one of {GOOGLE_ISSUERS}")
+        return idinfo
+
+
+_verifier = None
+
+
+def get_google_verifier():
+    global _verifier
+    if _verifier is None:
+        _verifier = GoogleIdTokenVerifier(audience=settings.GOOGLE_ID_TOKEN_AUDIENCE)
+    return _verifier
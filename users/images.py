@@ -0,0 +1,186 @@
+# users/images.py
+"""
+Thumbnail renditions for uploaded images.
+
+Every registered image field gets a JSON companion field holding
+{'source': <original name>, 'sizes': {'64': {'avif': name, 'webp': name,
+'jpeg': name}, ...}}. Renditions are rendered by a background task whenever
+the original changes and stored next to it under `thumbs/`, content-addressed
+like the original (users/storage.py).
+"""
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .profiles import bump_profile_version
+from .storage import release_files, retain_files
+from .tasks import PermanentTaskError, enqueue, task
+
+RENDER_THUMBNAILS = 'users.render_thumbnails'
+
+THUMBNAIL_SIZES = (64, 128, 512)
+
+# Preferred first; JPEG is the universal fallback
+FORMAT_OPTIONS = {
+    'avif': {'quality': 60},
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+}
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+
+# model label -> (image field, renditions field, square crop, owning user id attribute)
+IMAGE_FIELDS = {
+    'users.User': ('profile_picture', 'profile_picture_renditions', True, 'pk'),
+    'users.UserPortfolio': ('image', 'image_renditions', False, 'user_id'),
+}
+
+
+def available_formats():
+    return [fmt for fmt in FORMAT_OPTIONS if fmt == 'jpeg' or features.check(fmt)]
+
+
+def rendition_name(name, size, fmt):
+    """profiles/ab/ab12...png -> profiles/thumbs/ab12..._64.webp (before content addressing)"""
+    directory = name.split('/', 1)[0] if '/' in name else ''
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return posixpath.join(directory, 'thumbs', f'{stem}_{size}.{EXTENSIONS[fmt]}')
+
+
+def rendition_names(renditions):
+    return {
+        name
+        for formats in (renditions or {}).get('sizes', {}).values()
+        for name in formats.values()
+    }
+
+
+def _encode(image, fmt):
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+
+    buffer = BytesIO()
+    image.save(buffer, fmt.upper(), **FORMAT_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def render_thumbnails(field_file, crop=False, sizes=THUMBNAIL_SIZES):
+    """Render and store every size/format of an image; returns the renditions dict"""
+    storage = field_file.storage
+    try:
+        with field_file.open('rb'):
+            image = Image.open(field_file)
+            image.load()
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise PermanentTaskError(f"Cannot read image {field_file.name}: {exc}")
+    image = ImageOps.exif_transpose(image)
+
+    rendered = {}
+    for size in sizes:
+        if crop:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        else:
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.LANCZOS)
+
+        rendered[str(size)] = {}
+        for fmt in available_formats():
+            name = rendition_name(field_file.name, size, fmt)
+            rendered[str(size)][fmt] = storage.save(name, ContentFile(_encode(thumbnail, fmt)))
+    return {'source': field_file.name, 'sizes': rendered}
+
+
+def _references(image_name, renditions):
+    names = rendition_names(renditions)
+    if image_name:
+        names.add(image_name)
+    return names
+
+
+def file_references(instance):
+    """Media files an instance points at (image and renditions), or None if deferred"""
+    image_field, renditions_field, _, _ = IMAGE_FIELDS[instance._meta.label]
+    if {image_field, renditions_field} & instance.get_deferred_fields():
+        return None
+    return _references(getattr(instance, image_field).name, getattr(instance, renditions_field))
+
+
+def loaded_file_references(instance):
+    """Media files an instance pointed at when loaded or last saved, or None if not known"""
+    image_field, renditions_field, _, _ = IMAGE_FIELDS[instance._meta.label]
+    loaded = getattr(instance, '_loaded_media', {})
+    if image_field not in loaded or renditions_field not in loaded:
+        return None
+    image_name = loaded[image_field]
+    return _references(getattr(image_name, 'name', image_name), loaded[renditions_field])
+
+
+def remember_file_references(instance):
+    """Take the current image/renditions as the baseline for the next save"""
+    image_field, renditions_field, _, _ = IMAGE_FIELDS[instance._meta.label]
+    instance._loaded_media = {
+        image_field: getattr(instance, image_field).name,
+        renditions_field: getattr(instance, renditions_field),
+    }
+
+
+def needs_thumbnails(instance):
+    image_field, renditions_field, _, _ = IMAGE_FIELDS[instance._meta.label]
+    if {image_field, renditions_field} & instance.get_deferred_fields():
+        return False
+    renditions = getattr(instance, renditions_field) or {}
+    return renditions.get('source', '') != getattr(instance, image_field).name
+
+
+def queue_thumbnails(instance):
+    label = instance._meta.label
+    enqueue(
+        RENDER_THUMBNAILS,
+        {'model': label, 'pk': instance.pk},
+        dedupe_key=f'thumbnails:{label}:{instance.pk}',
+    )
+
+
+def refresh_thumbnails(label, pk):
+    """Bring an instance's renditions in line with its current image"""
+    image_field, renditions_field, crop, owner_attr = IMAGE_FIELDS[label]
+    model = apps.get_model(label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not needs_thumbnails(instance):
+        return
+
+    field_file = getattr(instance, image_field)
+    previous = getattr(instance, renditions_field) or {}
+    renditions = render_thumbnails(field_file, crop=crop) if field_file else {}
+
+    # Only store renditions for the image they were rendered from. If it was
+    # replaced meanwhile, its upload queued another run and these renditions
+    # stay unreferenced until gc_media collects them
+    updated = model.objects.filter(pk=pk, **{image_field: field_file.name}).update(**{
+        renditions_field: renditions,
+        'updated_at': timezone.now(),
+    })
+    if not updated:
+        return
+
+    # update() skips the signals that keep StoredFile reference counts
+    old_names, new_names = rendition_names(previous), rendition_names(renditions)
+    retain_files(new_names - old_names)
+    release_files(old_names - new_names)
+    bump_profile_version(getattr(instance, owner_attr))
+
+
+@task(RENDER_THUMBNAILS, max_attempts=3, lease=120)
+def render_thumbnails_task(payload):
+    refresh_thumbnails(payload['model'], payload['pk'])
@@ -0,0 +1,101 @@
+# users/lockout.py
+"""
+Failed-login accounting kept out of the users row.
+
+Failures are counted in the cache with atomic increments and expire on
+their own; reaching MAX_FAILED_LOGINS sets a lock key whose TTL is the
+lockout. Only the lock itself is also written to `account_locked_until`, so
+it survives a cache flush. When the cache is unavailable, failures fall back
+to a single atomic UPDATE of the old login_attempts columns.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .throttling import incr_counter
+
+FAILURE_KEY = 'users:login-failures:{user_id}'
+LOCK_KEY = 'users:login-lock:{user_id}'
+
+MAX_FAILED_LOGINS = 5
+FAILURE_WINDOW = 30 * 60
+LOCKOUT_DURATION = 30 * 60
+
+
+def get_lockout_state(user):
+    """{'locked': bool, 'failures': int} from one cache round trip plus the loaded row"""
+    locked = bool(user.account_locked_until and timezone.now() < user.account_locked_until)
+    failures = user.login_attempts if not locked else 0
+    try:
+        keys = [FAILURE_KEY.format(user_id=user.pk), LOCK_KEY.format(user_id=user.pk)]
+        values = cache.get_many(keys)
+    except Exception:
+        return {'locked': locked, 'failures': failures}
+    return {
+        'locked': locked or keys[1] in values,
+        'failures': failures + values.get(keys[0], 0),
+    }
+
+
+def is_locked(user):
+    return get_lockout_state(user)['locked']
+
+
+def lock_account(user):
+    until = timezone.now() + timedelta(seconds=LOCKOUT_DURATION)
+    user.account_locked_until = until
+    type(user).objects.filter(pk=user.pk).update(account_locked_until=until)
+    try:
+        cache.set(LOCK_KEY.format(user_id=user.pk), until.timestamp(), LOCKOUT_DURATION)
+        cache.delete(FAILURE_KEY.format(user_id=user.pk))
+    except Exception:
+        pass  # the row already carries the lock
+
+
+def record_login_failure(user):
+    """Count a failed login; returns True when it locked the account"""
+    try:
+        failures = incr_counter(FAILURE_KEY.format(user_id=user.pk), FAILURE_WINDOW)
+    except Exception:
+        return _record_login_failure_in_db(user)
+    if failures >= MAX_FAILED_LOGINS:
+        lock_account(user)
+        return True
+    return False
+
+
+def _record_login_failure_in_db(user):
+    """Cache-less fallback; returns True when this failure locked the account"""
+    now = timezone.now()
+    until = now + timedelta(seconds=LOCKOUT_DURATION)
+    rows = type(user).objects.filter(pk=user.pk)
+    rows.update(
+        login_attempts=F('login_attempts') + 1,
+        last_failed_login=now,
+        account_locked_until=Case(
+            When(login_attempts__gte=MAX_FAILED_LOGINS - 1, then=Value(until)),
+            default=F('account_locked_until'),
+        ),
+    )
+    # Only this statement writes this exact timestamp
+    locked = rows.filter(account_locked_until=until).exists()
+    if locked:
+        user.account_locked_until = until
+    return locked
+
+
+def clear_login_failures(user, state=None):
+    """After a successful login; writes nothing unless failures were recorded"""
+    state = state or get_lockout_state(user)
+    if not state['failures']:
+        return
+    try:
+        cache.delete(FAILURE_KEY.format(user_id=user.pk))
+    except Exception:
+        pass
+    if user.login_attempts:
+        user.login_attempts = 0
+        user.last_failed_login = None
+        type(user).objects.filter(pk=user.pk).update(login_attempts=0, last_failed_login=None)
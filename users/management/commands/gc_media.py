@@ -0,0 +1,45 @@
+# users/management/commands/gc_media.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from users.media import (
+    DEFAULT_BATCH_SIZE, collect_garbage, recount_references, sweep_untracked, upload_directories
+)
+from users.storage import media_storage
+
+
+class Command(BaseCommand):
+    help = 'Delete unreferenced profile/portfolio media files in batches (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Keep unreferenced files this long, so in-flight uploads are not collected'
+        )
+        parser.add_argument('--recount', action='store_true', help='Rebuild reference counts first')
+        parser.add_argument(
+            '--sweep', action='store_true',
+            help='Also delete untracked files on disk (implies --recount)'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        storage = media_storage()
+        grace = timedelta(hours=options['grace_hours'])
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        if (options['recount'] or options['sweep']) and not dry_run:
+            corrected = recount_references(batch_size=batch_size)
+            self.stdout.write(f'Corrected {corrected} reference counts')
+
+        deleted, repaired = collect_garbage(storage, grace, batch_size, dry_run)
+        if options['sweep']:
+            deleted += sweep_untracked(storage, upload_directories(), grace, batch_size, dry_run)
+
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} files; {repaired} still-referenced files kept'
+        ))
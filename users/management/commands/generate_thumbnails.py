@@ -0,0 +1,31 @@
+# users/management/commands/generate_thumbnails.py
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from users.images import IMAGE_FIELDS, needs_thumbnails, refresh_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Render missing or stale thumbnails for profile pictures and portfolio images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for label, (image_field, renditions_field, _, _) in IMAGE_FIELDS.items():
+            queryset = (
+                apps.get_model(label).objects.exclude(**{image_field: ''})
+                .only('pk', image_field, renditions_field)
+                .order_by('pk')
+            )
+            rendered = failed = 0
+            for instance in queryset.iterator(chunk_size=options['batch_size']):
+                if not needs_thumbnails(instance):
+                    continue
+                try:
+                    refresh_thumbnails(label, instance.pk)
+                    rendered += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{label} {instance.pk}: {exc}')
+            self.stdout.write(self.style.SUCCESS(f'{label}: rendered {rendered}, failed {failed}'))
@@ -0,0 +1,39 @@
+# users/management/commands/rebuild_search_vectors.py
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from users.models import User
+from users.search import user_search_vector
+
+
+class Command(BaseCommand):
+    help = 'Backfill User.search_vector in primary key batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--only-missing', action='store_true',
+            help='Only fill rows whose search_vector is NULL'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = User.objects.all()
+        if options['only_missing']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        bounds = queryset.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write('No users to index')
+            return
+
+        updated = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            # Each batch is its own short UPDATE so locks are held briefly
+            updated += queryset.filter(
+                id__gte=start, id__lt=start + batch_size
+            ).update(search_vector=user_search_vector())
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search vectors for {updated} users')
+        )
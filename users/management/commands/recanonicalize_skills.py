@@ -0,0 +1,15 @@
+# users/management/commands/recanonicalize_skills.py
+from django.core.management.base import BaseCommand
+
+from users.skills import RECANONICALIZE_BATCH_SIZE, recanonicalize_skill_slugs
+
+
+class Command(BaseCommand):
+    help = 'Re-derive User and Job skill_slugs from their skills with the current taxonomy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=RECANONICALIZE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        changed = recanonicalize_skill_slugs(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated skill slugs on {changed} rows'))
@@ -0,0 +1,23 @@
+# users/management/commands/refresh_user_stats.py
+from django.core.management.base import BaseCommand
+
+from users.stats import DEFAULT_TREND_WINDOW, create_snapshot, refresh_daily_signup_stats
+
+
+class Command(BaseCommand):
+    help = 'Refresh daily signup trends and write a platform stats snapshot (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=int, default=DEFAULT_TREND_WINDOW,
+            help='Trailing days to recompute, so late verifications are counted'
+        )
+
+    def handle(self, *args, **options):
+        days = refresh_daily_signup_stats(window=options['window'])
+        snapshot = create_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Updated {days} daily rows; snapshot of {snapshot.total_users} users saved'
+            )
+        )
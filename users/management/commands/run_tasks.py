@@ -0,0 +1,24 @@
+# users/management/commands/run_tasks.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.tasks import run_pending_tasks
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (profile picture ingestion, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--once', action='store_true', help='Drain due tasks once and exit')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = run_pending_tasks(batch_size=options['batch_size'])
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(f'Ran {processed} tasks'))
+                return
+            if not processed:
+                time.sleep(options['sleep'])
@@ -0,0 +1,188 @@
+# users/media.py
+"""
+Garbage collection for content-addressed media (users/storage.py).
+
+Reference counts pick the candidates cheaply; before anything is deleted the
+candidates are checked against the referencing columns, so a drifted count
+can delay a deletion but never remove a file that is still in use.
+"""
+import posixpath
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .images import IMAGE_FIELDS, file_references
+from .models import StoredFile
+
+DEFAULT_GRACE = timedelta(hours=24)
+DEFAULT_BATCH_SIZE = 500
+
+
+def _referencing_models():
+    for label, (image_field, renditions_field, _, _) in IMAGE_FIELDS.items():
+        yield apps.get_model(label), image_field, renditions_field
+
+
+def count_references(names):
+    """
+    {name: number of instances referencing it} for the given names. Both
+    lookups are indexed: the image column (btree) and the generated
+    *_rendition_files array of rendition names (GIN, `?|`).
+    """
+    names = set(names)
+    counts = Counter()
+    if not names:
+        return counts
+    for model, image_field, renditions_field in _referencing_models():
+        matches = (
+            Q(**{f'{image_field}__in': names}) |
+            Q(**{f'{image_field}_rendition_files__has_any_keys': sorted(names)})
+        )
+        queryset = model.objects.filter(matches).only('pk', image_field, renditions_field)
+        for instance in queryset.iterator():
+            counts.update(file_references(instance) & names)
+    return counts
+
+
+def _delete_unreferenced(storage, names, dry_run):
+    """Delete the names nobody references; returns (deleted, still referenced)"""
+    in_use = count_references(names)
+    orphans = [name for name in names if not in_use[name]]
+    if not dry_run:
+        for name in orphans:
+            storage.delete(name)
+    return orphans, in_use
+
+
+def collect_garbage(storage, grace=DEFAULT_GRACE, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Delete files whose reference count has been zero for longer than `grace`"""
+    cutoff = timezone.now() - grace
+    deleted = repaired = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                StoredFile.objects.select_for_update(skip_locked=True)
+                .filter(ref_count__lte=0, released_at__lt=cutoff, id__gt=last_id)
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            # The rows stay locked until the files are gone, so an identical
+            # upload (track_file) waits and then re-creates row and file
+            orphans, in_use = _delete_unreferenced(storage, [row.name for row in batch], dry_run)
+            deleted += len(orphans)
+            for row in batch:
+                if in_use[row.name]:
+                    row.ref_count = in_use[row.name]
+                    row.released_at = None
+                    repaired += 1
+            if not dry_run:
+                StoredFile.objects.filter(name__in=orphans).delete()
+                StoredFile.objects.bulk_update(
+                    [row for row in batch if in_use[row.name]], ['ref_count', 'released_at']
+                )
+    return deleted, repaired
+
+
+def _track_untracked(names, batch_size):
+    """StoredFile rows for referenced files nobody tracks; returns how many were added"""
+    tracked = set(StoredFile.objects.filter(name__in=names).values_list('name', flat=True))
+    untracked = names - tracked
+    if untracked:
+        counts = count_references(untracked)
+        StoredFile.objects.bulk_create(
+            [StoredFile(name=name, ref_count=counts[name]) for name in sorted(untracked)],
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+    return len(untracked)
+
+
+def recount_references(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Rebuild every reference count from the referencing rows, tracking files
+    that predate content addressing. Returns the number of corrected rows.
+    Works a batch of names at a time through the indexed count_references(),
+    so memory stays bounded by `batch_size`.
+    """
+    now = timezone.now()
+    corrected = 0
+    last_id = 0
+    while True:
+        batch = list(StoredFile.objects.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        counts = count_references([row.name for row in batch])
+        changed = []
+        for row in batch:
+            count = counts[row.name]
+            if row.ref_count != count:
+                row.ref_count = count
+                row.released_at = None if count else (row.released_at or now)
+                changed.append(row)
+        StoredFile.objects.bulk_update(changed, ['ref_count', 'released_at'])
+        corrected += len(changed)
+
+    # Referenced but untracked (uploaded before content addressing)
+    for model, image_field, renditions_field in _referencing_models():
+        queryset = model.objects.only('pk', image_field, renditions_field).order_by('pk')
+        names = set()
+        for instance in queryset.iterator(chunk_size=batch_size):
+            names |= file_references(instance)
+            if len(names) >= batch_size:
+                corrected += _track_untracked(names, batch_size)
+                names = set()
+        corrected += _track_untracked(names, batch_size)
+    return corrected
+
+
+def _walk(storage, directory):
+    directories, files = storage.listdir(directory)
+    for filename in files:
+        yield posixpath.join(directory, filename)
+    for subdirectory in directories:
+        yield from _walk(storage, posixpath.join(directory, subdirectory))
+
+
+def sweep_untracked(storage, directories, grace=DEFAULT_GRACE, batch_size=DEFAULT_BATCH_SIZE,
+                    dry_run=False):
+    """Delete files on disk that no StoredFile row tracks and nothing references"""
+    cutoff = timezone.now() - grace
+
+    def sweep(names):
+        tracked = set(StoredFile.objects.filter(name__in=names).values_list('name', flat=True))
+        candidates = [
+            name for name in names
+            if name not in tracked and storage.get_modified_time(name) < cutoff
+        ]
+        return len(_delete_unreferenced(storage, candidates, dry_run)[0])
+
+    deleted = 0
+    for directory in directories:
+        if not storage.exists(directory):
+            continue
+        batch = []
+        for name in _walk(storage, directory):
+            batch.append(name)
+            if len(batch) >= batch_size:
+                deleted += sweep(batch)
+                batch = []
+        if batch:
+            deleted += sweep(batch)
+    return deleted
+
+
+def upload_directories():
+    """Top-level media directories of the content-addressed image fields"""
+    directories = set()
+    for model, image_field, _ in _referencing_models():
+        upload_to = model._meta.get_field(image_field).upload_to
+        directories.add(upload_to.strip('/'))
+    return sorted(directories)
@@ -0,0 +1,20 @@
+# users/middleware.py
+from .activity import record_activity
+
+
+class ActivityMiddleware:
+    """
+    Marks authenticated requests as user activity. Nothing is written per
+    request; users/activity.py flushes the buffered timestamps in bulk.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # DRF authenticates inside the view and sets the user on this request too
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            record_activity(user.pk)
+        return response
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:44
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Initial taxonomy: canonical name -> known spelling variants
+SEED_SKILLS = {
+    'Python': ['py', 'python3'],
+    'JavaScript': ['js', 'ecmascript', 'es6'],
+    'TypeScript': ['ts'],
+    'React': ['react.js', 'reactjs', 'react js'],
+    'Node.js': ['node', 'nodejs', 'node js'],
+    'Vue.js': ['vue', 'vuejs'],
+    'Angular': ['angularjs', 'angular.js'],
+    'Django': ['django rest framework', 'drf'],
+    'PostgreSQL': ['postgres', 'psql'],
+    'MongoDB': ['mongo'],
+    'Go': ['golang'],
+    'Kubernetes': ['k8s'],
+    'AWS': ['amazon web services'],
+}
+
+BATCH_SIZE = 2000
+
+
+def skill_key(raw):
+    # Frozen copy of users.skills.skill_key
+    return re.sub(r'[^a-z0-9+#]', '', str(raw).lower())
+
+
+def seed_and_backfill(apps, schema_editor):
+    Skill = apps.get_model('users', 'Skill')
+    SkillAlias = apps.get_model('users', 'SkillAlias')
+    User = apps.get_model('users', 'User')
+
+    alias_map = {}
+    for name, aliases in SEED_SKILLS.items():
+        skill, _ = Skill.objects.get_or_create(name=name, defaults={'slug': skill_key(name)})
+        alias_map[skill.slug] = skill.slug
+        for alias in aliases:
+            key = skill_key(alias)
+            if key != skill.slug:
+                SkillAlias.objects.get_or_create(alias=key, defaults={'skill': skill})
+                alias_map[key] = skill.slug
+
+    batch = []
+    for user in User.objects.only('id', 'skills').iterator(chunk_size=BATCH_SIZE):
+        slugs = []
+        for raw in user.skills if isinstance(user.skills, list) else []:
+            key = skill_key(raw)
+            slug = alias_map.get(key, key)
+            if slug and slug not in slugs:
+                slugs.append(slug)
+        user.skill_slugs = slugs
+        batch.append(user)
+        if len(batch) >= BATCH_SIZE:
+            User.objects.bulk_update(batch, ['skill_slugs'])
+            batch = []
+    if batch:
+        User.objects.bulk_update(batch, ['skill_slugs'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0004_user_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.CharField(max_length=100, unique=True)),
+                ('category', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'skill aliases',
+            },
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='skill_slugs',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['skill_slugs'], name='users_skill_slugs_gin'),
+        ),
+        migrations.AddField(
+            model_name='skillalias',
+            name='skill',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='users.skill'),
+        ),
+        migrations.RunPython(seed_and_backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_admin_fuzzy_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySignupStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('signups', models.PositiveIntegerField(default=0)),
+                ('freelancer_signups', models.PositiveIntegerField(default=0)),
+                ('client_signups', models.PositiveIntegerField(default=0)),
+                ('verified_signups', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'daily signup stats',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlatformStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('total_freelancers', models.PositiveIntegerField(default=0)),
+                ('total_clients', models.PositiveIntegerField(default=0)),
+                ('verified_users', models.PositiveIntegerField(default=0)),
+                ('premium_users', models.PositiveIntegerField(default=0)),
+                ('users_by_country', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'get_latest_by': 'created_at',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='backgroundtask',
+            name='users_task_dedupe_active',
+        ),
+        migrations.AddConstraint(
+            model_name='backgroundtask',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('dedupe_key',), name='users_task_dedupe_pending'),
+        ),
+    ]
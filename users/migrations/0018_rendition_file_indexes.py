@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:01
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0017_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_rendition_files',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(models.F('profile_picture_renditions'), models.Value('$.sizes.*.*'), function='jsonb_path_query_array', output_field=models.JSONField()), output_field=models.JSONField()),
+        ),
+        migrations.AddField(
+            model_name='userportfolio',
+            name='image_rendition_files',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(models.F('image_renditions'), models.Value('$.sizes.*.*'), function='jsonb_path_query_array', output_field=models.JSONField()), output_field=models.JSONField()),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['profile_picture'], name='users_profile_picture'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['profile_picture_rendition_files'], name='users_rendition_files_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='userportfolio',
+            index=models.Index(fields=['image'], name='users_portfolio_image'),
+        ),
+        migrations.AddIndex(
+            model_name='userportfolio',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['image_rendition_files'], name='users_portfolio_files_gin'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0018_rendition_file_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_created_6541e9_idx',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['average_rating', 'id'], name='users_rating_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='users_created_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['hourly_rate', 'id'], name='users_rate_keyset'),
+        ),
+    ]
@@ -1,13 +1,48 @@
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F, Func, Value
+from django.db.models.functions import Upper
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from decimal import Decimal
+import copy
 import uuid
 
+from .search import SEARCH_VECTOR_FIELDS, TRIGRAM_SEARCH_EXPRESSIONS, user_search_vector
+from .skills import canonicalize_skills, skill_key
+from .storage import media_storage
 
-class User(AbstractUser):
+
+def rendition_files(renditions_field):
+    """Every file name in a renditions document (users/images.py) as a jsonb array"""
+    return Func(
+        F(renditions_field), Value('$.sizes.*.*'),
+        function='jsonb_path_query_array', output_field=models.JSONField(),
+    )
+
+
+class MediaReferencesMixin:
+    """
+    Keeps the image/renditions values an instance was loaded with, so saving
+    it can move StoredFile reference counts by the difference (users/signals.py).
+    """
+    media_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Raw column values; deferred fields are left out
+        instance._loaded_media = {
+            name: instance.__dict__[name] for name in cls.media_fields if name in instance.__dict__
+        }
+        return instance
+
+
+class User(MediaReferencesMixin, AbstractUser):
     USER_TYPES = (
         ('client', 'Client'),
         ('freelancer', 'Freelancer'),
@@ -44,9 +79,19 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     user_type = models.CharField(max_length=20, choices=USER_TYPES)
     phone_number = models.CharField(max_length=15, blank=True)
-    profile_picture = models.ImageField(upload_to='profiles/', blank=True)
+    profile_picture = models.ImageField(upload_to='profiles/', storage=media_storage, blank=True)
+    profile_picture_renditions = models.JSONField(default=dict, blank=True, editable=False)  # see users/images.py
+    # Rendition file names, GIN indexed for the gc_media reference check (users/media.py)
+    profile_picture_rendition_files = models.GeneratedField(
+        expression=rendition_files('profile_picture_renditions'),
+        output_field=models.JSONField(), db_persist=True,
+    )
     bio = models.TextField(blank=True, max_length=1000)
 
+    # Buffered and bulk-written by users/activity.py. Declared above the
+    # `timezone` field, which shadows django.utils.timezone in this class body
+    last_activity = models.DateTimeField(default=timezone.now)
+
     # Location Information
     country = models.CharField(max_length=100, blank=True)
     city = models.CharField(max_length=100, blank=True)
@@ -62,6 +107,8 @@ class User(AbstractUser):
 
     # Skills and Experience (Primarily for freelancers)
     skills = models.JSONField(default=list, blank=True)
+    # Canonical Skill slugs derived from `skills`, used for indexed filtering
+    skill_slugs = ArrayField(models.CharField(max_length=100), default=list, blank=True, editable=False)
     experience_level = models.CharField(max_length=20, choices=EXPERIENCE_LEVELS, blank=True)
     years_of_experience = models.PositiveIntegerField(null=True, blank=True)
     languages_spoken = models.JSONField(default=list, blank=True)
@@ -99,10 +146,10 @@ class User(AbstractUser):
     login_attempts = models.PositiveIntegerField(default=0)
     last_failed_login = models.DateTimeField(null=True, blank=True)
     account_locked_until = models.DateTimeField(null=True, blank=True)
+    token_version = models.PositiveIntegerField(default=0)  # bumped to revoke issued JWTs
 
     # Profile completion and activity
     profile_completion_percentage = models.PositiveIntegerField(default=0)
-    last_activity = models.DateTimeField(auto_now=True)
     is_featured = models.BooleanField(default=False)
     is_premium = models.BooleanField(default=False)
     premium_expires = models.DateTimeField(null=True, blank=True)
@@ -115,8 +162,12 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Full-text search document, maintained by update_search_vector()
+    search_vector = SearchVectorField(null=True, editable=False)
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
+    media_fields = ('profile_picture', 'profile_picture_renditions')
 
     class Meta:
         db_table = 'users'
@@ -124,17 +175,79 @@ class User(AbstractUser):
             models.Index(fields=['user_type', 'is_active']),
             models.Index(fields=['average_rating', 'total_reviews']),
             models.Index(fields=['availability_status']),
-            models.Index(fields=['created_at']),
+            # (sort key, id) for the keyset-paginated user list orderings
+            models.Index(fields=['average_rating', 'id'], name='users_rating_keyset'),
+            models.Index(fields=['created_at', 'id'], name='users_created_keyset'),
+            models.Index(fields=['hourly_rate', 'id'], name='users_rate_keyset'),
+            models.Index(fields=['updated_at']),  # incremental refresh in jobs/matching.py
             models.Index(fields=['last_activity']),
+            GinIndex(fields=['search_vector'], name='users_search_vector_gin'),
+            GinIndex(fields=['skill_slugs'], name='users_skill_slugs_gin'),
+            models.Index(fields=['profile_picture'], name='users_profile_picture'),
+            GinIndex(fields=['profile_picture_rendition_files'], name='users_rendition_files_gin'),
+            # Trigram indexes on UPPER(col) serve the admin icontains search
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='users_email_trgm'),
+            GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='users_username_trgm'),
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='users_first_name_trgm'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='users_last_name_trgm'),
+            GinIndex(
+                OpClass(TRIGRAM_SEARCH_EXPRESSIONS['full_name'], name='gin_trgm_ops'),
+                name='users_full_name_trgm'
+            ),
         ]
 
     def __str__(self):
         return f"{self.email} ({self.user_type})"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'skills' in update_fields:
+            self.skill_slugs = canonicalize_skills(self.skills)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'skill_slugs'}
+
+        search_changed = self.search_fields_changed(update_fields)
+        super().save(*args, **kwargs)
+        if search_changed:
+            self.update_search_vector()
+        self._loaded_search_values = self._search_values()
+        self._loaded_is_active = self.is_active
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_search_values = instance._search_values()
+        instance._loaded_is_active = instance.__dict__.get('is_active')
+        return instance
+
+    def _search_values(self):
+        # Deferred fields are left out; save() does not write them either
+        return {
+            name: copy.deepcopy(self.__dict__[name])
+            for name in SEARCH_VECTOR_FIELDS if name in self.__dict__
+        }
+
+    def search_fields_changed(self, update_fields=None):
+        """Whether saving would change a field that feeds search_vector"""
+        names = SEARCH_VECTOR_FIELDS if update_fields is None else set(update_fields) & set(SEARCH_VECTOR_FIELDS)
+        loaded = getattr(self, '_loaded_search_values', None)
+        if loaded is None:
+            return bool(names)  # new, or not loaded from the database
+        current = self._search_values()
+        return any(current.get(name) != loaded.get(name) for name in names)
+
+    def update_search_vector(self):
+        """Recompute the search document in the database for this user"""
+        User.objects.filter(pk=self.pk).update(search_vector=user_search_vector())
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
 
+    @property
+    def group_names(self):
+        return [group.name for group in self.groups.all()]
+
     @property
     def is_freelancer(self):
         return self.user_type == 'freelancer'
@@ -145,9 +258,8 @@ class User(AbstractUser):
 
     @property
     def is_account_locked(self):
-        if self.account_locked_until:
-            return timezone.now() < self.account_locked_until
-        return False
+        from .lockout import is_locked
+        return is_locked(self)
 
     def calculate_profile_completion(self):
         """Calculate profile completion percentage"""
@@ -191,21 +303,14 @@ class User(AbstractUser):
         return not self.is_account_locked and self.is_active
 
     def reset_login_attempts(self):
-        """Reset login attempts after successful login"""
-        self.login_attempts = 0
-        self.last_failed_login = None
-        self.save(update_fields=['login_attempts', 'last_failed_login'])
+        """Reset login attempts after successful login (see users/lockout.py)"""
+        from .lockout import clear_login_failures
+        clear_login_failures(self)
 
     def increment_login_attempts(self):
-        """Increment login attempts and lock account if needed"""
-        self.login_attempts += 1
-        self.last_failed_login = timezone.now()
-
-        # Lock account for 30 minutes after 5 failed attempts
-        if self.login_attempts >= 5:
-            self.account_locked_until = timezone.now() + timezone.timedelta(minutes=30)
-
-        self.save(update_fields=['login_attempts', 'last_failed_login', 'account_locked_until'])
+        """Count a failed login; locks the account for 30 minutes after 5 failures"""
+        from .lockout import record_login_failure
+        return record_login_failure(self)
 
     def generate_email_verification_token(self):
         """Generate a 6-digit verification code and set expiry"""
@@ -248,6 +353,7 @@ class UserEducation(models.Model):
     end_date = models.DateField(null=True, blank=True)  # Null if currently studying
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_date']
@@ -267,6 +373,7 @@ class UserExperience(models.Model):
     description = models.TextField(blank=True)
     is_current = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_date']
@@ -285,6 +392,7 @@ class UserCertification(models.Model):
     credential_id = models.CharField(max_length=100, blank=True)
     credential_url = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-issue_date']
@@ -293,19 +401,30 @@ class UserCertification(models.Model):
         return f"{self.name} - {self.issuing_organization}"
 
 
-class UserPortfolio(models.Model):
+class UserPortfolio(MediaReferencesMixin, models.Model):
     """Portfolio items for freelancers"""
+    media_fields = ('image', 'image_renditions')
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='portfolio')
     title = models.CharField(max_length=200)
     description = models.TextField()
-    image = models.ImageField(upload_to='portfolio/', blank=True)
+    image = models.ImageField(upload_to='portfolio/', storage=media_storage, blank=True)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)  # see users/images.py
+    image_rendition_files = models.GeneratedField(
+        expression=rendition_files('image_renditions'), output_field=models.JSONField(), db_persist=True,
+    )
     url = models.URLField(blank=True)
     technologies_used = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     is_featured = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['image'], name='users_portfolio_image'),
+            GinIndex(fields=['image_rendition_files'], name='users_portfolio_files_gin'),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.user.email}"
@@ -327,9 +446,188 @@ class UserSocialLink(models.Model):
     platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES)
     url = models.URLField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['user', 'platform']
 
     def __str__(self):
-        return f"{self.user.email} - {self.platform}"
\ No newline at end of file
+        return f"{self.user.email} - {self.platform}"
+
+
+class Skill(models.Model):
+    """Canonical skill in the platform taxonomy"""
+    name = models.CharField(max_length=100, unique=True)
+    slug = models.CharField(max_length=100, unique=True)  # skill_key() of the name
+    category = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.slug = skill_key(self.slug or self.name)
+        super().save(*args, **kwargs)
+
+
+class SkillAlias(models.Model):
+    """Alternative spelling that resolves to a canonical skill (e.g. "react.js" -> React)"""
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=100, unique=True)  # skill_key() of the alias
+
+    class Meta:
+        verbose_name_plural = 'skill aliases'
+
+    def __str__(self):
+        return f"{self.alias} -> {self.skill.name}"
+
+    def save(self, *args, **kwargs):
+        self.alias = skill_key(self.alias)
+        super().save(*args, **kwargs)
+
+
+class PlatformStatsSnapshot(models.Model):
+    """Periodically refreshed platform totals served to the admin dashboard"""
+    total_users = models.PositiveIntegerField(default=0)
+    total_freelancers = models.PositiveIntegerField(default=0)
+    total_clients = models.PositiveIntegerField(default=0)
+    verified_users = models.PositiveIntegerField(default=0)
+    premium_users = models.PositiveIntegerField(default=0)
+    users_by_country = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        get_latest_by = 'created_at'
+
+    def __str__(self):
+        return f"Platform stats at {self.created_at}"
+
+
+class DailySignupStats(models.Model):
+    """Signups per day by user type, maintained incrementally"""
+    date = models.DateField(unique=True)
+    signups = models.PositiveIntegerField(default=0)
+    freelancer_signups = models.PositiveIntegerField(default=0)
+    client_signups = models.PositiveIntegerField(default=0)
+    verified_signups = models.PositiveIntegerField(default=0)  # signups of that day verified so far
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name_plural = 'daily signup stats'
+
+    def __str__(self):
+        return f"{self.date}: {self.signups} signups"
+
+    @property
+    def verification_rate(self):
+        return (self.verified_signups / self.signups * 100) if self.signups > 0 else 0
+
+
+class BackgroundTask(models.Model):
+    """
+    Queued side effect run outside the request cycle (see users/tasks.py).
+    While running, `run_after` doubles as the lease expiry so tasks of a
+    crashed worker are picked up again.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    dedupe_key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after']
+        indexes = [
+            models.Index(
+                fields=['run_after'], name='users_task_due',
+                condition=models.Q(status__in=['pending', 'running']),
+            ),
+        ]
+        constraints = [
+            # At most one waiting task per dedupe key; a running one does not
+            # block a follow-up, so work queued meanwhile is not lost
+            models.UniqueConstraint(
+                fields=['dedupe_key'], name='users_task_dedupe_pending',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class StoredFile(models.Model):
+    """
+    A content-addressed media file (see users/storage.py) and how many
+    instances reference it. Unreferenced files are deleted by gc_media once
+    released_at is older than the grace period.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    released_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['released_at'], name='users_storedfile_orphans',
+                         condition=models.Q(ref_count=0)),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class EmailOutbox(models.Model):
+    """Outgoing email written in the request transaction and delivered by users/emails.py"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails')
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    category = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        verbose_name_plural = 'email outbox'
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'], name='users_outbox_due',
+                condition=models.Q(status__in=['pending', 'sending']),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
@@ -0,0 +1,216 @@
+# users/pagination.py
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def approximate_count(queryset):
+    """Planner row estimate for a queryset; avoids a full COUNT(*) scan"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination keyed on the queryset's active ordering plus `id`.
+
+    Enabled with ?pagination=cursor or when a ?cursor= is present; otherwise
+    requests fall back to page-number pagination. The seek condition repeats
+    an inclusive bound on the leading sort key, so with a (sort_key, id)
+    index a page is one index range scan and deep pages cost the same as
+    the first one; orderings on computed annotations (rank, similarity)
+    still sort the filtered rows. Pass ?count=approx to include the
+    planner's row estimate.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    default_ordering = ('-created_at',)
+    fallback_class = StandardResultsSetPagination
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.fallback = None
+
+    def is_keyset_request(self, request):
+        return (self.cursor_query_param in request.query_params or
+                request.query_params.get(self.mode_query_param) == 'cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_keyset_request(request):
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view=view)
+
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), 'page')
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+        self.signature = [f"{'-' if desc else ''}{name}" for name, desc, _ in self.keys]
+
+        reverse, position = self.decode_cursor(request)
+        keys = self.keys
+        if reverse:
+            keys = [(name, not desc, not nulls_first) for name, desc, nulls_first in keys]
+
+        rows = self.fetch(queryset, keys, position, self.page_size + 1)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else position is not None
+        self.first_position = self.position_of(rows[0]) if rows else position
+        self.last_position = self.position_of(rows[-1]) if rows else position
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) == 'approx':
+            self.count = approximate_count(queryset)
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        response = {
+            'next': self.encode_cursor(False, self.last_position) if self.has_next else None,
+            'previous': self.encode_cursor(True, self.first_position) if self.has_previous else None,
+        }
+        if self.count is not None:
+            response['count'] = self.count
+        response['results'] = data
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_keys(self, queryset):
+        """(field, descending, nulls_first) for each ordering term plus the id tie-breaker"""
+        ordering = [str(term) for term in queryset.query.order_by] or list(self.default_ordering)
+        keys = []
+        for term in ordering:
+            name = term.lstrip('-')
+            if name == 'pk':
+                name = 'id'
+            descending = term.startswith('-')
+            # Postgres default: NULLS LAST ascending, NULLS FIRST descending
+            keys.append((name, descending, descending))
+        if 'id' not in [name for name, _, _ in keys]:
+            keys.append(('id', False, False))
+        return keys
+
+    def is_nullable(self, queryset, name):
+        try:
+            return queryset.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return False
+
+    def order_expression(self, queryset, key):
+        name, descending, nulls_first = key
+        if not self.is_nullable(queryset, name):
+            return f'-{name}' if descending else name
+        nulls = {'nulls_first': True} if nulls_first else {'nulls_last': True}
+        return F(name).desc(**nulls) if descending else F(name).asc(**nulls)
+
+    def fetch(self, queryset, keys, position, limit):
+        """Up to `limit` rows after `position` in the given key order"""
+        ordered = queryset.order_by(*[self.order_expression(queryset, key) for key in keys])
+        if position is None:
+            return list(ordered[:limit])
+        name, descending, nulls_first = keys[0]
+        if position[0] is None or nulls_first or not self.is_nullable(queryset, name):
+            return list(ordered.filter(self.seek_filter(queryset, keys, position))[:limit])
+
+        # NULLs come after the position: read the rest of the non-NULL range,
+        # then the NULLs, as two index scans instead of an OR the planner sorts
+        rows = list(
+            ordered.filter(self.seek_filter(queryset, keys, position, non_null=True))[:limit]
+        )
+        if len(rows) < limit:
+            rows += ordered.filter(**{f'{name}__isnull': True})[:limit - len(rows)]
+        return rows
+
+    def seek_filter(self, queryset, keys, position, non_null=False):
+        """Rows strictly after `position` in the given key order (non_null: leading key not NULL)"""
+        condition = Q(pk__in=[])
+        equal_prefix = Q()
+        for (name, descending, nulls_first), value in zip(keys, position):
+            nullable = self.is_nullable(queryset, name)
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if nulls_first else Q(pk__in=[])
+                equal = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+                if nullable and not nulls_first:
+                    after |= Q(**{f'{name}__isnull': True})
+                equal = Q(**{name: value})
+            condition |= equal_prefix & after
+            equal_prefix &= equal
+
+        # Redundant with the chain above, but a plain range on the leading key
+        # is what lets Postgres seek a (key, id) index instead of filtering
+        (name, descending, nulls_first), value = keys[0], position[0]
+        if value is not None:
+            bound = Q(**{f'{name}__lte' if descending else f'{name}__gte': value})
+            if non_null:
+                bound &= Q(**{f'{name}__isnull': False})
+            elif self.is_nullable(queryset, name) and not nulls_first:
+                bound |= Q(**{f'{name}__isnull': True})
+            condition &= bound
+        return condition
+
+    def position_of(self, row):
+        return [_encode_value(getattr(row, name)) for name, _, _ in self.keys]
+
+    def encode_cursor(self, reverse, position):
+        payload = json.dumps({'o': self.signature, 'r': reverse, 'p': position}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return False, None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if payload['o'] != self.signature or len(payload['p']) != len(self.signature):
+                raise ValueError('Cursor does not match the current ordering')
+            return bool(payload['r']), payload['p']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,208 @@
+# users/profiles.py
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Subquery, prefetch_related_objects
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import (
+    User, UserEducation, UserExperience,
+    UserCertification, UserPortfolio, UserSocialLink
+)
+from .serializers import UserProfileSerializer
+
+# Every relation UserProfileSerializer nests
+PROFILE_RELATIONS = UserProfileSerializer.relation_fields
+
+# Removed from profiles shown to other users
+PUBLIC_PROFILE_HIDDEN_FIELDS = (
+    'email', 'phone_number', 'last_login_ip', 'notification_preferences',
+    'privacy_settings', 'is_verified', 'phone_verified', 'identity_verified',
+)
+
+# Relation models that carry created_at/updated_at stamps
+STAMPED_RELATIONS = {
+    'education': UserEducation,
+    'experience': UserExperience,
+    'certifications': UserCertification,
+    'portfolio': UserPortfolio,
+    'social_links': UserSocialLink,
+}
+
+PROFILE_VERSION_KEY = 'users:profile-version:{user_id}'
+PUBLIC_PROFILE_KEY = 'users:public-profile:{user_id}:v{version}'
+PUBLIC_PROFILE_VALIDATORS_KEY = 'users:public-profile-validators:{user_id}:v{version}:{fieldset}'
+PROFILE_CACHE_HITS_KEY = 'users:public-profile:hits'
+PROFILE_CACHE_MISSES_KEY = 'users:public-profile:misses'
+
+
+def profile_queryset(queryset=None, relations=PROFILE_RELATIONS):
+    """Users with the profile relations prefetched in one pass"""
+    if queryset is None:
+        queryset = User.objects.all()
+    return queryset.prefetch_related(*relations)
+
+
+def load_profile(user, relations=PROFILE_RELATIONS):
+    """Prefetch profile relations onto an already loaded user (e.g. request.user)"""
+    prefetch_related_objects([user], *relations)
+    return user
+
+
+def sparse_queryset(queryset, serializer, extra_columns=()):
+    """Select only the columns and prefetch only the relations a sparse serializer renders"""
+    concrete = {field.name for field in queryset.model._meta.concrete_fields}
+    columns = set(serializer.requested_columns) | (set(extra_columns) & concrete)
+    return queryset.only(*columns).prefetch_related(*serializer.requested_relations)
+
+
+def get_profile_version(user_id):
+    key = PROFILE_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted counter never reuses an old version
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_profile_version(user_id):
+    """Invalidate every cached rendering of a user's profile"""
+    key = PROFILE_VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def _increment_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_profile_cache_stats():
+    hits = cache.get(PROFILE_CACHE_HITS_KEY, 0)
+    misses = cache.get(PROFILE_CACHE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': (hits / total * 100) if total > 0 else 0,
+    }
+
+
+def build_public_profile(user):
+    data = dict(UserProfileSerializer(user).data)
+    for field in PUBLIC_PROFILE_HIDDEN_FIELDS:
+        data.pop(field, None)
+    return data
+
+
+def get_public_profile(user_id, fieldset=None):
+    """
+    Public profile data for an active user, or None if there is no such user.
+    Served from the cache when the user's profile version has not changed;
+    `fieldset` (see get_fieldset_params) trims the cached full profile.
+    """
+    key = PUBLIC_PROFILE_KEY.format(user_id=user_id, version=get_profile_version(user_id))
+    data = cache.get(key)
+    if data is not None:
+        _increment_counter(PROFILE_CACHE_HITS_KEY)
+        return _apply_fieldset(data, fieldset)
+
+    _increment_counter(PROFILE_CACHE_MISSES_KEY)
+    user = profile_queryset().filter(id=user_id, is_active=True).first()
+    if user is None:
+        return None
+
+    data = build_public_profile(user)
+    cache.set(key, data, settings.PROFILE_CACHE_TIMEOUT)
+    return _apply_fieldset(data, fieldset)
+
+
+def _apply_fieldset(data, fieldset):
+    if not fieldset:
+        return data
+    keep = UserProfileSerializer(**fieldset).fields.keys()
+    return {name: value for name, value in data.items() if name in keep}
+
+
+def fieldset_key(fieldset):
+    """Normalized form of get_fieldset_params() output, equal for equivalent requests"""
+    return tuple(sorted((name, tuple(sorted(values))) for name, values in (fieldset or {}).items()))
+
+
+def profile_validators(queryset, user_id, fieldset=None, relations=None):
+    """
+    Weak ETag and Last-Modified timestamp for a user and the given relations
+    (by default those UserProfileSerializer renders for `fieldset`), computed
+    in a single query (one scalar subquery per stamp). The fieldset is part of
+    the ETag, so differently trimmed bodies never share one. Returns None when
+    `queryset` has no user with that id.
+
+    The ETag is weak because the coalesced activity flush (users/activity.py)
+    rewrites last_activity without touching updated_at: bodies that differ
+    only in that best-effort timestamp are equivalent, not byte-identical.
+    """
+    if relations is None:
+        relations = UserProfileSerializer(**(fieldset or {})).requested_relations
+    annotations = {}
+    for name in relations:
+        if name == 'groups':
+            rows = User.groups.through.objects.filter(user=OuterRef('pk')).order_by().values('user')
+            annotations['group_ids'] = Subquery(
+                rows.annotate(value=ArrayAgg('group_id', order_by='group_id')).values('value')
+            )
+            continue
+        rows = STAMPED_RELATIONS[name].objects.filter(user=OuterRef('pk')).order_by().values('user')
+        # Row counts catch deletions, which leave no newer stamp behind
+        annotations[f'{name}_count'] = Subquery(rows.annotate(value=Count('id')).values('value'))
+        annotations[f'{name}_updated'] = Subquery(rows.annotate(value=Max('updated_at')).values('value'))
+
+    stamps = queryset.filter(pk=user_id).annotate(**annotations).values('updated_at', *annotations).first()
+    if stamps is None:
+        return None
+
+    digest = hashlib.sha256(repr((sorted(stamps.items()), fieldset_key(fieldset))).encode()).hexdigest()
+    last_modified = max(
+        value for key, value in stamps.items()
+        if (key == 'updated_at' or key.endswith('_updated')) and value is not None
+    )
+    return {'etag': f'W/"{digest[:32]}"', 'last_modified': int(last_modified.timestamp())}
+
+
+def not_modified_response(request, validators):
+    """304 response when the client's copy is current, otherwise None"""
+    return get_conditional_response(
+        request, etag=validators['etag'], last_modified=validators['last_modified']
+    )
+
+
+def add_validators(response, validators, private=False):
+    response['ETag'] = validators['etag']
+    response['Last-Modified'] = http_date(validators['last_modified'])
+    # Clients may keep the body but must revalidate it on every use
+    patch_cache_control(response, no_cache=True, private=private)
+    return response
+
+
+def get_public_profile_validators(user_id, fieldset=None):
+    """Cached validators for an active user's public profile as `fieldset` trims it, or None"""
+    key = PUBLIC_PROFILE_VALIDATORS_KEY.format(
+        user_id=user_id, version=get_profile_version(user_id),
+        fieldset=hashlib.sha256(repr(fieldset_key(fieldset)).encode()).hexdigest()[:16],
+    )
+    validators = cache.get(key)
+    if validators is None:
+        validators = profile_validators(User.objects.filter(is_active=True), user_id, fieldset)
+        if validators is None:
+            return None
+        cache.set(key, validators, settings.PROFILE_CACHE_TIMEOUT)
+    return validators
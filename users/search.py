@@ -0,0 +1,79 @@
+# users/search.py
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+)
+from django.db.models import F, FloatField, Q, TextField, Value
+from django.db.models.functions import Cast, Concat, Greatest, Upper
+from rest_framework import filters
+
+SEARCH_CONFIG = 'english'
+
+# Fields that feed User.search_vector; saving any of them refreshes the vector
+SEARCH_VECTOR_FIELDS = ('title', 'skills', 'first_name', 'last_name', 'bio')
+
+# Expressions covered by the users_*_trgm indexes; queries must use them verbatim
+TRIGRAM_SEARCH_EXPRESSIONS = {
+    'email': Upper('email'),
+    'username': Upper('username'),
+    'full_name': Upper(Concat('first_name', Value(' '), 'last_name')),
+}
+
+
+def user_search_vector():
+    """Weighted tsvector expression: title/skills > name > bio"""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector(Cast('skills', TextField()), weight='A', config=SEARCH_CONFIG) +
+        SearchVector('first_name', 'last_name', weight='B', config=SEARCH_CONFIG) +
+        SearchVector('bio', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+class FullTextSearchFilter(filters.BaseFilterBackend):
+    """
+    Full-text search over User.search_vector (GIN indexed).
+    Always annotates `rank` so it can be used as an ordering field.
+    """
+    search_param = 'search'
+
+    def get_search_terms(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+        # float8 so rank values survive a round trip through keyset cursors
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+
+
+def fuzzy_user_search(queryset, term):
+    """
+    Typo-tolerant lookup on email, username and full name using pg_trgm word
+    similarity (GIN trigram indexes), annotated with `similarity` and best
+    matches first.
+    """
+    term = term.upper()
+    aliases = {f'{name}_trgm': expression for name, expression in TRIGRAM_SEARCH_EXPRESSIONS.items()}
+    matches = Q()
+    for alias in aliases:
+        matches |= Q(**{f'{alias}__trigram_word_similar': term})
+
+    similarity = Greatest(*[TrigramWordSimilarity(term, alias) for alias in aliases])
+    return queryset.alias(**aliases).filter(matches).annotate(
+        similarity=Cast(similarity, FloatField())
+    ).order_by('-similarity', 'id')
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """Order by search rank by default when a search term is given"""
+
+    def get_default_ordering(self, view):
+        ordering = super().get_default_ordering(view)
+        if FullTextSearchFilter().get_search_terms(view.request):
+            return ['-rank'] + list(ordering or [])
+        return ordering
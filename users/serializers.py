@@ -1,7 +1,7 @@
 
 # users/serializers.py
 from rest_framework import serializers
-from django.contrib.auth import authenticate
+from .lockout import clear_login_failures, get_lockout_state, record_login_failure
 from .models import (
     User, UserEducation, UserExperience,
     UserCertification, UserPortfolio, UserSocialLink
@@ -29,10 +29,38 @@ class UserCertificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at']
 
 
+class ThumbnailsField(serializers.ReadOnlyField):
+    """
+    URLs of an image's thumbnail renditions, {size: {format: url}}, best
+    format first; null until they have been generated. Renditions live in
+    the storage of `image_field`.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        super().__init__(**kwargs)
+
+    def to_representation(self, renditions):
+        sizes = (renditions or {}).get('sizes')
+        if not sizes:
+            return None
+        storage = self.parent.Meta.model._meta.get_field(self.image_field).storage
+        request = self.context.get('request')
+        urls = {}
+        for size, formats in sizes.items():
+            urls[size] = {}
+            for fmt, name in formats.items():
+                url = storage.url(name)
+                urls[size][fmt] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
 class UserPortfolioSerializer(serializers.ModelSerializer):
+    image_thumbnails = ThumbnailsField('image', source='image_renditions')
+
     class Meta:
         model = UserPortfolio
-        fields = '__all__'
+        exclude = ['image_renditions', 'image_rendition_files']
         read_only_fields = ['user', 'created_at']
 
 
@@ -43,9 +71,80 @@ class UserSocialLinkSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at']
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+def get_fieldset_params(request):
+    """
+    Read ?fields=a,b and ?expand=x,y into serializer kwargs.
+    A missing parameter means "no restriction"; an empty one selects nothing.
+    """
+    params = {}
+    for name in ('fields', 'expand'):
+        value = request.query_params.get(name)
+        if value is not None:
+            params[name] = {item.strip() for item in value.split(',') if item.strip()}
+    return params
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for sparse fieldsets: `fields` keeps only the named fields
+    and `expand` chooses the nested relations. Relations are included by default
+    only when listed in `default_expand`; `expandable_fields` adds relations the
+    serializer does not declare.
+    """
+    relation_fields = ()
+    default_expand = ()
+    expandable_fields = {}
+    # Model columns needed to render fields that are not columns themselves
+    column_dependencies = {}
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+        relations = set(self.relation_fields) | set(self.expandable_fields)
+        if expand is None:
+            expand = set(self.default_expand) if fields is None else set()
+        if fields is not None:
+            expand = set(expand) | (set(fields) & relations)
+
+        for name, factory in self.expandable_fields.items():
+            if name in expand:
+                self.fields[name] = factory()
+
+        for name in list(self.fields):
+            if name in relations:
+                keep = name in expand
+            else:
+                keep = fields is None or name in fields
+            if not keep:
+                self.fields.pop(name)
+
+    @property
+    def requested_relations(self):
+        relations = set(self.relation_fields) | set(self.expandable_fields)
+        return [name for name in self.fields if name in relations]
+
+    @property
+    def requested_columns(self):
+        """Concrete model columns the remaining fields read, for QuerySet.only()"""
+        model_fields = {
+            field.name for field in self.Meta.model._meta.concrete_fields
+            if not field.is_relation
+        }
+        columns = {'id'}
+        for name, field in self.fields.items():
+            if name in self.column_dependencies:
+                columns.update(self.column_dependencies[name])
+            elif field.source in model_fields:
+                columns.add(field.source)
+        return sorted(columns)
+
+
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Comprehensive user profile serializer"""
     profile_picture = serializers.ImageField(use_url=True)
+    profile_picture_thumbnails = ThumbnailsField('profile_picture', source='profile_picture_renditions')
 
     full_name = serializers.ReadOnlyField()
     education = UserEducationSerializer(many=True, read_only=True)
@@ -55,12 +154,19 @@ class UserProfileSerializer(serializers.ModelSerializer):
     social_links = UserSocialLinkSerializer(many=True, read_only=True)
     groups = serializers.StringRelatedField(many=True, read_only=True)
 
+    relation_fields = (
+        'education', 'experience', 'certifications',
+        'portfolio', 'social_links', 'groups',
+    )
+    default_expand = relation_fields
+    column_dependencies = {'full_name': ('first_name', 'last_name')}
+
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 'full_name',
-            'user_type', 'phone_number', 'profile_picture', 'bio', 'country',
-            'city', 'timezone', 'title', 'company_name', 'website',
+            'user_type', 'phone_number', 'profile_picture',
+            'profile_picture_thumbnails', 'bio', 'country', 'city', 'timezone', 'title', 'company_name', 'website',
             'linkedin_url', 'github_url', 'portfolio_url', 'skills',
             'experience_level', 'years_of_experience', 'languages_spoken',
             'hourly_rate', 'currency', 'availability_status',
@@ -117,9 +223,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         password = validated_data.pop('password')
-        user = User.objects.create_user(password=password, **validated_data)
-        user.save()
-        return user
+        return User.objects.create_user(password=password, **validated_data)
 
 
 class UserLoginSerializer(serializers.Serializer):
@@ -130,38 +234,31 @@ class UserLoginSerializer(serializers.Serializer):
         email = data.get('email')
         password = data.get('password')
 
-        if email and password:
-            try:
-                user = User.objects.get(email=email)
-
-                # Check if account is locked
-                if not user.can_login():
-                    if user.is_account_locked:
-                        raise serializers.ValidationError(
-                            "Account is temporarily locked due to too many failed login attempts"
-                        )
-                    elif not user.is_active:
-                        raise serializers.ValidationError("Account is disabled")
-
-                # Authenticate user
-                user = authenticate(request=self.context.get('request'),
-                                    username=email, password=password)
-
-                if user:
-                    # Reset failed login attempts on successful login
-                    user.reset_login_attempts()
-                    data['user'] = user
-                else:
-                    # Increment failed login attempts
-                    user_obj = User.objects.get(email=email)
-                    user_obj.increment_login_attempts()
-                    raise serializers.ValidationError("Invalid credentials")
-
-            except User.DoesNotExist:
-                raise serializers.ValidationError("Invalid credentials")
-        else:
+        if not (email and password):
             raise serializers.ValidationError("Email and password are required")
 
+        user = User.objects.filter(email=email).first()
+        if user is None:
+            # Same hashing cost as a real check, so unknown emails are not detectable by timing
+            User().set_password(password)
+            raise serializers.ValidationError("Invalid credentials")
+
+        # Lockout state lives in the cache (users/lockout.py); checked before hashing
+        lockout = get_lockout_state(user)
+        if lockout['locked']:
+            raise serializers.ValidationError(
+                "Account is temporarily locked due to too many failed login attempts"
+            )
+        if not user.is_active:
+            raise serializers.ValidationError("Account is disabled")
+
+        if not user.check_password(password):
+            record_login_failure(user)
+            raise serializers.ValidationError("Invalid credentials")
+
+        # No write unless earlier failures were recorded
+        clear_login_failures(user, lockout)
+        data['user'] = user
         return data
 
 
@@ -197,20 +294,42 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for user lists"""
     full_name = serializers.ReadOnlyField()
+    profile_picture_thumbnails = ThumbnailsField('profile_picture', source='profile_picture_renditions')
+
+    expandable_fields = {
+        'portfolio': lambda: UserPortfolioSerializer(many=True, read_only=True),
+        'social_links': lambda: UserSocialLinkSerializer(many=True, read_only=True),
+        'groups': lambda: serializers.StringRelatedField(many=True, read_only=True),
+    }
+    column_dependencies = {'full_name': ('first_name', 'last_name')}
 
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'full_name', 'user_type',
-            'profile_picture', 'title', 'country', 'city', 'average_rating',
-            'total_reviews', 'hourly_rate', 'currency', 'availability_status',
+            'profile_picture', 'profile_picture_thumbnails', 'title', 'country',
+            'city', 'average_rating', 'total_reviews', 'hourly_rate', 'currency', 'availability_status',
             'skills', 'is_verified', 'last_activity'
         ]
 
 
+class AdminUserListSerializer(serializers.ModelSerializer):
+    """Admin console user rows; expects groups to be prefetched"""
+    full_name = serializers.ReadOnlyField()
+    groups = serializers.StringRelatedField(many=True, read_only=True)
+
+    class Meta:
+        model = User
+        fields = [
+            'id', 'username', 'email', 'full_name', 'user_type', 'groups',
+            'is_active', 'is_verified', 'profile_completion_percentage',
+            'created_at', 'last_activity'
+        ]
+
+
 class ChangePasswordSerializer(serializers.Serializer):
     """Serializer for changing password"""
     old_password = serializers.CharField(required=True)
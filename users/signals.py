@@ -0,0 +1,141 @@
+# users/signals.py
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    User, UserEducation, UserExperience, UserCertification,
+    UserPortfolio, UserSocialLink, Skill, SkillAlias
+)
+from .authentication import revoke_user_tokens
+from .images import (
+    file_references, loaded_file_references, needs_thumbnails, queue_thumbnails,
+    remember_file_references,
+)
+from .profiles import bump_profile_version
+from .skills import invalidate_alias_map, queue_recanonicalize
+from .storage import release_files, retain_files
+from .utils.permissions import invalidate_all_authorization, invalidate_user_authorization
+
+PROFILE_RELATION_MODELS = (
+    UserEducation, UserExperience, UserCertification, UserPortfolio, UserSocialLink,
+)
+
+
+@receiver([post_save, post_delete], sender=Skill)
+@receiver([post_save, post_delete], sender=SkillAlias)
+def skill_taxonomy_changed(sender, **kwargs):
+    invalidate_alias_map()
+    queue_recanonicalize()
+
+
+def _bump_after_commit(user_id):
+    # After commit, so a concurrent reader cannot cache the old rows under the new version
+    transaction.on_commit(lambda: bump_profile_version(user_id))
+
+
+def _invalidate_authorization(user_id):
+    # Immediately and again after commit, so a reader inside the open
+    # transaction cannot re-cache the old groups/permissions for good
+    invalidate_user_authorization(user_id)
+    transaction.on_commit(lambda: invalidate_user_authorization(user_id))
+
+
+def _invalidate_all_authorization():
+    invalidate_all_authorization()
+    transaction.on_commit(invalidate_all_authorization)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_profile_changed(sender, instance, update_fields=None, **kwargs):
+    _bump_after_commit(instance.pk)
+    # is_active / is_superuser feed the cached permission set
+    _invalidate_authorization(instance.pk)
+    # Claims-authenticated requests never load the row, so a deactivated
+    # user's tokens must stop validating, however the flag was cleared
+    deactivated = (
+        getattr(instance, '_loaded_is_active', None) is True and instance.is_active is False
+        and (update_fields is None or 'is_active' in update_fields)
+    )
+    if deactivated:
+        user_id = instance.pk
+        transaction.on_commit(lambda: revoke_user_tokens(user_id))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.__dict__.pop('_authorization_cache', None)
+        _bump_after_commit(instance.pk)
+        _invalidate_authorization(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            _bump_after_commit(user_id)
+            _invalidate_authorization(user_id)
+    else:
+        # group.user_set.clear() does not report which users were removed
+        _invalidate_all_authorization()
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.__dict__.pop('_authorization_cache', None)
+        _invalidate_authorization(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            _invalidate_authorization(user_id)
+    else:
+        _invalidate_all_authorization()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver([post_save, post_delete], sender=Group)
+def group_authorization_changed(sender, action=None, **kwargs):
+    # Affects every member of the group; cheaper to roll the cache generation
+    # than to look the members up
+    if action is None or action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_all_authorization()
+
+
+def profile_relation_changed(sender, instance, **kwargs):
+    _bump_after_commit(instance.user_id)
+
+
+for model in PROFILE_RELATION_MODELS:
+    post_save.connect(profile_relation_changed, sender=model, dispatch_uid=f'profile-{model.__name__}-save')
+    post_delete.connect(profile_relation_changed, sender=model, dispatch_uid=f'profile-{model.__name__}-delete')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserPortfolio)
+def image_uploaded(sender, instance, **kwargs):
+    if needs_thumbnails(instance):
+        queue_thumbnails(instance)
+
+
+# Reference counts of content-addressed media files (users/storage.py). The
+# previous references come from the values the instance was loaded with
+# (MediaReferencesMixin), so no query and no per-instantiation hook is needed
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserPortfolio)
+def update_file_references(sender, instance, created, **kwargs):
+    current = file_references(instance)
+    previous = set() if created else loaded_file_references(instance)
+    if current is None or previous is None:
+        return  # loaded with deferred image fields; gc_media --recount repairs any drift
+    retain_files(current - previous)
+    release_files(previous - current)
+    remember_file_references(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=UserPortfolio)
+def release_file_references(sender, instance, **kwargs):
+    release_files(loaded_file_references(instance) or file_references(instance) or set())
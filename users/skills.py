@@ -0,0 +1,118 @@
+# users/skills.py
+import re
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Count, F, Func
+from django.utils import timezone
+
+from .tasks import enqueue, task
+
+ALIAS_MAP_CACHE_KEY = 'users:skill-alias-map'
+
+RECANONICALIZE_SKILLS = 'users.recanonicalize_skills'
+RECANONICALIZE_BATCH_SIZE = 2000
+
+# Models whose save() derives skill_slugs from skills
+SKILL_SLUG_MODELS = ('users.User', 'jobs.Job')
+
+_NON_KEY_CHARS = re.compile(r'[^a-z0-9+#]')
+
+
+def skill_key(raw):
+    """
+    Reduce a free-form skill name to its lookup key.
+    "React.js", "React JS" and "reactjs" all become "reactjs".
+    """
+    return _NON_KEY_CHARS.sub('', str(raw).lower())
+
+
+def get_alias_map():
+    """Map every known skill key/alias key to its canonical Skill.slug"""
+    alias_map = cache.get(ALIAS_MAP_CACHE_KEY)
+    if alias_map is None:
+        from .models import Skill, SkillAlias
+
+        alias_map = {slug: slug for slug in Skill.objects.values_list('slug', flat=True)}
+        alias_map.update(SkillAlias.objects.values_list('alias', 'skill__slug'))
+        cache.set(ALIAS_MAP_CACHE_KEY, alias_map, None)
+    return alias_map
+
+
+def invalidate_alias_map():
+    cache.delete(ALIAS_MAP_CACHE_KEY)
+
+
+def canonicalize_skills(skills):
+    """Return de-duplicated canonical slugs for a list of skill names, in input order"""
+    if not isinstance(skills, (list, tuple)):
+        return []
+
+    alias_map = get_alias_map()
+    slugs = []
+    for raw in skills:
+        key = skill_key(raw)
+        if not key:
+            continue
+        slug = alias_map.get(key, key)
+        if slug not in slugs:
+            slugs.append(slug)
+    return slugs
+
+
+def recanonicalize_skill_slugs(batch_size=RECANONICALIZE_BATCH_SIZE):
+    """
+    Re-derive every stored skill_slugs from skills with the current taxonomy,
+    so rows saved before a skill or alias was added keep matching
+    filter_by_skills(). Returns the number of rows changed.
+    """
+    invalidate_alias_map()
+    changed = 0
+    for label in SKILL_SLUG_MODELS:
+        model = apps.get_model(label)
+        queryset = model.objects.only('id', 'skills', 'skill_slugs').order_by('id')
+        batch = []
+        for instance in queryset.iterator(chunk_size=batch_size):
+            slugs = canonicalize_skills(instance.skills)
+            if slugs != instance.skill_slugs:
+                instance.skill_slugs = slugs
+                # Moves the row into jobs/matching.py's incremental refresh
+                instance.updated_at = timezone.now()
+                batch.append(instance)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, ['skill_slugs', 'updated_at'])
+                changed += len(batch)
+                batch = []
+        model.objects.bulk_update(batch, ['skill_slugs', 'updated_at'])
+        changed += len(batch)
+    return changed
+
+
+def queue_recanonicalize():
+    """Re-derive stored slugs after a taxonomy change; bursts of edits share one run"""
+    enqueue(RECANONICALIZE_SKILLS, dedupe_key='recanonicalize-skills')
+
+
+@task(RECANONICALIZE_SKILLS, max_attempts=3, lease=600)
+def recanonicalize_skills_task(payload):
+    recanonicalize_skill_slugs()
+
+
+def filter_by_skills(queryset, skills, match='any'):
+    """Filter users by skills using the GIN-indexed skill_slugs array"""
+    slugs = canonicalize_skills(skills)
+    if not slugs:
+        return queryset
+    if match == 'all':
+        return queryset.filter(skill_slugs__contains=slugs)
+    return queryset.filter(skill_slugs__overlap=slugs)
+
+
+def skill_facets(queryset, limit=20):
+    """Count users per skill slug for the given user queryset"""
+    return list(
+        queryset.annotate(skill=Func(F('skill_slugs'), function='unnest'))
+        .values('skill')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'skill')[:limit]
+    )
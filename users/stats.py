@@ -0,0 +1,97 @@
+# users/stats.py
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import User, PlatformStatsSnapshot, DailySignupStats
+
+TOTAL_FIELDS = ('total_users', 'total_freelancers', 'total_clients', 'verified_users', 'premium_users')
+
+# Days recomputed on each refresh so verifications of recent signups are picked up
+DEFAULT_TREND_WINDOW = 7
+
+
+def compute_platform_totals():
+    """All platform totals in one conditional-aggregation query, plus the top countries"""
+    totals = User.objects.aggregate(
+        total_users=Count('id'),
+        total_freelancers=Count('id', filter=Q(user_type='freelancer')),
+        total_clients=Count('id', filter=Q(user_type='client')),
+        verified_users=Count('id', filter=Q(is_verified=True)),
+        premium_users=Count('id', filter=Q(is_premium=True)),
+    )
+    totals['users_by_country'] = list(
+        User.objects.values('country').annotate(count=Count('id')).order_by('-count')[:10]
+    )
+    return totals
+
+
+def create_snapshot():
+    return PlatformStatsSnapshot.objects.create(**compute_platform_totals())
+
+
+def get_latest_snapshot(max_age):
+    """Latest snapshot if it is younger than `max_age` seconds, else None"""
+    snapshot = PlatformStatsSnapshot.objects.first()
+    if snapshot and snapshot.created_at >= timezone.now() - timedelta(seconds=max_age):
+        return snapshot
+    return None
+
+
+def refresh_daily_signup_stats(window=DEFAULT_TREND_WINDOW):
+    """
+    Recompute daily signup rows from the last stored day minus `window` days
+    onward; the first run backfills everything. Returns the number of days written.
+    """
+    last_date = DailySignupStats.objects.aggregate(last=Max('date'))['last']
+    users = User.objects.all()
+    if last_date is not None:
+        start = last_date - timedelta(days=window - 1)
+        # Compare on the raw column so the created_at index is used
+        users = users.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+
+    rows = (
+        users.annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(
+            signups=Count('id'),
+            freelancer_signups=Count('id', filter=Q(user_type='freelancer')),
+            client_signups=Count('id', filter=Q(user_type='client')),
+            verified_signups=Count('id', filter=Q(is_verified=True)),
+        )
+        .order_by('day')
+    )
+    days = [
+        DailySignupStats(
+            date=row['day'],
+            signups=row['signups'],
+            freelancer_signups=row['freelancer_signups'],
+            client_signups=row['client_signups'],
+            verified_signups=row['verified_signups'],
+        )
+        for row in rows
+    ]
+    DailySignupStats.objects.bulk_create(
+        days,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=['signups', 'freelancer_signups', 'client_signups', 'verified_signups', 'updated_at'],
+    )
+    return len(days)
+
+
+def get_daily_trends(days=30):
+    since = timezone.now().date() - timedelta(days=days - 1)
+    return [
+        {
+            'date': row.date,
+            'signups': row.signups,
+            'freelancer_signups': row.freelancer_signups,
+            'client_signups': row.client_signups,
+            'verified_signups': row.verified_signups,
+            'verification_rate': row.verification_rate,
+        }
+        for row in DailySignupStats.objects.filter(date__gte=since).order_by('date')
+    ]
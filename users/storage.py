@@ -0,0 +1,110 @@
+# users/storage.py
+"""
+Content-addressed media storage.
+
+Files are named by the SHA-256 of their content (profiles/ab/ab12...ef.jpg),
+so identical uploads share one file. Every stored file has a StoredFile row
+whose ref_count is kept up to date by the users signals; files nobody
+references any more are removed by `manage.py gc_media`.
+"""
+import hashlib
+import posixpath
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by content hash and writes each content once"""
+
+    def __init__(self, **kwargs):
+        # Same name means same bytes, so a concurrent identical write may overwrite
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def hashed_name(self, name, digest):
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = content_hash(content)
+        name = self.hashed_name(name, digest)
+        # Track (and so protect from GC) before checking what is on disk; a
+        # new row means GC may just have removed the file, so always write it
+        created = track_file(name, digest, content.size)
+        if created or not self.exists(name):
+            super().save(name, content, max_length=max_length)
+        return name
+
+
+def media_storage():
+    return ContentAddressedStorage()
+
+
+def track_file(name, digest='', size=0):
+    """
+    Register a stored file; unreferenced until an instance points at it.
+    Re-saving an unreferenced file restarts its GC grace period. Returns True
+    if the row is new.
+
+    The row is locked first: collect_garbage holds that lock while it deletes
+    a file, so this waits for it and then sees the row gone, instead of
+    trusting a file that is being unlinked.
+    """
+    from .models import StoredFile
+
+    now = timezone.now()
+    with transaction.atomic():
+        stored = StoredFile.objects.select_for_update().filter(name=name).first()
+        if stored is None:
+            _, created = StoredFile.objects.get_or_create(
+                name=name, defaults={'sha256': digest, 'size': size, 'released_at': now},
+            )
+            return created
+        if stored.ref_count == 0:
+            StoredFile.objects.filter(pk=stored.pk).update(released_at=now)
+    return False
+
+
+def retain_files(names):
+    from .models import StoredFile
+
+    if names:
+        StoredFile.objects.filter(name__in=names).update(
+            ref_count=F('ref_count') + 1, released_at=None
+        )
+
+
+def release_files(names):
+    """Drop one reference from each file; files reaching zero become GC candidates"""
+    from .models import StoredFile
+
+    if names:
+        StoredFile.objects.filter(name__in=names, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1
+        )
+        StoredFile.objects.filter(name__in=names, ref_count=0, released_at__isnull=True).update(
+            released_at=timezone.now()
+        )
@@ -0,0 +1,207 @@
+# users/tasks.py
+"""
+Small DB-backed background task queue for slow side effects.
+
+    @task('users.example', max_attempts=5)
+    def example(payload): ...
+
+    enqueue('users.example', {'user_id': 1}, dedupe_key='example:1')
+
+Tasks are inserted in the caller's transaction and, after commit, drained by
+an in-process worker thread (BACKGROUND_TASKS_IN_PROCESS) or by the
+`run_tasks` management command. Failures are retried with exponential
+backoff; raise PermanentTaskError to give up immediately. Between drains the
+in-process worker sleeps until the earliest delayed task, retry or expired
+lease falls due, and only exits once the queue is empty.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE = 60
+RETRY_BASE_DELAY = 30
+
+_registry = {}
+
+
+class PermanentTaskError(Exception):
+    """Raised by a handler when retrying cannot help"""
+
+
+class TaskDefinition:
+    def __init__(self, name, func, max_attempts, lease):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.lease = lease
+
+
+def task(name, max_attempts=3, lease=DEFAULT_LEASE):
+    """
+    Register a handler taking the task payload. `lease` is how long a worker
+    owns a claimed task; handlers must finish well within it (use network
+    timeouts), or another worker may run the task again.
+    """
+    def decorator(func):
+        _registry[name] = TaskDefinition(name, func, max_attempts, lease)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, dedupe_key=None, delay=0):
+    """
+    Queue a task. With a dedupe_key, at most one task per key waits in the
+    queue; enqueueing again only brings its run time forward if needed.
+    """
+    from .models import BackgroundTask
+
+    definition = _registry[name]
+    run_after = timezone.now() + timedelta(seconds=delay)
+    BackgroundTask.objects.bulk_create([
+        BackgroundTask(
+            name=name,
+            payload=payload or {},
+            dedupe_key=dedupe_key,
+            max_attempts=definition.max_attempts,
+            run_after=run_after,
+        )
+    ], ignore_conflicts=True)
+    if dedupe_key is not None:
+        BackgroundTask.objects.filter(
+            dedupe_key=dedupe_key, status='pending', run_after__gt=run_after
+        ).update(run_after=run_after)
+
+    if getattr(settings, 'BACKGROUND_TASKS_IN_PROCESS', False):
+        transaction.on_commit(start_in_process_worker)
+
+
+def claim_tasks(limit=10):
+    """Lock and lease up to `limit` due tasks; returns them marked running"""
+    from .models import BackgroundTask
+
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            BackgroundTask.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='pending') | Q(status='running'), run_after__lte=now)
+            .order_by('run_after')[:limit]
+        )
+        for background_task in tasks:
+            definition = _registry.get(background_task.name)
+            lease = definition.lease if definition else DEFAULT_LEASE
+            background_task.status = 'running'
+            background_task.attempts += 1
+            background_task.run_after = now + timedelta(seconds=lease)
+        BackgroundTask.objects.bulk_update(tasks, ['status', 'attempts', 'run_after'])
+    return tasks
+
+
+def run_task(background_task):
+    definition = _registry.get(background_task.name)
+    try:
+        if definition is None:
+            raise PermanentTaskError(f"Unknown task {background_task.name}")
+        definition.func(background_task.payload)
+    except Exception as exc:
+        background_task.last_error = f"{type(exc).__name__}: {exc}"
+        retry = (not isinstance(exc, PermanentTaskError) and
+                 background_task.attempts < background_task.max_attempts)
+        if retry:
+            delay = RETRY_BASE_DELAY * 2 ** (background_task.attempts - 1)
+            background_task.status = 'pending'
+            background_task.run_after = timezone.now() + timedelta(seconds=delay)
+        else:
+            background_task.status = 'failed'
+            logger.warning('Task %s failed: %s', background_task.name, background_task.last_error)
+    else:
+        background_task.status = 'succeeded'
+        background_task.last_error = ''
+
+    try:
+        with transaction.atomic():
+            background_task.save(update_fields=['status', 'run_after', 'last_error', 'updated_at'])
+    except IntegrityError:
+        # The same work was queued again while this attempt ran; let that run instead
+        background_task.status = 'failed'
+        background_task.last_error += ' (superseded by a newer queued task)'
+        background_task.save(update_fields=['status', 'last_error', 'updated_at'])
+    return background_task.status
+
+
+def run_pending_tasks(batch_size=10, max_batches=None):
+    """Drain due tasks; returns how many were run"""
+    processed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        tasks = claim_tasks(batch_size)
+        if not tasks:
+            break
+        for background_task in tasks:
+            run_task(background_task)
+        processed += len(tasks)
+        batches += 1
+    return processed
+
+
+def next_run_delay():
+    """Seconds until the earliest queued task (or expired lease) is due; None if nothing is queued"""
+    from .models import BackgroundTask
+
+    next_run = BackgroundTask.objects.filter(status__in=['pending', 'running']).aggregate(
+        next_run=Min('run_after')
+    )['next_run']
+    if next_run is None:
+        return None
+    return max(0.0, (next_run - timezone.now()).total_seconds())
+
+
+_worker_condition = threading.Condition()
+_worker_running = False
+_worker_wakeup = False
+
+
+def start_in_process_worker():
+    """Drain the queue on a daemon thread, or wake the one already doing so"""
+    global _worker_running, _worker_wakeup
+    with _worker_condition:
+        _worker_wakeup = True
+        if _worker_running:
+            _worker_condition.notify()
+            return
+        _worker_running = True
+    threading.Thread(target=_in_process_worker, daemon=True).start()
+
+
+def _in_process_worker():
+    global _worker_running, _worker_wakeup
+    try:
+        close_old_connections()
+        while True:
+            with _worker_condition:
+                _worker_wakeup = False
+            try:
+                run_pending_tasks()
+                delay = next_run_delay()
+            except Exception:
+                logger.exception('In-process task worker failed')
+                delay = RETRY_BASE_DELAY
+            # Do not hold a database connection while idle
+            connection.close()
+            with _worker_condition:
+                if _worker_wakeup:
+                    continue
+                if delay is None:
+                    _worker_running = False
+                    return
+                # Sleep until the next task falls due, or an enqueue wakes us
+                _worker_condition.wait(timeout=delay)
+    finally:
+        connection.close()
@@ -335,4 +335,1215 @@
 # 7. **Fast Tests**: Tests should run quickly
 #    - Use in-memory database
 #    - Disable unnecessary features
-# """
\ No newline at end of file
+# """
+
+import base64
+import importlib
+import io
+import json
+import shutil
+import smtplib
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlparse
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from google.auth import crypt, jwt as google_jwt
+from PIL import Image as PILImage
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from jobs.models import Job
+from users.activity import activity_tracker, flush_activity
+from users.authentication import (
+    ClaimsJWTAuthentication, UserRefreshToken, get_token_version, revoke_user_tokens
+)
+from users.avatars import FETCH_TIMEOUT, queue_profile_picture
+from users.emails import deliver_outbox, queue_email
+from users.google_auth import (
+    DEFAULT_MAX_AGE, GoogleIdTokenVerifier, StaticCertSource, get_google_verifier, parse_max_age
+)
+from users.images import RENDER_THUMBNAILS, available_formats
+from users.lockout import MAX_FAILED_LOGINS, get_lockout_state, record_login_failure
+from users.media import (
+    collect_garbage, count_references, recount_references, sweep_untracked, upload_directories
+)
+from users.models import (
+    User, UserEducation, UserExperience,
+    UserCertification, UserPortfolio, UserSocialLink, BackgroundTask, EmailOutbox, StoredFile,
+    Skill, SkillAlias, PlatformStatsSnapshot, DailySignupStats,
+)
+from users.search import SEARCH_CONFIG, fuzzy_user_search
+from users.skills import canonicalize_skills, filter_by_skills
+from users.stats import (
+    TOTAL_FIELDS, compute_platform_totals, create_snapshot, get_latest_snapshot,
+    refresh_daily_signup_stats,
+)
+from users.storage import media_storage
+from users.tasks import _in_process_worker, enqueue, next_run_delay, run_pending_tasks, task
+from users.throttling import LoginIPThrottle, parse_rate
+
+
+class ProfileQueryCountTestCase(APITestCase):
+    """Pin the number of queries the profile-serializing endpoints issue"""
+
+    def setUp(self):
+        cache.clear()
+        self.password = 'testpass123'
+        self.user = User.objects.create_user(
+            username='freelancer',
+            email='freelancer@example.com',
+            password=self.password,
+            user_type='freelancer',
+            skills=['Python', 'Django'],
+        )
+        self.user.groups.add(Group.objects.create(name='Freelancer'))
+        # Two rows per relation so a per-row query would change the count
+        for i in range(2):
+            UserEducation.objects.create(
+                user=self.user, degree=f'Degree {i}', field_of_study='CS',
+                institution='MIT', start_date='2015-09-01'
+            )
+            UserExperience.objects.create(
+                user=self.user, title=f'Developer {i}', company='Acme',
+                start_date='2019-06-01'
+            )
+            UserCertification.objects.create(
+                user=self.user, name=f'Cert {i}', issuing_organization='AWS',
+                issue_date='2022-01-15'
+            )
+            UserPortfolio.objects.create(
+                user=self.user, title=f'Project {i}', description='Demo'
+            )
+        UserSocialLink.objects.create(user=self.user, platform='github', url='https://github.com/x')
+        UserSocialLink.objects.create(user=self.user, platform='linkedin', url='https://linkedin.com/in/x')
+
+    def test_current_user_profile(self):
+        self.client.force_authenticate(user=self.user)
+        # Validator query plus one prefetch per relation, request.user is reused
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('current_user_profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['education']), 2)
+        self.assertEqual(response.data['groups'], ['Freelancer'])
+
+    def test_public_profile(self):
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('user_profile', args=[self.user.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('email', response.data)
+        self.assertEqual(len(response.data['portfolio']), 2)
+
+        # Served from the profile cache on the next hit
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse('user_profile', args=[self.user.id]))
+        self.assertEqual(cached.data, response.data)
+
+    def test_conditional_get(self):
+        self.client.force_authenticate(user=self.user)
+        # (url, queries for a revalidation); public profile validators are cached
+        for url, queries in [
+            (reverse('current_user_profile'), 1),
+            (reverse('user_profile', args=[self.user.id]), 0),
+            (reverse('user_public_portfolio', args=[self.user.id]), 1),
+        ]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response['ETag']
+            self.assertTrue(etag.startswith('W/'))  # last_activity moves without updated_at
+
+            with self.assertNumQueries(queries):
+                cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Deleting a nested row changes the ETag
+        etag = self.client.get(reverse('user_public_portfolio', args=[self.user.id]))['ETag']
+        UserPortfolio.objects.filter(user=self.user).first().delete()
+        response = self.client.get(reverse('user_public_portfolio', args=[self.user.id]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_validators_depend_on_fieldset(self):
+        self.client.force_authenticate(user=self.user)
+        for url in [reverse('current_user_profile'), reverse('user_profile', args=[self.user.id])]:
+            full = self.client.get(url)
+            sparse = self.client.get(url, {'fields': 'id,username'})
+            self.assertNotEqual(sparse['ETag'], full['ETag'])
+            self.assertEqual(self.client.get(url, {'fields': 'username, id'})['ETag'], sparse['ETag'])
+
+            response = self.client.get(url, {'fields': 'id,username'}, HTTP_IF_NONE_MATCH=full['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(set(response.data), {'id', 'username'})
+            response = self.client.get(url, {'fields': 'id,username'}, HTTP_IF_NONE_MATCH=sparse['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_public_profile_cache_invalidated_on_change(self):
+        url = reverse('user_profile', args=[self.user.id])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserPortfolio.objects.create(user=self.user, title='Project 3', description='Demo')
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['portfolio']), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_login(self):
+        # One users lookup (lockout state is in the cache), then one prefetch
+        # per relation; last_login_ip goes through the activity buffer
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse('login'), {
+                'email': self.user.email, 'password': self.password
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['user']['experience']), 2)
+
+    @patch('users.views.get_google_verifier')
+    def test_google_login_existing_user(self, mock_verifier):
+        mock_verifier.return_value.verify.return_value = {'email': self.user.email, 'name': 'Free Lancer'}
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse('google_login'), {'credential': 'token'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['created'])
+        self.assertEqual(len(response.data['user']['social_links']), 2)
+
+    def test_register(self):
+        Group.objects.create(name='Client')
+        # Validation, insert and group assignment, then one prefetch per relation
+        with self.assertNumQueries(14):
+            response = self.client.post(reverse('register'), {
+                'email': 'client@example.com', 'username': 'client',
+                'password': self.password, 'user_type': 'client',
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['user']['groups'], ['Client'])
+
+
+class ClaimsAuthenticationTestCase(APITestCase):
+    """JWT claims authentication and token revocation"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='client', email='client@example.com',
+            password='testpass123', user_type='client',
+        )
+        self.user.groups.add(Group.objects.create(name='Client'))
+        self.access = str(UserRefreshToken.for_user(self.user).access_token)
+
+    def test_claims_user_needs_no_query(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        get_token_version(self.user.id)  # warm the version cache
+
+        with self.assertNumQueries(0):
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+            self.assertEqual(user.id, self.user.id)
+            self.assertEqual(user.email, 'client@example.com')
+            self.assertEqual(user.user_type, 'client')
+            self.assertEqual(user.group_names, ['Client'])
+
+        # Non-claim attributes load the row once
+        with self.assertNumQueries(1):
+            self.assertEqual(user.timezone, 'UTC')
+            self.assertEqual(user.currency, 'USD')
+
+    def test_revoked_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.assertEqual(self.client.get(reverse('user')).status_code, status.HTTP_200_OK)
+
+        revoke_user_tokens(self.user.id)
+        self.assertEqual(self.client.get(reverse('user')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            self.client.get(reverse('current_user_profile')).status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_deactivation_through_save_revokes_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.assertEqual(self.client.get(reverse('user')).status_code, status.HTTP_200_OK)
+
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.client.get(reverse('user')).status_code, status.HTTP_200_OK)
+
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.client.get(reverse('user')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthorizationCacheTestCase(APITestCase):
+    """Cached group/permission resolution and its invalidation"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin_group = Group.objects.create(name='Admin')
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com',
+            password='testpass123', user_type='client',
+        )
+        self.admin.groups.add(self.admin_group)
+        self.access = str(UserRefreshToken.for_user(self.admin).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def test_get_user_is_served_from_cache(self):
+        self.client.get(reverse('user'))  # warm token version and authorization caches
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('user'))
+        self.assertEqual(response.data['groups'], ['Admin'])
+
+    def test_group_permission_change_invalidates(self):
+        self.assertEqual(self.client.get(reverse('user')).data['permissions'], [])
+
+        self.admin_group.permissions.add(Permission.objects.get(codename='view_user'))
+        self.assertEqual(self.client.get(reverse('user')).data['permissions'], ['users.view_user'])
+
+    def test_removed_admin_loses_access(self):
+        self.assertEqual(self.client.get(reverse('admin_profile_cache_stats')).status_code, status.HTTP_200_OK)
+
+        self.admin.groups.remove(self.admin_group)
+        self.assertEqual(self.client.get(reverse('admin_profile_cache_stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+def _rsa_key_pair():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_pem, public_pem.decode()
+
+
+class GoogleIdTokenVerifierTestCase(TestCase):
+    """Local ID token verification against a fake Google key set"""
+
+    def setUp(self):
+        cache.clear()
+        private_pem, self.public_pem = _rsa_key_pair()
+        self.signer = crypt.RSASigner.from_string(private_pem, key_id='key-1')
+        self.source = StaticCertSource({'key-1': self.public_pem})
+        self.source.fetch = Mock(wraps=self.source.fetch)
+        self.verifier = GoogleIdTokenVerifier(audience='client-id', cert_source=self.source)
+
+    def make_token(self, signer=None, **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': 'client-id',
+            'email': 'google@example.com', 'iat': now, 'exp': now + 300,
+        }
+        payload.update(claims)
+        return google_jwt.encode(signer or self.signer, payload)
+
+    def test_verifies_locally_with_cached_certs(self):
+        for _ in range(3):
+            self.assertEqual(self.verifier.verify(self.make_token())['email'], 'google@example.com')
+        self.assertEqual(self.source.fetch.call_count, 1)
+
+    def test_rejects_bad_tokens(self):
+        other_private, _ = _rsa_key_pair()
+        forged = crypt.RSASigner.from_string(other_private, key_id='key-1')
+        with self.assertRaises(ValueError):
+            self.verifier.verify(self.make_token(signer=forged))
+        with self.assertRaises(ValueError):
+            self.verifier.verify(self.make_token(aud='someone-else'))
+        with self.assertRaises(ValueError):
+            self.verifier.verify(self.make_token(iss='https://evil.example.com'))
+
+    @patch('users.google_auth._verifier', None)
+    def test_default_verifier_checks_the_oauth_client_id(self):
+        client_id = settings.SOCIALACCOUNT_PROVIDERS['google']['APP']['client_id']
+        self.assertTrue(client_id)
+        self.assertEqual(get_google_verifier().audience, client_id)
+
+    def test_unknown_key_id_refetches_once(self):
+        self.verifier.verify(self.make_token())
+        private_pem, public_pem = _rsa_key_pair()
+        self.source.certs = {'key-2': public_pem}
+
+        rotated = crypt.RSASigner.from_string(private_pem, key_id='key-2')
+        self.assertEqual(self.verifier.verify(self.make_token(signer=rotated))['email'], 'google@example.com')
+        self.assertEqual(self.source.fetch.call_count, 2)
+
+    def test_parse_max_age(self):
+        self.assertEqual(parse_max_age('public, max-age=19845, must-revalidate'), 19845)
+        self.assertEqual(parse_max_age(None), DEFAULT_MAX_AGE)
+
+
+def png_bytes(size=(800, 600), mode='RGBA'):
+    buffer = io.BytesIO()
+    PILImage.new(mode, size, (200, 30, 30, 255)[:len(mode)]).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ProfilePictureIngestionTestCase(TestCase):
+    """Background avatar ingestion through the task queue"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_user(
+            username='avatar', email='avatar@example.com',
+            password='testpass123', user_type='client',
+        )
+
+    def mock_response(self, mock_get, body=None, content_type='image/png', status_code=200):
+        body = png_bytes() if body is None else body
+        response = mock_get.return_value.__enter__.return_value
+        response.status_code = status_code
+        response.headers = {'Content-Type': content_type, 'Content-Length': str(len(body))}
+        response.iter_content.return_value = [body]
+        if status_code >= 500:
+            response.raise_for_status.side_effect = RuntimeError('server error')
+
+    @patch('users.avatars.requests.get')
+    def test_ingests_once_per_user(self, mock_get):
+        self.mock_response(mock_get)
+        queue_profile_picture(self.user, 'https://example.com/a.png')
+        queue_profile_picture(self.user, 'https://example.com/a.png')
+        self.assertEqual(BackgroundTask.objects.count(), 1)
+
+        with self.settings(MEDIA_ROOT=self.media_root):
+            self.assertEqual(run_pending_tasks(), 2)  # the picture, then its thumbnails
+        self.user.refresh_from_db()
+        self.assertRegex(self.user.profile_picture.name, r'^profiles/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(self.user.profile_picture_renditions['source'], self.user.profile_picture.name)
+        self.assertEqual(set(BackgroundTask.objects.values_list('status', flat=True)), {'succeeded'})
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], FETCH_TIMEOUT)
+
+    @patch('users.avatars.requests.get')
+    def test_oversized_image_is_not_retried(self, mock_get):
+        self.mock_response(mock_get, body=b'x' * 20)
+        queue_profile_picture(self.user, 'https://example.com/big.png')
+        with self.settings(PROFILE_PICTURE_MAX_BYTES=10):
+            run_pending_tasks()
+        background_task = BackgroundTask.objects.get()
+        self.assertEqual((background_task.status, background_task.attempts), ('failed', 1))
+
+    @patch('users.avatars.requests.get')
+    def test_server_errors_are_retried_with_backoff(self, mock_get):
+        self.mock_response(mock_get, status_code=503)
+        queue_profile_picture(self.user, 'https://example.com/a.png')
+        run_pending_tasks()
+
+        background_task = BackgroundTask.objects.get()
+        self.assertEqual((background_task.status, background_task.attempts), ('pending', 1))
+        self.assertGreater(background_task.run_after, timezone.now())
+        self.assertEqual(run_pending_tasks(), 0)  # not due yet
+
+
+class BackgroundTaskQueueTestCase(TestCase):
+    """Dedupe keys on the background task queue"""
+
+    def setUp(self):
+        self.payloads = []
+
+        @task('users.test_requeue')
+        def requeue(payload):
+            # The first run is interrupted by new work for the same key
+            self.payloads.append(payload)
+            if len(self.payloads) == 1:
+                enqueue('users.test_requeue', {'run': 2}, dedupe_key='requeue')
+
+    def test_work_queued_while_running_is_kept(self):
+        enqueue('users.test_requeue', {'run': 1}, dedupe_key='requeue')
+        self.assertEqual(run_pending_tasks(), 2)
+        self.assertEqual(self.payloads, [{'run': 1}, {'run': 2}])
+
+    def test_requeue_brings_run_time_forward(self):
+        enqueue('users.test_requeue', dedupe_key='later', delay=600)
+        enqueue('users.test_requeue', dedupe_key='later')
+        background_task = BackgroundTask.objects.get()
+        self.assertLessEqual(background_task.run_after, timezone.now())
+
+    def test_next_run_delay(self):
+        self.assertIsNone(next_run_delay())
+        enqueue('users.test_requeue', dedupe_key='later', delay=600)
+        self.assertAlmostEqual(next_run_delay(), 600, delta=5)
+
+    @patch('users.tasks.connection')
+    @patch('users.tasks.close_old_connections')
+    @patch('users.tasks.next_run_delay', side_effect=[0.01, None])
+    @patch('users.tasks.run_pending_tasks')
+    def test_in_process_worker_waits_for_delayed_tasks(self, mock_run, mock_delay, *mocks):
+        # A retry due shortly keeps the worker alive; it exits once nothing is queued
+        _in_process_worker()
+        self.assertEqual(mock_run.call_count, 2)
+
+
+class ThumbnailPipelineTestCase(APITestCase):
+    """Thumbnail renditions for profile and portfolio images"""
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = self.settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = User.objects.create_user(
+            username='pictured', email='pictured@example.com',
+            password='testpass123', user_type='freelancer',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_profile_picture_renditions(self):
+        self.user.profile_picture.save('me.png', ContentFile(png_bytes()), save=True)
+        self.assertEqual(BackgroundTask.objects.filter(name=RENDER_THUMBNAILS).count(), 1)
+        run_pending_tasks()
+
+        self.user.refresh_from_db()
+        renditions = self.user.profile_picture_renditions
+        self.assertEqual(set(renditions['sizes']), {'64', '128', '512'})
+        self.assertEqual(set(renditions['sizes']['64']), set(available_formats()))
+        with self.user.profile_picture.storage.open(renditions['sizes']['128']['jpeg']) as thumb:
+            self.assertEqual(PILImage.open(thumb).size, (128, 128))  # square crop
+
+        response = self.client.get(reverse('user_list'), {'fields': 'id,profile_picture_thumbnails'})
+        row = next(row for row in response.data['results'] if row['id'] == self.user.id)
+        self.assertTrue(row['profile_picture_thumbnails']['64']['jpeg'].startswith('http://testserver/media/profiles/thumbs/'))
+
+        # URLs come from the image field's storage, not default_storage
+        storage = User._meta.get_field('profile_picture').storage
+        with patch.object(storage, 'base_url', 'https://cdn.example.com/media/'):
+            response = self.client.get(reverse('user_list'), {'fields': 'id,profile_picture_thumbnails'})
+        row = next(row for row in response.data['results'] if row['id'] == self.user.id)
+        self.assertTrue(row['profile_picture_thumbnails']['64']['jpeg'].startswith('https://cdn.example.com/media/'))
+
+    def test_portfolio_image_keeps_aspect_ratio(self):
+        item = UserPortfolio.objects.create(
+            user=self.user, title='Shot', description='d',
+            image=ContentFile(png_bytes(mode='RGB'), name='shot.png'),
+        )
+        run_pending_tasks()
+        item.refresh_from_db()
+        with item.image.storage.open(item.image_renditions['sizes']['512']['webp']) as thumb:
+            self.assertEqual(PILImage.open(thumb).size, (512, 384))
+
+        response = self.client.get(reverse('current_user_profile'))
+        self.assertIn('512', response.data['portfolio'][0]['image_thumbnails'])
+        self.assertNotIn('image_renditions', response.data['portfolio'][0])
+
+
+class ContentAddressedMediaTestCase(TestCase):
+    """De-duplicated media files, reference counts and garbage collection"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = self.settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.storage = media_storage()
+
+        self.alice, self.bob = [
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com',
+                password='testpass123', user_type='client',
+            )
+            for name in ('alice', 'bob')
+        ]
+
+    def upload(self, user, content, filename='avatar.png'):
+        user.profile_picture.save(filename, ContentFile(content), save=True)
+        return user.profile_picture.name
+
+    def test_identical_uploads_share_one_file(self):
+        shared = self.upload(self.alice, b'same bytes', 'a.png')
+        self.assertEqual(self.upload(self.bob, b'same bytes', 'b.png'), shared)
+        self.assertEqual(StoredFile.objects.get(name=shared).ref_count, 2)
+
+        replacement = self.upload(self.alice, b'other bytes')
+        self.bob.delete()
+        self.assertEqual(StoredFile.objects.get(name=shared).ref_count, 0)
+
+        deleted, repaired = collect_garbage(self.storage, grace=timedelta(0))
+        self.assertEqual((deleted, repaired), (1, 0))
+        self.assertFalse(self.storage.exists(shared))
+        self.assertTrue(self.storage.exists(replacement))
+        self.assertFalse(StoredFile.objects.filter(name=shared).exists())
+
+    def test_drifted_count_never_deletes_referenced_file(self):
+        name = self.upload(self.alice, b'keep me')
+        StoredFile.objects.filter(name=name).update(ref_count=0, released_at=timezone.now())
+
+        self.assertEqual(collect_garbage(self.storage, grace=timedelta(0)), (0, 1))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).ref_count, 1)
+
+    def test_reloaded_instance_releases_replaced_file(self):
+        first = self.upload(self.alice, b'first')
+        alice = User.objects.get(pk=self.alice.pk)
+        self.upload(alice, b'second')
+        self.assertEqual(StoredFile.objects.get(name=first).ref_count, 0)
+
+    def test_rendition_references_are_found(self):
+        thumbnail = 'profiles/thumbs/ab12_64.jpg'
+        User.objects.filter(pk=self.alice.pk).update(profile_picture_renditions={
+            'source': 'profiles/ab12.png', 'sizes': {'64': {'jpeg': thumbnail}},
+        })
+        counts = count_references([thumbnail, 'profiles/thumbs/unused_64.jpg'])
+        self.assertEqual(dict(counts), {thumbnail: 1})
+
+    def test_sweep_removes_untracked_orphans(self):
+        kept = 'profiles/10.jpg'
+        orphan = 'profiles/10_WvpJr4e.jpg'
+        for name in (kept, orphan):
+            FileSystemStorage().save(name, ContentFile(b'legacy ' + name.encode()))
+        User.objects.filter(pk=self.alice.pk).update(profile_picture=kept)
+
+        recount_references()
+        self.assertEqual(StoredFile.objects.get(name=kept).ref_count, 1)
+        self.assertEqual(sweep_untracked(self.storage, upload_directories(), grace=timedelta(0)), 1)
+        self.assertTrue(self.storage.exists(kept))
+        self.assertFalse(self.storage.exists(orphan))
+
+
+class ContentAddressedRaceTestCase(TransactionTestCase):
+    """An identical upload racing a garbage collection"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = self.settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def test_upload_during_collection_rewrites_the_file(self):
+        storage = media_storage()
+        name = storage.save('profiles/a.png', ContentFile(b'same bytes'))
+        StoredFile.objects.filter(name=name).update(released_at=timezone.now() - timedelta(days=2))
+
+        unlinked, resume = threading.Event(), threading.Event()
+        gc_storage = media_storage()
+
+        def delete(file_name):
+            storage.delete(file_name)
+            unlinked.set()
+            resume.wait(5)  # keep the row locked with the file already gone
+
+        gc_storage.delete = delete
+
+        def collect():
+            try:
+                collect_garbage(gc_storage)
+            finally:
+                connection.close()
+
+        def upload():
+            try:
+                media_storage().save('profiles/b.png', ContentFile(b'same bytes'))
+            finally:
+                connection.close()
+
+        collector = threading.Thread(target=collect)
+        collector.start()
+        self.assertTrue(unlinked.wait(5))
+        uploader = threading.Thread(target=upload)
+        uploader.start()
+        time.sleep(0.2)  # let the upload block on the row lock
+        resume.set()
+        collector.join(5)
+        uploader.join(5)
+
+        self.assertTrue(storage.exists(name))
+        self.assertTrue(StoredFile.objects.filter(name=name).exists())
+
+
+class EmailOutboxTestCase(APITestCase):
+    """Verification emails go through the outbox and the locmem backend"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='unverified', email='unverified@example.com',
+            password='testpass123', user_type='client',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_verification_email_is_queued_then_delivered(self):
+        response = self.client.post(reverse('send_email_verification'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.to_email, email.status), ('unverified@example.com', 'pending'))
+
+        run_pending_tasks()
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+        self.assertEqual(len(mail.outbox), 1)
+        self.user.refresh_from_db()
+        self.assertIn(self.user.email_verification_token, mail.outbox[0].body)
+
+    def test_batch_reuses_one_connection(self):
+        for i in range(3):
+            queue_email(f'user{i}@example.com', 'Hello', 'Body')
+        with patch('users.emails.get_connection', wraps=get_connection) as mock_connection:
+            self.assertEqual(deliver_outbox(batch_size=2), (3, 0))
+        self.assertEqual(mock_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failures_are_retried_with_backoff(self):
+        email = queue_email('flaky@example.com', 'Hello', 'Body')
+        with patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                   side_effect=smtplib.SMTPException('try later')):
+            self.assertEqual(deliver_outbox(), (0, 0))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertIn('try later', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(deliver_outbox(), (0, 0))  # not due yet
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_outbox(), (1, 0))
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                               'login_ip': '5/m', 'login_email': '3/m'},
+})
+class LoginThrottleTestCase(APITestCase):
+    """Sliding-window throttles reject abusive logins before any password check"""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(
+            username='target', email='target@example.com',
+            password='testpass123', user_type='client',
+        )
+        # Pin the clock to the start of a window so the limits are exact
+        clock = patch('users.throttling.time.time', return_value=60 * 5000.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def login(self, email='target@example.com', ip='10.0.0.1'):
+        return self.client.post(
+            reverse('login'), {'email': email, 'password': 'wrong'}, REMOTE_ADDR=ip
+        )
+
+    def test_per_email_limit_applies_across_ips(self):
+        for i in range(3):
+            self.assertEqual(self.login(ip=f'10.0.0.{i}').status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.assertNumQueries(0):
+            response = self.login(email=' Target@Example.com', ip='10.0.0.99')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_per_ip_limit(self):
+        for i in range(5):
+            self.assertEqual(self.login(email=f'user{i}@example.com').status_code,
+                             status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login(email='other@example.com').status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(email='other@example.com', ip='10.0.0.2').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_spoofed_forwarded_for_does_not_reset_ip_limit(self):
+        for i in range(5):
+            self.client.post(
+                reverse('login'), {'email': f'user{i}@example.com', 'password': 'wrong'},
+                REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}',
+            )
+        response = self.client.post(
+            reverse('login'), {'email': 'other@example.com', 'password': 'wrong'},
+            REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.99',
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_sliding_window_weights_previous_window(self):
+        throttle = LoginIPThrottle()
+        with patch('users.throttling.time.time', return_value=60 * 1000 + 30):
+            cache.set(f'throttle:login_ip:1.2.3.4:{999}', 6, 120)  # previous window, half overlapping
+            request = APIRequestFactory().post('/', REMOTE_ADDR='1.2.3.4')
+            self.assertTrue(throttle.allow_request(request, None))   # 6 * 0.5 + 0 = 3
+            self.assertTrue(throttle.allow_request(request, None))   # 3 + 1 = 4
+            self.assertFalse(throttle.allow_request(request, None))  # 3 + 2 = 5
+
+        with patch('users.throttling.time.time', return_value=60 * 2000 + 15):
+            cache.set(f'throttle:login_ip:1.2.3.4:{1999}', 8, 120)
+            self.assertFalse(throttle.allow_request(request, None))  # 8 * 0.75 = 6
+            self.assertEqual(throttle.wait(), 8)  # until 8 * overlap drops to 5
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('5/min'), (5, 60))
+        self.assertEqual(parse_rate('3/10m'), (3, 600))
+        self.assertEqual(parse_rate('100/day'), (100, 86400))
+
+
+class LoginLockoutTestCase(APITestCase):
+    """Failed-login accounting in the cache instead of the users row"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='locked', email='locked@example.com',
+            password='testpass123', user_type='client',
+        )
+
+    def login(self, password):
+        return self.client.post(reverse('login'), {'email': self.user.email, 'password': password})
+
+    def test_failures_lock_account_without_row_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(MAX_FAILED_LOGINS - 1):
+                self.assertEqual(self.login('wrong').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+
+        self.login('wrong')  # the lock itself is persisted
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.login_attempts, 0)
+        self.assertGreater(self.user.account_locked_until, timezone.now())
+
+        response = self.login('testpass123')
+        self.assertIn('temporarily locked', str(response.data))
+
+        # The lock expires with its TTL / timestamp
+        cache.clear()
+        User.objects.filter(pk=self.user.pk).update(account_locked_until=timezone.now())
+        self.assertEqual(self.login('testpass123').status_code, status.HTTP_200_OK)
+
+    def test_success_clears_failures(self):
+        self.login('wrong')
+        self.login('wrong')
+        self.assertEqual(self.login('testpass123').status_code, status.HTTP_200_OK)
+        self.assertEqual(get_lockout_state(self.user)['failures'], 0)
+
+    def test_cache_outage_falls_back_to_atomic_row_update(self):
+        with patch('users.lockout.incr_counter', side_effect=ConnectionError('cache down')):
+            for _ in range(MAX_FAILED_LOGINS):
+                self.login('wrong')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.login_attempts, MAX_FAILED_LOGINS)
+        self.assertTrue(self.user.is_account_locked)
+
+    def test_fallback_reports_the_failure_that_locks(self):
+        with patch('users.lockout.incr_counter', side_effect=ConnectionError('cache down')):
+            results = [record_login_failure(self.user) for _ in range(MAX_FAILED_LOGINS)]
+        self.assertEqual(results, [False] * (MAX_FAILED_LOGINS - 1) + [True])
+
+
+class ActivityTrackingTestCase(APITestCase):
+    """Buffered last_activity / last_login_ip writes"""
+
+    def setUp(self):
+        cache.clear()
+        activity_tracker.clear()
+        self.password = 'testpass123'
+        self.users = [
+            User.objects.create_user(
+                username=f'active{i}', email=f'active{i}@example.com',
+                password=self.password, user_type='client',
+            )
+            for i in range(3)
+        ]
+        self.addCleanup(activity_tracker.clear)
+
+    def test_flush_is_one_bulk_update(self):
+        activity_tracker.record(self.users[0].pk)
+        activity_tracker.record(self.users[1].pk, ip='203.0.113.7')
+        activity_tracker.record(self.users[1].pk)  # keeps the known IP
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_activity(), 2)
+        self.assertEqual(activity_tracker.pending(), {})
+
+        first, second, third = User.objects.filter(pk__in=[u.pk for u in self.users]).order_by('pk')
+        self.assertGreater(first.last_activity, self.users[0].last_activity)
+        self.assertEqual(second.last_login_ip, '203.0.113.7')
+        self.assertEqual(third.last_activity, self.users[2].last_activity)
+
+    def test_flush_never_moves_activity_backwards(self):
+        later = timezone.now() + timedelta(hours=1)
+        User.objects.filter(pk=self.users[0].pk).update(last_activity=later)
+        activity_tracker.record(self.users[0].pk)
+        flush_activity()
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].last_activity, later)
+
+    def test_authenticated_requests_are_buffered(self):
+        user = self.users[0]
+        access = str(UserRefreshToken.for_user(user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('user')).status_code, status.HTTP_200_OK)
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(list(activity_tracker.pending()), [user.pk])
+
+    def test_login_ip_is_written_on_flush(self):
+        user = self.users[0]
+        response = self.client.post(
+            reverse('login'), {'email': user.email, 'password': self.password},
+            REMOTE_ADDR='198.51.100.4',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertIsNone(user.last_login_ip)
+
+        flush_activity()
+        user.refresh_from_db()
+        self.assertEqual(user.last_login_ip, '198.51.100.4')
+
+
+class SearchVectorTestCase(TestCase):
+    """User.search_vector is only recomputed when a searchable field changes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='searchable', email='searchable@example.com',
+            password='testpass123', user_type='freelancer', title='Backend developer',
+        )
+
+    def test_vector_built_on_create(self):
+        self.assertTrue(User.objects.filter(pk=self.user.pk, search_vector='backend').exists())
+
+    def test_unrelated_save_skips_vector_update(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.city = 'Lisbon'
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_searchable_change_updates_vector(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.skills.append('Kubernetes')
+        user.save()
+        self.assertTrue(User.objects.filter(pk=user.pk, search_vector='kubernetes').exists())
+
+
+class SkillFacetTestCase(APITestCase):
+    """Skill facet counts for the public skill filter"""
+
+    def setUp(self):
+        for i, skills in enumerate([['Python', 'Django'], ['Python']]):
+            User.objects.create_user(
+                username=f'dev{i}', email=f'dev{i}@example.com',
+                password='testpass123', user_type='freelancer', skills=skills,
+            )
+
+    def test_counts_most_common_first(self):
+        response = self.client.get(reverse('user_skill_facets'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = [(skill['slug'], skill['count']) for skill in response.data['skills']]
+        self.assertEqual(counts, [('python', 2), ('django', 1)])
+
+    def test_out_of_range_limits_are_clamped(self):
+        for limit, expected in [('-1', 1), ('0', 1), ('x', 2)]:
+            response = self.client.get(reverse('user_skill_facets'), {'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['skills']), expected)
+
+
+class SkillTaxonomyTestCase(APITestCase):
+    """Skill canonicalization, skill filters and re-canonicalization on taxonomy changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.users = {
+            name: User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='testpass123',
+                user_type='freelancer', skills=skills,
+            )
+            for name, skills in [
+                ('react', ['React.js', 'py']), ('python', ['Python 3', 'Python']),
+                ('tailwind', ['Tailwind CSS']),
+            ]
+        }
+
+    def test_canonicalization(self):
+        self.assertEqual(
+            canonicalize_skills(['React JS', 'reactjs', 'Golang', '', '!!', 'Rust']), ['react', 'go', 'rust']
+        )
+        self.assertEqual(canonicalize_skills('Python'), [])
+        self.assertEqual(self.users['react'].skill_slugs, ['react', 'python'])
+        self.assertEqual(self.users['python'].skill_slugs, ['python'])  # python3 is an alias
+
+    def test_skills_match(self):
+        def usernames(**params):
+            response = self.client.get(reverse('user_list'), params)
+            return sorted(user['username'] for user in response.data['results'])
+
+        self.assertEqual(usernames(skills='reactjs, Python'), ['python', 'react'])
+        self.assertEqual(usernames(skills='reactjs,python', skills_match='all'), ['react'])
+        self.assertEqual(usernames(skills='Vue'), [])
+
+    def test_migration_backfill(self):
+        User.objects.update(skill_slugs=[])
+        migration = importlib.import_module('users.migrations.0005_skill_taxonomy')
+        migration.seed_and_backfill(django_apps, None)
+        self.assertEqual(User.objects.get(username='react').skill_slugs, ['react', 'python'])
+
+    def test_taxonomy_change_recanonicalizes_stored_slugs(self):
+        job = Job.objects.create(
+            client=self.users['python'], title='Landing page', description='-',
+            skills=['tailwindcss'], budget_min=1, budget_max=2,
+        )
+        skill = Skill.objects.create(name='Tailwind')
+        SkillAlias.objects.create(skill=skill, alias='Tailwind CSS')
+        self.assertEqual(BackgroundTask.objects.filter(status='pending').count(), 1)  # edits share a run
+
+        run_pending_tasks()
+        self.assertEqual(User.objects.get(username='tailwind').skill_slugs, ['tailwind'])
+        self.assertEqual(Job.objects.get(pk=job.pk).skill_slugs, ['tailwind'])
+        self.assertTrue(filter_by_skills(User.objects.all(), ['Tailwind']).exists())
+
+        User.objects.filter(username='react').update(skill_slugs=['reactjs'])
+        out = io.StringIO()
+        call_command('recanonicalize_skills', stdout=out)
+        self.assertIn('1 rows', out.getvalue())
+        self.assertEqual(User.objects.get(username='react').skill_slugs, ['react', 'python'])
+
+
+class PlatformStatsTestCase(APITestCase):
+    """Snapshot-backed admin stats and the incremental daily signup rows"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            user_type='client', country='PT', is_verified=True,
+        )
+        self.admin.groups.add(Group.objects.create(name='Admin'))
+        for i, (user_type, country, days_ago) in enumerate([
+            ('freelancer', 'PT', 0), ('freelancer', 'BR', 1), ('client', 'PT', 3),
+        ]):
+            user = User.objects.create_user(
+                username=f'user{i}', email=f'user{i}@example.com', password='testpass123',
+                user_type=user_type, country=country, is_premium=i == 0,
+            )
+            User.objects.filter(pk=user.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        self.client.force_authenticate(user=self.admin)
+
+    def test_platform_totals(self):
+        totals = compute_platform_totals()
+        self.assertEqual(
+            {field: totals[field] for field in TOTAL_FIELDS},
+            {'total_users': 4, 'total_freelancers': 2, 'total_clients': 2,
+             'verified_users': 1, 'premium_users': 1},
+        )
+        self.assertEqual(totals['users_by_country'][0], {'country': 'PT', 'count': 3})
+
+    def test_snapshot_freshness(self):
+        snapshot = create_snapshot()
+        self.assertEqual(get_latest_snapshot(60), snapshot)
+        User.objects.create_user(username='late', email='late@example.com', password='testpass123')
+
+        response = self.client.get(reverse('admin_user_stats'))
+        self.assertEqual(response.data['total_users'], 4)  # served from the snapshot
+        self.assertEqual(response.data['generated_at'], snapshot.created_at)
+        self.assertEqual(self.client.get(reverse('admin_user_stats'), {'live': 'true'}).data['total_users'], 5)
+
+        PlatformStatsSnapshot.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertIsNone(get_latest_snapshot(60))
+        with override_settings(USER_STATS_SNAPSHOT_MAX_AGE=60):
+            self.assertEqual(self.client.get(reverse('admin_user_stats')).data['total_users'], 5)
+
+    def test_daily_signup_rows(self):
+        self.assertEqual(refresh_daily_signup_stats(), 3)
+        today = DailySignupStats.objects.get(date=timezone.now().date())
+        self.assertEqual((today.signups, today.freelancer_signups, today.verified_signups), (2, 1, 1))
+
+        # A later verification inside the window is picked up on the next refresh
+        User.objects.filter(username='user1').update(is_verified=True)
+        refresh_daily_signup_stats(window=2)
+        yesterday = DailySignupStats.objects.get(date=timezone.now().date() - timedelta(days=1))
+        self.assertEqual(yesterday.verified_signups, 1)
+
+        trends = self.client.get(reverse('admin_user_stats'), {'days': 2}).data['daily_trends']
+        self.assertEqual([row['signups'] for row in trends], [1, 2])
+        for days in ('-5', '0'):
+            trends = self.client.get(reverse('admin_user_stats'), {'days': days}).data['daily_trends']
+            self.assertEqual([row['signups'] for row in trends], [2])
+
+
+class AdminUsersTestCase(APITestCase):
+    """Admin console user list"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123', user_type='client',
+        )
+        self.admin.groups.add(Group.objects.create(name='Admin'))
+        self.client.force_authenticate(user=self.admin)
+
+    def create_users(self, count, start=0):
+        groups = [Group.objects.get_or_create(name=name)[0] for name in ('Client', 'Freelancer')]
+        for i in range(start, start + count):
+            user = User.objects.create_user(
+                username=f'member{i}', email=f'member{i}@example.com', password='testpass123',
+                first_name='Member', last_name=f'Number{i}',
+            )
+            user.groups.add(*groups)
+
+    def test_groups_are_prefetched(self):
+        self.create_users(3)
+        self.client.get(reverse('admin_all_users'))  # warm the authorization cache
+
+        # Count and page, then one groups query for the whole page
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('admin_all_users'))
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual(sorted(response.data['results'][0]['groups']), ['Client', 'Freelancer'])
+
+        self.create_users(6, start=3)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('admin_all_users'))
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_fuzzy_search_ranks_by_similarity(self):
+        self.create_users(1)
+        for username, email, first_name, last_name in [
+            ('jsmith', 'john.smith@example.com', 'John', 'Smith'),
+            ('jsmithers', 'jane@example.com', 'Jane', 'Smithers'),
+        ]:
+            User.objects.create_user(
+                username=username, email=email, password='testpass123',
+                first_name=first_name, last_name=last_name,
+            )
+
+        def usernames(**params):
+            response = self.client.get(reverse('admin_all_users'), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [user['username'] for user in response.data['results']]
+
+        # A misspelling the substring search cannot match
+        self.assertEqual(usernames(search='Smiith'), [])
+        self.assertEqual(usernames(search='Smiith', mode='fuzzy'), ['jsmith'])
+
+        # Closest match first
+        self.assertEqual(usernames(search='Smithe', mode='fuzzy'), ['jsmithers', 'jsmith'])
+        similarities = list(
+            fuzzy_user_search(User.objects.all(), 'Smithe').values_list('similarity', flat=True)
+        )
+        self.assertEqual(len(similarities), 2)
+        self.assertGreater(similarities[0], similarities[1])
+
+
+class KeysetPaginationTestCase(APITestCase):
+    """Cursor pages walk the same order as the queryset, both ways"""
+
+    def setUp(self):
+        cache.clear()
+        # Ties on the sort keys and NULL rates, so the id tie-breaker and the
+        # NULLS FIRST/LAST handling both matter
+        for i, (rating, rate, title) in enumerate([
+            ('4.50', '40', 'Django developer'), ('4.50', None, 'Python developer'),
+            ('3.00', '40', 'Django and Python'), ('5.00', None, 'Designer'),
+            ('3.00', '90', 'Django Django Django'), ('4.50', '15', 'Writer'),
+            ('0.00', None, 'Django consultant'),
+        ]):
+            User.objects.create_user(
+                username=f'user{i}', email=f'user{i}@example.com', password='testpass123',
+                user_type='freelancer', average_rating=rating,
+                hourly_rate=rate, title=title,
+            )
+
+    def walk(self, url, params, page_size=2):
+        """Ids page by page along `next`, then back along `previous`"""
+        response = self.client.get(url, {**params, 'pagination': 'cursor', 'page_size': page_size})
+        forward = [[row['id'] for row in response.data['results']]]
+        self.assertIsNone(response.data['previous'])
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            forward.append([row['id'] for row in response.data['results']])
+        backward = [forward[-1]]
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            backward.append([row['id'] for row in response.data['results']])
+        self.assertEqual(backward, forward[::-1])
+        return [user_id for page in forward for user_id in page]
+
+    def test_orderings_round_trip(self):
+        users = User.objects.filter(is_active=True)
+        for ordering, expected in [
+            ('-average_rating', users.order_by('-average_rating', 'id')),
+            ('created_at', users.order_by('created_at', 'id')),
+            # Postgres defaults: NULLS LAST ascending, NULLS FIRST descending
+            ('hourly_rate', users.order_by(F('hourly_rate').asc(nulls_last=True), 'id')),
+            ('-hourly_rate', users.order_by(F('hourly_rate').desc(nulls_first=True), 'id')),
+        ]:
+            with self.subTest(ordering=ordering):
+                ids = self.walk(reverse('user_list'), {'ordering': ordering})
+                self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+
+    def test_search_rank_ordering(self):
+        ids = self.walk(reverse('user_list'), {'search': 'django'}, page_size=1)
+        query = SearchQuery('django', config=SEARCH_CONFIG)
+        expected = User.objects.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-average_rating', 'id')
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+        self.assertEqual(len(ids), 4)
+
+    def test_similarity_ordering(self):
+        admin = User.objects.get(username='user0')
+        admin.groups.add(Group.objects.create(name='Admin'))
+        self.client.force_authenticate(user=admin)
+        ids = self.walk(reverse('admin_all_users'), {'search': 'user1', 'mode': 'fuzzy'}, page_size=1)
+        expected = fuzzy_user_search(User.objects.all(), 'user1').values_list('id', flat=True)
+        self.assertEqual(ids, list(expected))
+        self.assertGreater(len(ids), 1)
+
+    def test_tampered_cursors_are_rejected(self):
+        first = self.client.get(reverse('user_list'), {'pagination': 'cursor', 'page_size': 2})
+        cursor = parse_qs(urlparse(first.data['next']).query)['cursor'][0]
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+
+        for token in [
+            'not-a-cursor',
+            cursor[:-4],
+            # A cursor for another ordering
+            base64.urlsafe_b64encode(json.dumps({**payload, 'o': ['hourly_rate', 'id']}).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({**payload, 'p': payload['p'][:1]}).encode()).decode(),
+        ]:
+            with self.subTest(token=token):
+                response = self.client.get(reverse('user_list'), {'cursor': token})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_seeks_the_keyset_index(self):
+        first = self.client.get(reverse('user_list'), {'ordering': 'hourly_rate', 'page_size': 2,
+                                                       'pagination': 'cursor'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+        page_query = next(query['sql'] for query in queries if 'LIMIT' in query['sql'])
+        with connection.cursor() as cursor:
+            # A handful of rows would otherwise be read whole and sorted
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+            cursor.execute(f'EXPLAIN {page_query}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('users_rate_keyset', plan)
+        self.assertNotIn('Sort', plan)
@@ -0,0 +1,164 @@
+# users/throttling.py
+"""
+Cache-backed sliding-window rate limiting as DRF throttles.
+
+Each identity (IP, email, user) gets one counter per fixed window; the
+request rate is estimated as the current window's count plus the previous
+window's count weighted by how much of it still overlaps the sliding window.
+Counters are bumped with atomic cache increments, so the cost per request is
+two cache reads and one increment, and nothing touches the database.
+"""
+import hashlib
+import math
+import re
+import time
+
+from django.core.cache import cache as default_cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+_RATE = re.compile(r'^(\d+)/(\d*)([smhd])\w*$')
+_PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def incr_counter(key, timeout, cache=default_cache):
+    """Atomically increment a cache counter, creating it with `timeout`; returns the new value"""
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:  # expired between add() and incr()
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60); '3/10m' -> (3, 600); None -> (None, None)"""
+    if rate is None:
+        return None, None
+    match = _RATE.match(rate.replace(' ', ''))
+    if not match:
+        raise ImproperlyConfigured(f"Invalid throttle rate {rate!r}")
+    num_requests, multiplier, unit = match.groups()
+    return int(num_requests), int(multiplier or 1) * _PERIODS[unit]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Base class: set `scope` (rate read from DEFAULT_THROTTLE_RATES) and
+    implement get_identity(). Requests without an identity are not limited.
+    """
+    cache = default_cache
+    scope = None
+    key_prefix = 'throttle'
+
+    def __init__(self):
+        self.num_requests, self.duration = parse_rate(self.get_rate())
+        self.wait_seconds = None
+
+    def get_rate(self):
+        if not self.scope:
+            raise ImproperlyConfigured(f"{type(self).__name__} must set a scope")
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def get_identity(self, request, view):
+        raise NotImplementedError('.get_identity() must be overridden')
+
+    def allow_request(self, request, view):
+        if self.num_requests is None:
+            return True
+        identity = self.get_identity(request, view)
+        if not identity:
+            return True
+
+        now = time.time()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        current_key = f'{self.key_prefix}:{self.scope}:{identity}:{window}'
+        previous_key = f'{self.key_prefix}:{self.scope}:{identity}:{window - 1}'
+
+        counts = self.cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+        overlap = 1 - elapsed / self.duration
+        if previous * overlap + current >= self.num_requests:
+            self.wait_seconds = self._wait(current, previous, elapsed)
+            return False
+
+        # Counters outlive their window by one more, for the weighted estimate
+        incr_counter(current_key, 2 * self.duration, cache=self.cache)
+        return True
+
+    def _wait(self, current, previous, elapsed):
+        limit = self.num_requests
+        if current >= limit:
+            # Blocked until the next window, then until this window's weight decays
+            return (self.duration - elapsed) + self.duration * max(0, 1 - limit / current)
+        return max(0, self.duration * (1 - (limit - current) / previous) - elapsed)
+
+    def wait(self):
+        return math.ceil(self.wait_seconds) if self.wait_seconds is not None else None
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    def get_identity(self, request, view):
+        return self.get_ident(request)
+
+
+class EmailRateThrottle(SlidingWindowThrottle):
+    """Limits by the email address in the request body, whatever the client IP"""
+    email_field = 'email'
+
+    def get_identity(self, request, view):
+        try:
+            email = request.data.get(self.email_field)
+        except AttributeError:
+            return None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Hashed: keeps addresses out of cache keys and key-safe for any backend
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+
+class UserRateThrottle(SlidingWindowThrottle):
+    def get_identity(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return str(request.user.pk)
+        return None
+
+
+class LoginIPThrottle(IPRateThrottle):
+    scope = 'login_ip'
+
+
+class LoginEmailThrottle(EmailRateThrottle):
+    scope = 'login_email'
+
+
+class RegisterIPThrottle(IPRateThrottle):
+    scope = 'register_ip'
+
+
+class RegisterEmailThrottle(EmailRateThrottle):
+    scope = 'register_email'
+
+
+class GoogleLoginIPThrottle(IPRateThrottle):
+    scope = 'google_login_ip'
+
+
+class EmailVerificationUserThrottle(UserRateThrottle):
+    scope = 'email_verification_user'
+
+
+class EmailVerificationIPThrottle(IPRateThrottle):
+    scope = 'email_verification_ip'
+
+
+class VerifyEmailCodeUserThrottle(UserRateThrottle):
+    """Six-digit codes must not be guessable by brute force"""
+    scope = 'verify_email_user'
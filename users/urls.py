@@ -30,6 +30,7 @@ urlpatterns = [
 
     # User Search and Listing
     path('users/', views.UserListView.as_view(), name='user_list'),
+    path('users/skills/', views.SkillFacetView.as_view(), name='user_skill_facets'),
     path('users/<int:user_id>/portfolio/', views.UserPublicPortfolioView.as_view(), name='user_public_portfolio'),
 
     # Include ViewSet URLs
@@ -40,6 +41,7 @@ urlpatterns = [
     path('admin/users/assign-group/', views.AssignUserGroupView.as_view(), name='admin_assign_group'),
     path('admin/users/<int:user_id>/toggle-status/', views.ToggleUserStatusView.as_view(), name='admin_toggle_user_status'),
     path('admin/stats/', views.UserStatsView.as_view(), name='admin_user_stats'),
+    path('admin/stats/profile-cache/', views.ProfileCacheStatsView.as_view(), name='admin_profile_cache_stats'),
 
     path('verify-email/send/', views.SendEmailVerificationView.as_view(), name='send_email_verification'),
     path('verify-email/', views.VerifyEmailCodeView.as_view(), name='verify_email_code')
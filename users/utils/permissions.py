@@ -1,7 +1,82 @@
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import user_passes_test
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
+from django.db.models import Q
 from functools import wraps
 
+AUTHORIZATION_KEY = 'users:authz:{generation}:{user_id}'
+AUTHORIZATION_GENERATION_KEY = 'users:authz-generation'
+AUTHORIZATION_TIMEOUT = 60 * 60
+
+
+def _generation():
+    generation = cache.get(AUTHORIZATION_GENERATION_KEY)
+    if generation is None:
+        generation = 1
+        cache.add(AUTHORIZATION_GENERATION_KEY, generation, None)
+    return generation
+
+
+def _load_authorization(user_id):
+    """Group names and "app_label.codename" permissions of a user, from the database"""
+    flags = get_user_model().objects.filter(pk=user_id).values('is_active', 'is_superuser').first()
+    groups = list(Group.objects.filter(user__id=user_id).values_list('name', flat=True))
+
+    if not flags or not flags['is_active']:
+        permissions = Permission.objects.none()
+    elif flags['is_superuser']:
+        permissions = Permission.objects.all()
+    else:
+        permissions = Permission.objects.filter(Q(user__id=user_id) | Q(group__user__id=user_id))
+    permissions = permissions.values_list('content_type__app_label', 'codename').distinct()
+
+    return {
+        'groups': frozenset(groups),
+        'permissions': frozenset(f"{app_label}.{codename}" for app_label, codename in permissions),
+    }
+
+
+def get_authorization(user):
+    """
+    Cached group/permission sets for a user: memoized on the user object for
+    the rest of the request and shared through the cache across requests.
+    """
+    authz = getattr(user, '_authorization_cache', None)
+    if authz is None:
+        key = AUTHORIZATION_KEY.format(generation=_generation(), user_id=user.pk)
+        authz = cache.get(key)
+        if authz is None:
+            authz = _load_authorization(user.pk)
+            cache.set(key, authz, AUTHORIZATION_TIMEOUT)
+        user._authorization_cache = authz
+    return authz
+
+
+def get_group_names(user):
+    if not user.is_authenticated:
+        return frozenset()
+    return get_authorization(user)['groups']
+
+
+def get_permissions(user):
+    if not user.is_authenticated:
+        return frozenset()
+    return get_authorization(user)['permissions']
+
+
+def invalidate_user_authorization(user_id):
+    cache.delete(AUTHORIZATION_KEY.format(generation=_generation(), user_id=user_id))
+
+
+def invalidate_all_authorization():
+    """Drop every cached entry at once (e.g. a group's permissions changed)"""
+    try:
+        cache.incr(AUTHORIZATION_GENERATION_KEY)
+    except ValueError:
+        cache.set(AUTHORIZATION_GENERATION_KEY, _generation() + 1, None)
+
 
 def has_group_permission(group_names):
     """
@@ -15,7 +90,7 @@ def has_group_permission(group_names):
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
             if request.user.is_authenticated:
-                user_groups = request.user.groups.values_list('name', flat=True)
+                user_groups = get_group_names(request.user)
                 if any(group in user_groups for group in group_names):
                     return view_func(request, *args, **kwargs)
             raise PermissionDenied("You don't have permission to access this resource")
@@ -29,19 +104,19 @@ def check_user_permission(user, permission_codename):
     """
     Check if user has specific permission
     """
-    return user.has_perm(f"users.{permission_codename}")
+    return f"users.{permission_codename}" in get_permissions(user)
 
 
 def is_admin(user):
     """Check if user is in Admin group"""
-    return user.groups.filter(name='Admin').exists()
+    return 'Admin' in get_group_names(user)
 
 
 def is_moderator(user):
     """Check if user is in Moderator group"""
-    return user.groups.filter(name='Moderator').exists()
+    return 'Moderator' in get_group_names(user)
 
 
 def is_client(user):
     """Check if user is in Client group"""
-    return user.groups.filter(name='Client').exists()
\ No newline at end of file
+    return 'Client' in get_group_names(user)
@@ -1,61 +1,55 @@
 from django.conf import settings
-from django.core.mail import send_mail
-from rest_framework import status, generics, filters, viewsets
+from rest_framework import status, generics, viewsets
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import Q, Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
-from rest_framework_simplejwt.tokens import RefreshToken
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-import requests
-from django.core.files.base import ContentFile
 import string
 import random
 
 from .models import (
     User, UserEducation, UserExperience,
-    UserCertification, UserPortfolio, UserSocialLink
+    UserCertification, UserPortfolio, UserSocialLink, Skill
 )
+from .activity import record_activity
+from .avatars import queue_profile_picture
+from .emails import queue_email
+from .google_auth import get_google_verifier
+from .authentication import ClaimsJWTAuthentication, UserRefreshToken
+from .pagination import KeysetPagination
+from .profiles import (
+    add_validators, get_profile_cache_stats, get_public_profile,
+    get_public_profile_validators, load_profile, not_modified_response,
+    profile_validators, sparse_queryset
+)
+from .search import FullTextSearchFilter, RankedOrderingFilter, fuzzy_user_search
+from .skills import filter_by_skills, skill_facets
+from .utils.permissions import get_group_names, get_permissions, is_admin
+from .throttling import (
+    EmailVerificationIPThrottle, EmailVerificationUserThrottle, GoogleLoginIPThrottle,
+    LoginEmailThrottle, LoginIPThrottle, RegisterEmailThrottle, RegisterIPThrottle,
+    VerifyEmailCodeUserThrottle
+)
+from .stats import TOTAL_FIELDS, compute_platform_totals, get_daily_trends, get_latest_snapshot
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
     UserUpdateSerializer, UserListSerializer, ChangePasswordSerializer,
     UserEducationSerializer, UserExperienceSerializer,
-    UserCertificationSerializer, UserPortfolioSerializer, UserSocialLinkSerializer
+    UserCertificationSerializer, UserPortfolioSerializer, UserSocialLinkSerializer,
+    AdminUserListSerializer, get_fieldset_params
 )
 
 User = get_user_model()
 
 
-# Pagination class
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 # Helper functions
-def save_profile_picture_from_url(user, url):
-    if not url:
-        return
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            user.profile_picture.save(
-                f"{user.pk}.jpg",
-                ContentFile(response.content),
-                save=True
-            )
-    except Exception:
-        pass
-
-
 def generate_random_password(length=12):
     """Generate a secure random password"""
     chars = string.ascii_letters + string.digits + string.punctuation
@@ -77,14 +71,14 @@ def assign_user_to_group(user, group_name):
 class IsAdminUser(IsAuthenticated):
 
     def has_permission(self, request, view):
-        return (super().has_permission(request, view) and
-                request.user.groups.filter(name='Admin').exists())
+        return super().has_permission(request, view) and is_admin(request.user)
 
 
 # Authentication Views
 @method_decorator(csrf_exempt, name='dispatch')
 class GoogleLoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [GoogleLoginIPThrottle]
 
     def post(self, request):
         try:
@@ -94,8 +88,8 @@ class GoogleLoginView(APIView):
             if not token:
                 return Response({"error": "credential missing"}, status=400)
 
-            # Verify token with Google
-            idinfo = id_token.verify_oauth2_token(token, google_requests.Request())
+            # Verify token against Google's cached signing certificates
+            idinfo = get_google_verifier().verify(token)
 
             email = idinfo.get("email")
             name = idinfo.get("name")
@@ -136,14 +130,13 @@ class GoogleLoginView(APIView):
                 # Existing user - must keep their saved type
                 created = False
 
-            # Save Google profile picture if missing
+            # Fetch Google profile picture in the background if missing
             if picture_url and (created or not user.profile_picture):
-                save_profile_picture_from_url(user, picture_url)
-
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+                queue_profile_picture(user, picture_url)
 
-            serializer = UserProfileSerializer(user)
+            # Generate JWT tokens (groups claim reuses the prefetched groups)
+            serializer = UserProfileSerializer(load_profile(user))
+            refresh = UserRefreshToken.for_user(user)
 
             return Response({
                 "user": serializer.data,
@@ -157,12 +150,13 @@ class GoogleLoginView(APIView):
 
 
 class GetUserView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user
-        user_groups = list(user.groups.values_list('name', flat=True))
-        user_permissions = list(user.get_all_permissions())
+        user_groups = sorted(get_group_names(user))
+        user_permissions = sorted(get_permissions(user))
 
         return Response({
             "id": user.id,
@@ -175,6 +169,7 @@ class GetUserView(APIView):
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle, RegisterEmailThrottle]
 
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
@@ -185,8 +180,8 @@ class RegisterView(APIView):
             group_name = 'Freelancer' if user.user_type == 'freelancer' else 'Client'
             assign_user_to_group(user, group_name)
 
-            refresh = RefreshToken.for_user(user)
-            profile_serializer = UserProfileSerializer(user)
+            profile_serializer = UserProfileSerializer(load_profile(user))
+            refresh = UserRefreshToken.for_user(user)
 
             return Response({
                 'user': profile_serializer.data,
@@ -198,17 +193,17 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
-            profile_serializer = UserProfileSerializer(user)
+            profile_serializer = UserProfileSerializer(load_profile(user))
+            refresh = UserRefreshToken.for_user(user)
 
-            # Update last login IP
-            user.last_login_ip = request.META.get('REMOTE_ADDR')
-            user.save(update_fields=['last_login_ip'])
+            # Written with the next bulk activity flush
+            record_activity(user.pk, ip=request.META.get('REMOTE_ADDR'))
 
             return Response({
                 'user': profile_serializer.data,
@@ -240,8 +235,15 @@ class CurrentUserProfileView(APIView):
 
     def get(self, request):
         """Get current user's complete profile"""
-        serializer = UserProfileSerializer(request.user)
-        return Response(serializer.data)
+        fieldset = get_fieldset_params(request)
+        validators = profile_validators(User.objects.all(), request.user.pk, fieldset)
+        not_modified = not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = UserProfileSerializer(request.user, **fieldset)
+        load_profile(request.user, relations=serializer.requested_relations)
+        return add_validators(Response(serializer.data), validators, private=True)
 
 
 class UpdateUserProfileView(APIView):
@@ -252,7 +254,7 @@ class UpdateUserProfileView(APIView):
         serializer = UserUpdateSerializer(request.user, data=request.data, partial=False)
         if serializer.is_valid():
             serializer.save()
-            profile_serializer = UserProfileSerializer(request.user)
+            profile_serializer = UserProfileSerializer(load_profile(request.user))
             return Response(profile_serializer.data)
         else:
             print(serializer.errors)
@@ -263,7 +265,7 @@ class UpdateUserProfileView(APIView):
         serializer = UserUpdateSerializer(request.user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            profile_serializer = UserProfileSerializer(request.user)
+            profile_serializer = UserProfileSerializer(load_profile(request.user))
             return Response(profile_serializer.data)
         else:
             print(serializer.errors)
@@ -271,47 +273,57 @@ class UpdateUserProfileView(APIView):
 
 
 class UserProfileView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [AllowAny]
 
     def get(self, request, user_id):
         """Get public profile of any user"""
-        try:
-            user = User.objects.get(id=user_id, is_active=True)
-            serializer = UserProfileSerializer(user)
-
-            # Remove sensitive data for public view
-            data = serializer.data
-            sensitive_fields = [
-                'email', 'phone_number', 'last_login_ip', 'notification_preferences',
-                'privacy_settings', 'is_verified', 'phone_verified', 'identity_verified'
-            ]
-            for field in sensitive_fields:
-                data.pop(field, None)
-
-            return Response(data)
-        except User.DoesNotExist:
+        fieldset = get_fieldset_params(request)
+        validators = get_public_profile_validators(user_id, fieldset)
+        if validators is None:
             return Response({"error": "User not found"}, status=404)
 
+        not_modified = not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        data = get_public_profile(user_id, fieldset=fieldset)
+        if data is None:
+            return Response({"error": "User not found"}, status=404)
+        return add_validators(Response(data), validators)
+
 
 # User Search and Filtering
 class UserListView(generics.ListAPIView):
     """List and search users with filtering"""
+    authentication_classes = [ClaimsJWTAuthentication]
     serializer_class = UserListSerializer
-    pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = ['user_type', 'country', 'availability_status', 'experience_level']
-    search_fields = ['first_name', 'last_name', 'title', 'skills', 'bio']
-    ordering_fields = ['average_rating', 'hourly_rate', 'total_reviews', 'created_at']
+    ordering_fields = ['rank', 'average_rating', 'hourly_rate', 'total_reviews', 'created_at']
     ordering = ['-average_rating']
 
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(get_fieldset_params(self.request))
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Load only what the requested fieldset renders, plus the sort keys
+        serializer = self.get_serializer()
+        ordering = [str(term).lstrip('-') for term in queryset.query.order_by]
+        return sparse_queryset(queryset, serializer, extra_columns=ordering)
+
     def get_queryset(self):
         queryset = User.objects.filter(is_active=True)
 
-        # Filter by skills if provided
+        # Filter by skills if provided (skills_match=all requires every skill)
         skills = self.request.query_params.get('skills')
         if skills:
             skill_list = [skill.strip() for skill in skills.split(',')]
-            queryset = queryset.filter(skills__overlap=skill_list)
+            match = self.request.query_params.get('skills_match', 'any')
+            queryset = filter_by_skills(queryset, skill_list, match=match)
 
         # Filter by hourly rate range
         min_rate = self.request.query_params.get('min_rate')
@@ -329,6 +341,34 @@ class UserListView(generics.ListAPIView):
         return queryset
 
 
+class SkillFacetView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        """Most common skills among active users, optionally by user_type"""
+        queryset = User.objects.filter(is_active=True)
+        user_type = request.GET.get('user_type')
+        if user_type:
+            queryset = queryset.filter(user_type=user_type)
+
+        try:
+            limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+        except ValueError:
+            limit = 20
+
+        names = dict(Skill.objects.values_list('slug', 'name'))
+        facets = [
+            {
+                "slug": facet['skill'],
+                "name": names.get(facet['skill'], facet['skill']),
+                "count": facet['count'],
+            }
+            for facet in skill_facets(queryset, limit=limit)
+        ]
+        return Response({"skills": facets})
+
+
 # Education Management ViewSet
 class UserEducationViewSet(viewsets.ModelViewSet):
     serializer_class = UserEducationSerializer
@@ -407,14 +447,23 @@ class AdminUsersView(APIView):
     def get(self, request):
         """Admin only - Get all users with pagination and filtering"""
         # Apply filtering
-        queryset = User.objects.all()
+        queryset = User.objects.only(
+            'id', 'username', 'email', 'first_name', 'last_name', 'user_type',
+            'is_active', 'is_verified', 'profile_completion_percentage',
+            'created_at', 'last_activity'
+        ).prefetch_related(
+            Prefetch('groups', queryset=Group.objects.only('id', 'name'))
+        ).order_by('-created_at')
         user_type = request.GET.get('user_type')
         if user_type:
             queryset = queryset.filter(user_type=user_type)
 
-        # Apply search
+        # Apply search (served by the UPPER(col) trigram indexes);
+        # ?mode=fuzzy tolerates typos and ranks by similarity
         search = request.GET.get('search')
-        if search:
+        if search and request.GET.get('mode') == 'fuzzy':
+            queryset = fuzzy_user_search(queryset, search)
+        elif search:
             queryset = queryset.filter(
                 Q(email__icontains=search) |
                 Q(first_name__icontains=search) |
@@ -422,27 +471,11 @@ class AdminUsersView(APIView):
                 Q(username__icontains=search)
             )
 
-        # Pagination
-        paginator = StandardResultsSetPagination()
+        # Pagination (page numbers, or keyset with ?pagination=cursor)
+        paginator = KeysetPagination()
         result_page = paginator.paginate_queryset(queryset, request)
-
-        users_data = []
-        for user in result_page:
-            users_data.append({
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "full_name": user.full_name,
-                "user_type": user.user_type,
-                "groups": list(user.groups.values_list('name', flat=True)),
-                "is_active": user.is_active,
-                "is_verified": user.is_verified,
-                "profile_completion_percentage": user.profile_completion_percentage,
-                "created_at": user.created_at,
-                "last_activity": user.last_activity,
-            })
-
-        return paginator.get_paginated_response(users_data)
+        serializer = AdminUserListSerializer(result_page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class AssignUserGroupView(APIView):
@@ -485,7 +518,7 @@ class ToggleUserStatusView(APIView):
         try:
             user = User.objects.get(id=user_id)
             user.is_active = not user.is_active
-            user.save()
+            user.save()  # deactivating revokes the user's tokens (signals.py)
 
             return Response({
                 "message": f"User {user.username} {'activated' if user.is_active else 'deactivated'}",
@@ -501,28 +534,46 @@ class UserStatsView(APIView):
 
     def get(self, request):
         """Get platform statistics (Admin only)"""
-        total_users = User.objects.count()
-        total_freelancers = User.objects.filter(user_type='freelancer').count()
-        total_clients = User.objects.filter(user_type='client').count()
-        verified_users = User.objects.filter(is_verified=True).count()
-        premium_users = User.objects.filter(is_premium=True).count()
+        # Served from the latest snapshot when fresh; ?live=true forces a recount
+        snapshot = None
+        if request.GET.get('live') != 'true':
+            snapshot = get_latest_snapshot(settings.USER_STATS_SNAPSHOT_MAX_AGE)
+
+        if snapshot:
+            stats = {field: getattr(snapshot, field) for field in TOTAL_FIELDS}
+            stats['users_by_country'] = snapshot.users_by_country
+            generated_at = snapshot.created_at
+        else:
+            stats = compute_platform_totals()
+            generated_at = timezone.now()
 
-        # Get users by country (top 10)
-        users_by_country = User.objects.values('country').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]
+        try:
+            days = max(1, min(int(request.GET.get('days', 30)), 365))
+        except ValueError:
+            days = 30
 
+        total_users = stats['total_users']
         return Response({
             "total_users": total_users,
-            "total_freelancers": total_freelancers,
-            "total_clients": total_clients,
-            "verified_users": verified_users,
-            "premium_users": premium_users,
-            "verification_rate": (verified_users / total_users * 100) if total_users > 0 else 0,
-            "users_by_country": users_by_country,
+            "total_freelancers": stats['total_freelancers'],
+            "total_clients": stats['total_clients'],
+            "verified_users": stats['verified_users'],
+            "premium_users": stats['premium_users'],
+            "verification_rate": (stats['verified_users'] / total_users * 100) if total_users > 0 else 0,
+            "users_by_country": stats['users_by_country'],
+            "daily_trends": get_daily_trends(days),
+            "generated_at": generated_at,
         })
 
 
+class ProfileCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Public profile cache hit/miss counters (Admin only)"""
+        return Response(get_profile_cache_stats())
+
+
 # Utility Views
 class UpdateProfileCompletionView(APIView):
     permission_classes = [IsAuthenticated]
@@ -540,16 +591,26 @@ class UpdateProfileCompletionView(APIView):
 
 
 class UserPublicPortfolioView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [AllowAny]
 
     def get(self, request, user_id):
         """Get user's public portfolio items"""
+        freelancers = User.objects.filter(is_active=True, user_type='freelancer')
+        validators = profile_validators(freelancers, user_id, relations=['portfolio'])
+        if validators is None:
+            return Response({"error": "Freelancer not found"}, status=404)
+
+        not_modified = not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+
         try:
-            user = User.objects.get(id=user_id, is_active=True, user_type='freelancer')
+            user = freelancers.get(id=user_id)
             portfolio_items = UserPortfolio.objects.filter(user=user)
             serializer = UserPortfolioSerializer(portfolio_items, many=True)
 
-            return Response({
+            response = Response({
                 "user": {
                     "id": user.id,
                     "username": user.username,
@@ -563,6 +624,7 @@ class UserPublicPortfolioView(APIView):
                 },
                 "portfolio": serializer.data
             })
+            return add_validators(response, validators)
         except User.DoesNotExist:
             return Response({"error": "Freelancer not found"}, status=404)
 
@@ -576,6 +638,7 @@ def google_login(request):
 class SendEmailVerificationView(APIView):
     """Send email verification code to user's email address"""
     permission_classes = [IsAuthenticated]  # must be logged in
+    throttle_classes = [EmailVerificationUserThrottle, EmailVerificationIPThrottle]
 
     def post(self, request):
         try:
@@ -588,12 +651,13 @@ class SendEmailVerificationView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Generate new verification code
-            verification_code = user.generate_email_verification_token()
+            # Code and email are written together; delivery (and retries) happen in the outbox worker
+            with transaction.atomic():
+                # Generate new verification code
+                verification_code = user.generate_email_verification_token()
 
-            # Send email
-            subject = 'Verify Your Email Address'
-            message = f"""
+                subject = 'Verify Your Email Address'
+                message = f"""
 Hi {user.full_name or user.username},
 
 Please use the following code to verify your email address:
@@ -606,15 +670,9 @@ If you didn't request this verification, please ignore this email.
 
 Best regards,
 Your App Team
-            """
-
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                fail_silently=False,
-            )
+                """
+
+                queue_email(user.email, subject, message, user=user, category='email_verification')
 
             return Response(
                 {'message': 'Verification code sent to your email'},
@@ -631,6 +689,7 @@ Your App Team
 class VerifyEmailCodeView(APIView):
     """Verify email using the provided code"""
     permission_classes = [IsAuthenticated]
+    throttle_classes = [VerifyEmailCodeUserThrottle]
 
     def post(self, request):
         try: